@@ -5,8 +5,11 @@
 from analyzer.application.stages.components import TagComponentIDs  # noqa F401
 from analyzer.application.stages.components import ExtractComponentIDs  # noqa F401
 
+from collections.abc import Mapping
+
 from analyzer.pipeline.stage import PipelineStage
 from analyzer.pipeline.stage import PipelineStageResult
+from analyzer.util import FrozenView
 
 
 # For debugging/example.
@@ -14,8 +17,18 @@ class EmitResultToStdoutJsonL(PipelineStage):
     def process(self, record, state):
         import json
         from sys import stdout
+        # Frozen mappings and views are turned into dicts and lists
+        # level by level.
         print(json.dumps({
-            'record': record.__dict__,
+            'record': record.to_dict(),
             'results': state.__dict__
-        }), file=stdout)
+        }, default=_thawed), file=stdout)
         return PipelineStageResult()
+
+
+def _thawed(value):
+    if isinstance(value, FrozenView):
+        return value.thaw()
+    if isinstance(value, Mapping):
+        return dict(value)
+    return list(value)
@@ -3,35 +3,60 @@
     log processsing stages.
 """
 
+import re
+from typing import List, Sequence
+
 from analyzer.logs.record import LogRecord
+from analyzer.pipeline.patterns import register
 from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
 
 COMPONENT_NAMESPACE = 'hu.analyzer.component'
 COMPONENT_ID_PATTERN = r'component\sreference:\s(?P<component_id>\d+)'
 COMPONENT_TYPE_PATTERN = r'type:\s(?P<component_type>[\w\d]+(?:\.[\w\d]+))'
 
+COMPONENT_ID = register('component_id', COMPONENT_ID_PATTERN, re.I | re.X)
+COMPONENT_TYPE = register(
+    'component_type', COMPONENT_TYPE_PATTERN, re.I | re.X
+)
+
 
 class TagComponentIDs(PipelineStage):
     def process(self,
                 record: LogRecord,
                 state: PipelineStageResult) -> PipelineStageResult:
-        from re import search, I, X
-        if search(COMPONENT_ID_PATTERN, record.content, I | X):
+        if COMPONENT_ID.search(record):
             return PipelineStageResult(tags=[COMPONENT_NAMESPACE])
         return PipelineStageResult()
 
+    def process_batch(
+                self,
+                records: Sequence[LogRecord],
+                states: Sequence[PipelineStageResult]
+            ) -> List[PipelineStageResult]:
+        # Results are immutable, so records can share them.
+        tagged = PipelineStageResult(tags=[COMPONENT_NAMESPACE])
+        untagged = PipelineStageResult()
+
+        return [
+            tagged if COMPONENT_ID.search(record) else untagged
+            for record
+            in records
+        ]
+
 
 class ExtractComponentIDs(PipelineStage):
+    requires_tags = (COMPONENT_NAMESPACE,)
+
     def process(self,
                 record: LogRecord,
                 state: PipelineStageResult) -> PipelineStageResult:
-        from re import search, I, X
         if COMPONENT_NAMESPACE not in state.tags:
             return PipelineStageResult()
 
+        # Found again in the scan `TagComponentIDs` has made.
         cap = {
-            **search(COMPONENT_ID_PATTERN, record.content, I | X).groupdict(),
-            **search(COMPONENT_TYPE_PATTERN, record.content, I | X).groupdict()
+            **COMPONENT_ID.search(record).groupdict(),
+            **COMPONENT_TYPE.search(record).groupdict()
         }
         return PipelineStageResult(structured={
             COMPONENT_NAMESPACE: {
@@ -1,37 +1,37 @@
+from analyzer.pipeline.paths import Projection
 from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
 from analyzer.logs.record import LogRecord
 from analyzer.application.stages.sdata import STRUCTURED_DATA as STRUCT_D
 
 CONN_KEY = 'connections'
 
+# The keys of the ends of a connection in the results,
+# by their keys in the structured data.
+CONN_ENDS = {
+    'remName': 'rem_name',
+    'remPort': 'rem_port',
+    'locName': 'loc_name',
+    'locPort': 'loc_port',
+}
+
 
 class IdentifyConnectionsByPort(PipelineStage):
+    requires_structured = (STRUCT_D,)
+
+    # Within the structured data.
+    CONN_OPENED = Projection('connOpened')
+    ENDS = {name: Projection(key) for key, name in CONN_ENDS.items()}
+
     def process(self,
                 record: LogRecord,
                 state: PipelineStageResult) -> PipelineStageResult:
+        sdata = state.structured.get(STRUCT_D)
 
-        if not type(state.structured[STRUCT_D]) == list:
-            state = state.structured[STRUCT_D]
-            conn = {}
-            if 'connOpened' in state:
-
-                conn = {}
-                conn['rem_name'] = state['connOpened']['remName']
-                conn['rem_port'] = state['connOpened']['remPort']
-                conn['loc_name'] = state['connOpened']['locName']
-                conn['loc_port'] = state['connOpened']['locPort']
-                CONN_RESULT = PipelineStageResult(structured={CONN_KEY: conn})
-
-                return CONN_RESULT
-
-            elif state and 'remName' in state and 'locName' in state:
-
-                conn = {}
-                conn['rem_name'] = state['remName']
-                conn['rem_port'] = state['remPort']
-                conn['loc_name'] = state['locName']
-                conn['loc_port'] = state['locPort']
-                CONN_RESULT = PipelineStageResult(structured={CONN_KEY: conn})
-                return CONN_RESULT
+        if self.CONN_OPENED.exists(sdata):
+            sdata = self.CONN_OPENED(sdata)
+        elif not (self.ENDS['rem_name'].exists(sdata)
+                  and self.ENDS['loc_name'].exists(sdata)):
+            return PipelineStageResult()
 
-        return PipelineStageResult()
+        conn = {name: end(sdata) for name, end in self.ENDS.items()}
+        return PipelineStageResult(structured={CONN_KEY: conn})
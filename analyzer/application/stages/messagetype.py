@@ -1,3 +1,4 @@
+from analyzer.pipeline.paths import Projection
 from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
 from analyzer.logs.record import LogRecord
 
@@ -9,23 +10,28 @@ MESSAGE_TYPE = 'message_type'
 
 
 class IdentifyMessageType(PipelineStage):
+    requires_structured = (MSG_ID, STRUCTURED_DATA)
+
+    # Within the structured data.
+    # FIXME: assumes exactly zero or one instances in the list.
+    ASP_REQUEST = Projection('aspsSip[0].aspRequest')
+    INTERNAL_MESSAGE = Projection('internalMessage')
+    DESCRIPTION = Projection('description')
+
     def process(self,
                 record: LogRecord,
                 state: PipelineStageResult) -> PipelineStageResult:
-        if MSG_ID in state.structured and STRUCTURED_DATA in state.structured:
-            sdata = state.structured[STRUCTURED_DATA]
-            # FIXME: assumes exactly zero or one instances in the list.
-            for asp in sdata.get('aspsSip', []):
-                if 'aspRequest' not in asp:
-                    return PipelineStageResult()
-
-                req = asp['aspRequest']
-                if not req or not sdata['internalMessage']:
-                    return PipelineStageResult()
-
-                type_ = sdata['internalMessage']['description']
-                return PipelineStageResult(structured={
-                    MESSAGE_TYPE: type_
-                })
-
-        return PipelineStageResult()
+        structured = state.structured
+        if MSG_ID not in structured:
+            return PipelineStageResult()
+
+        sdata = structured.get(STRUCTURED_DATA)
+        if not self.ASP_REQUEST(sdata):
+            return PipelineStageResult()
+        message = self.INTERNAL_MESSAGE(sdata)
+        if not message:
+            return PipelineStageResult()
+
+        return PipelineStageResult(structured={
+            MESSAGE_TYPE: self.DESCRIPTION(message)
+        })
@@ -1,17 +1,20 @@
+import re
+
+from analyzer.pipeline.patterns import register
 from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
 from analyzer.logs.record import LogRecord
 
 STRUCTURED_DATA_PATTERN_ID = r'id\s+(?P<object_id>\d+)$'
 MSG_ID = 'message_id'
 
+OBJECT_ID = register('object_id', STRUCTURED_DATA_PATTERN_ID, re.I | re.X)
+
 
 class IdentifyMessage(PipelineStage):
     def process(self,
                 record: LogRecord,
                 state: PipelineStageResult) -> PipelineStageResult:
-
-        from re import search, I, X
-        match = search(STRUCTURED_DATA_PATTERN_ID, record.content, I | X)
+        match = OBJECT_ID.search(record)
         if match:
             return PipelineStageResult(structured={
                 MSG_ID: match.groupdict()['object_id']
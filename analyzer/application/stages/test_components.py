@@ -0,0 +1,57 @@
+from pytest import fixture
+
+from analyzer.logs.record import LogRecord
+from analyzer.application.stages.components import COMPONENT_NAMESPACE
+from analyzer.application.stages.components import TagComponentIDs
+from analyzer.application.stages.msg_id import IdentifyMessage, MSG_ID
+from analyzer.pipeline.stage import PipelineStageResult
+
+
+@fixture
+def records():
+    header = '2014/Oct/24 19:16:48.062933 111 SYSCALL -'
+    return [
+        LogRecord(f'{header} {content}')
+        for content
+        in [
+            'Component reference: 12 type: Foo.Bar',
+            'component reference: none',
+            'Message id 77',
+            'Message id 77 arrived',
+            'Message id 78\nsecond line id 79',
+            'Message id 80\n',
+            '',
+        ]
+    ]
+
+
+def test_tag_component_ids_in_batch(records):
+    stage = TagComponentIDs()
+    states = [PipelineStageResult()] * len(records)
+
+    batched = stage.process_batch(records, states)
+
+    assert [COMPONENT_NAMESPACE in r.tags for r in batched] == [
+        True, False, False, False, False, False, False
+    ]
+    assert [r.tags for r in batched] == [
+        stage.process(record, state).tags
+        for record, state
+        in zip(records, states)
+    ]
+
+
+def test_identify_message_in_batch(records):
+    stage = IdentifyMessage()
+    states = [PipelineStageResult()] * len(records)
+
+    batched = stage.process_batch(records, states)
+
+    assert [r.structured.get(MSG_ID) for r in batched] == [
+        None, None, '77', None, '79', '80', None
+    ]
+    assert [r.structured for r in batched] == [
+        stage.process(record, state).structured
+        for record, state
+        in zip(records, states)
+    ]
@@ -1,12 +1,29 @@
+import pickle
+
+import pytest
 from pytest import fixture
 
 from analyzer.logs.record import LogRecord
-from analyzer.application.stages.sdata import ParseSdata
+from analyzer.application.stages.connections import CONN_KEY
+from analyzer.application.stages.connections import IdentifyConnectionsByPort
+from analyzer.application.stages.sdata import ParseSdata, SegregateSdata
+from analyzer.application.stages.sdata import find_sdata
+from analyzer.application.stages.sdata import SdataList, SdataMap
 from analyzer.application.stages.sdata import STRUCTURED_DATA_AS_STRING
+from analyzer.application.stages.sdata import STRUCTURED_DATA_BLOCKS
 from analyzer.application.stages.sdata import STRUCTURED_DATA
+from analyzer.pipeline.paths import Projection
 from analyzer.pipeline.stage import PipelineStageResult
 
 
+@fixture
+def record():
+    return LogRecord(
+        '2014/Oct/24 19:16:48.062933 111 SYSCALL '
+        'ExampleComponentTest.ttcn:313(function:ExampleTestedFunction) asdf'
+    )
+
+
 @fixture
 def mapstr():
     return """{
@@ -33,13 +50,8 @@ def mapstr():
     }"""
 
 
-def test_parse_map(mapstr):
-    header = (
-        '2014/Oct/24 19:16:48.062933 111 SYSCALL ' +
-        'ExampleComponentTest.ttcn:313(function:ExampleTestedFunction)'
-    )
+def test_parse_map(record, mapstr):
     stage = ParseSdata()
-    record = LogRecord(f'{header} asdf')
     result = stage.process(record, PipelineStageResult(structured={
         STRUCTURED_DATA_AS_STRING: mapstr
     }))
@@ -76,3 +88,212 @@ def test_parse_map(mapstr):
     }
 
     assert sdata == expected
+
+
+def test_parse_returns_position_after_value():
+    stage = ParseSdata()
+    text = '{ a := "x" }, rest'
+    assert stage.parse_object(text, 0) == ({'a': 'x'}, text.index(','))
+    assert stage.parse_object(text, 7) == ('x', text.index(' }'))
+
+
+def test_parse_large_list_of_maps():
+    stage = ParseSdata()
+    message = {
+        'aspRequest': {
+            'method': 'INVITE',
+            'headers': {'via': ['10.0.0.1', '10.0.0.2'], 'expires': 30},
+            'payload': {'hex': '6869', 'plain': 'hi (there)'},
+        }
+    }
+    text = (
+        '{ aspRequest := { method := "INVITE", '
+        'headers := { via := { "10.0.0.1", "10.0.0.2" }, expires := 30 }, '
+        "payload := '6869'O (hi (there)) } }"
+    )
+    messages = '{ ' + ', '.join([text] * 1000) + ' }'
+    assert stage.parse_object(messages, 0) == (
+        [message] * 1000, len(messages)
+    )
+
+
+def test_views_parse_only_what_is_read(record):
+    stage = ParseSdata()
+    text = '{ read := { value := 1 }, unread := { broken := - } }'
+    result = stage.process(record, PipelineStageResult(structured={
+        STRUCTURED_DATA_AS_STRING: text
+    }))
+    sdata = result.structured[STRUCTURED_DATA]
+
+    assert isinstance(sdata, SdataMap)
+    assert [*sdata] == ['read', 'unread']
+    assert sdata['read'] == {'value': 1}
+    with pytest.raises(AssertionError):
+        sdata['unread']['broken']
+
+
+def test_projections_parse_only_their_path(record):
+    stage = ParseSdata()
+    text = '{ read := { value := 1 }, unread := { broken := - } }'
+    structured = stage.process(record, PipelineStageResult(structured={
+        STRUCTURED_DATA_AS_STRING: text
+    })).structured
+
+    value = Projection(f'{STRUCTURED_DATA}.read.value', [STRUCTURED_DATA])
+    assert value(structured) == 1
+    missing = Projection(f'{STRUCTURED_DATA}.unread.x', [STRUCTURED_DATA])
+    with pytest.raises(AssertionError):
+        missing(structured)
+
+
+def test_views_equal_parsed_data(mapstr):
+    stage = ParseSdata()
+    view = stage.view(mapstr, 0)
+    parsed, _ = stage.parse_object(mapstr, 0)
+
+    assert isinstance(view['list'], SdataList)
+    assert view == parsed
+    assert pickle.loads(pickle.dumps(view)) == parsed
+    assert view.thaw() == parsed
+    assert view['a_nested'].thaw() == parsed['a_nested']
+
+
+def test_views_skip_values_as_the_parser_does():
+    # The decoded octetstring has a parenthesis of its own.
+    record = LogRecord(
+        '2014/Oct/24 19:16:48.062933 111 PORTEVENT '
+        'SipTests.ttcn:313(function:f_init) Sent on p: '
+        "{ payload := '3A29'O (:)), remName := \"a\", remPort := 5060, "
+        'locName := "b", locPort := 5061 }'
+    )
+    state = SegregateSdata().process(record, PipelineStageResult())
+    state = state.merge(ParseSdata().process(record, state))
+
+    conn = IdentifyConnectionsByPort().process(record, state)
+    assert conn.structured[CONN_KEY] == {
+        'rem_name': 'a',
+        'rem_port': 5060,
+        'loc_name': 'b',
+        'loc_port': 5061,
+    }
+    assert state.structured[STRUCTURED_DATA]['payload'] == {
+        'hex': '3A29', 'plain': ':'
+    }
+
+
+def test_closing_braces_are_the_ones_the_parser_closes(mapstr):
+    stage = ParseSdata()
+    texts = [
+        mapstr,
+        # Braces and parentheses within strings and parentheses.
+        '{ a := { b := "say \'}\'", c := \'29\'O (:)) }, '
+        'd := { "x", Y (f(}) g), { e := omit } } }',
+        # Not parsed the way the braces suggest.
+        '{ a := { 1 }, b := 2 }',
+    ]
+    for text in texts:
+        closing = stage.closing_braces(text, 0)
+        assert closing
+        for start, end in closing.items():
+            assert stage.parse_object(text, start)[1] == end
+        assert stage.view(text, 0) == stage.parse_object(text, 0)[0]
+
+
+def test_closing_braces_of_malformed_values_are_found_at_once():
+    # Matching these against patterns of well formed values
+    # took time exponential in the number of entries.
+    stage = ParseSdata()
+    ports = ', '.join(f'port{i} := 60836' for i in range(40))
+    text = '{ status := { ' + ports + ', ratio := 1.000000e+10 } }'
+    assert stage.view(text, 0) == stage.parse_object(text, 0)[0]
+
+    text = '{ status := { ' + ports + ', verdict := pass } }'
+    with pytest.raises(AssertionError):
+        stage.parse_object(text, 0)
+    with pytest.raises(AssertionError):
+        dict(stage.view(text, 0))
+
+
+def test_repeated_sdata_is_parsed_once(record):
+    stage = ParseSdata()
+    texts = ['{ status := "up" }'] * 2 + ['{ status := "down" }']
+    parsed = [
+        stage.process(record, PipelineStageResult(structured={
+            STRUCTURED_DATA_AS_STRING: text
+        })).structured[STRUCTURED_DATA]
+        for text in texts
+    ]
+
+    assert parsed[0] is parsed[1]
+    assert parsed[2] == {'status': 'down'}
+    assert stage.statistics()['hits'] == 1
+    assert stage.statistics()['misses'] == 2
+
+
+def test_cache_can_be_turned_off(record):
+    stage = ParseSdata(cache_size=0)
+    state = PipelineStageResult(structured={
+        STRUCTURED_DATA_AS_STRING: '{ status := "up" }'
+    })
+
+    first = stage.process(record, state).structured[STRUCTURED_DATA]
+    assert stage.process(record, state).structured[STRUCTURED_DATA] == first
+    assert stage.process(record, state).structured[STRUCTURED_DATA] \
+        is not first
+    assert stage.statistics() == {}
+
+
+def found(content):
+    return [content[start:end] for start, end in find_sdata(content)]
+
+
+def test_find_every_block():
+    content = 'x {a} { a := "}", b := { c := 1 } } tail { d := 2 } {'
+    assert found(content) == [
+        '{ a := "}", b := { c := 1 } }', '{ d := 2 }'
+    ]
+
+
+def test_find_blocks_within_unclosed_braces():
+    assert found('{ broken { a := 1 } { b } ') == ['{ a := 1 }']
+    assert found('{ a := 1 }} { b := 2') == ['{ a := 1 }']
+
+
+def test_find_quotes_only_within_braces():
+    content = "it's { a := 'x' } and { b := \"y}\" }"
+    assert found(content) == ["{ a := 'x' }", '{ b := "y}" }']
+    assert found('{ a := "\\"}" }') == ['{ a := "\\"}" }']
+
+
+def test_find_after_unterminated_string():
+    # The quote is taken for any other character then.
+    assert found('{ a := "x }, { b := 1 }') == ['{ a := "x }', '{ b := 1 }']
+    assert found('{ "x := 1 } {') == ['{ "x := 1 }']
+
+
+def test_find_nothing():
+    assert found('{ "no" } {} }{') == []
+    assert found('{ a : 1 ' * 10000 + '}' * 10000) == []
+
+
+def test_segregate_sdata():
+    stage = SegregateSdata()
+    header = '2014/Oct/24 19:16:48.062933 111 PORTEVENT - '
+
+    one = stage.process(
+        LogRecord(header + 'Sent on p: @M.T : { a := 1 } id 3'),
+        PipelineStageResult()
+    ).structured
+    assert one[STRUCTURED_DATA_AS_STRING] == '{ a := 1 }'
+    assert STRUCTURED_DATA_BLOCKS not in one
+
+    two = stage.process(
+        LogRecord(header + '{ a := 1 } and { b := 2 }'),
+        PipelineStageResult()
+    ).structured
+    assert two[STRUCTURED_DATA_AS_STRING] == '{ a := 1 }'
+    assert [*two[STRUCTURED_DATA_BLOCKS]] == ['{ a := 1 }', '{ b := 2 }']
+
+    assert not stage.process(
+        LogRecord(header + 'no { data } here'), PipelineStageResult()
+    )
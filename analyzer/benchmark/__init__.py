@@ -0,0 +1,4 @@
+"""
+    Benchmarks of the analyzer, on synthetic logs,
+    see `python -m analyzer.benchmark --help`.
+"""
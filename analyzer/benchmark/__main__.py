@@ -0,0 +1,159 @@
+from analyzer.benchmark.generator import LogGenerator
+from analyzer.benchmark.scenarios import (
+    DEFAULT_THRESHOLD, Workload, compare, measure, select
+)
+
+from argparse import ArgumentParser
+from inspect import signature
+from platform import python_version
+from sys import stderr
+from tempfile import TemporaryDirectory
+import json
+
+'''
+Main file for module
+'''
+
+DEFAULTS = {
+    name: parameter.default
+    for name, parameter
+    in signature(LogGenerator).parameters.items()
+}
+
+parser = ArgumentParser(
+    prog='python -m analyzer.benchmark',
+    description='Measures the speed of the analyzer on a generated log.'
+)
+parser.add_argument(
+    '--records', type=int, default=20000, metavar='N',
+    help='generate a log of N records'
+)
+parser.add_argument(
+    '--seed', type=int, default=DEFAULTS['seed'],
+    help='seed of the generator, the same seed gives the same log'
+)
+for option, help_text in (
+    ('component_refs', 'share of records announcing a new component'),
+    ('connections', 'share of records with a connOpened in their sdata'),
+    ('message_ids', 'share of SIP messages, with a message id'),
+    ('sdata', 'share of records with other structured data'),
+    ('multiline', 'share of records spanning several lines'),
+    ('repeats', 'share of records repeating the content of a recent one '
+                'with structured data'),
+):
+    parser.add_argument(
+        f'--{option.replace("_", "-")}', type=float,
+        default=DEFAULTS[option], metavar='SHARE', help=help_text
+    )
+parser.add_argument(
+    '--sdata-depth', type=int, default=DEFAULTS['sdata_depth'], metavar='N',
+    help='how deep structured data may nest'
+)
+parser.add_argument(
+    '-k', '--scenario', action='append', default=[], metavar='PATTERN',
+    help='run only the scenarios matching PATTERN, e.g. "stage:*"; '
+         'may be given more than once'
+)
+parser.add_argument(
+    '--list', action='store_true', help='list the scenarios and exit'
+)
+parser.add_argument(
+    '--repeat', type=int, default=3, metavar='N',
+    help='run every scenario N times, and keep the fastest run'
+)
+parser.add_argument(
+    '--directory', metavar='DIR',
+    help='write the generated log and its other forms into DIR, '
+         'instead of a temporary directory'
+)
+parser.add_argument(
+    '--output', metavar='FILE', help='save the results as JSON into FILE'
+)
+parser.add_argument(
+    '--baseline', metavar='FILE',
+    help='compare the results with the ones saved into FILE, '
+         'and exit with 1 if any scenario got slower than the threshold'
+)
+parser.add_argument(
+    '--threshold', type=float, default=DEFAULT_THRESHOLD, metavar='SHARE',
+    help='how much slower than the baseline a scenario may get, '
+         f'{DEFAULT_THRESHOLD} by default'
+)
+args = parser.parse_args()
+
+names = select(args.scenario)
+if args.list:
+    print('\n'.join(names))
+    exit(0)
+if not names:
+    parser.error(f'no scenario matches {args.scenario}, see --list')
+if args.records < 1:
+    parser.error('--records must be positive')
+if args.repeat < 1:
+    parser.error('--repeat must be positive')
+
+baseline = None
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+
+def run(directory: str) -> dict:
+    options = {}
+    # Only if asked for, so baselines measured before repeats were added
+    # are still measured on the same log.
+    if args.repeats:
+        options['repeats'] = args.repeats
+    workload = Workload(
+        directory, args.records,
+        seed=args.seed,
+        component_refs=args.component_refs,
+        connections=args.connections,
+        message_ids=args.message_ids,
+        sdata=args.sdata,
+        multiline=args.multiline,
+        sdata_depth=args.sdata_depth,
+        **options
+    )
+    print(f'{workload.records} records, {workload.size / 1e6:.1f} MB')
+    print(f"{'scenario':<40} {'seconds':>9} {'records/s':>12} {'MB/s':>9}")
+
+    results = {}
+    for name in names:
+        result = measure(workload, name, args.repeat)
+        results[name] = result
+        print(
+            f"{name:<40} {result['seconds']:>9.3f} "
+            f"{result['records_per_second']:>12.0f} "
+            f"{result['mb_per_second']:>9.2f}"
+        )
+
+    return {
+        'python': python_version(),
+        'log': workload.describe(),
+        'scenarios': results,
+    }
+
+
+if args.directory:
+    results = run(args.directory)
+else:
+    with TemporaryDirectory() as directory:
+        results = run(directory)
+
+if args.output:
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+if baseline is not None:
+    try:
+        compared = compare(results, baseline, args.threshold)
+    except ValueError as e:
+        print(e, file=stderr)
+        exit(2)
+
+    print(f"\n{'scenario':<40} {'speed':>9}")
+    for name, ratio, passed in compared:
+        print(f'{name:<40} {ratio:>9.1%}' + ('' if passed else '  SLOWER'))
+    if not all(passed for _, _, passed in compared):
+        exit(1)
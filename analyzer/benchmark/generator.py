@@ -0,0 +1,330 @@
+"""
+    A generator of synthetic logs, in the format of TTCN-3 test executors,
+    for measuring the speed of the analyzer.
+
+    The same options and seed always give the same log,
+    so measurements of different versions can be compared.
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+from random import Random
+from typing import Iterator, List, Optional
+
+START = datetime(2014, 10, 24, 19, 16, 48)
+
+APPLICATIONS = ('mtc', 'hc', '3112', '3113', '3114', '3115')
+
+EVENT_TYPES = (
+    'PORTEVENT', 'TIMEROP', 'USER', 'MATCHING', 'PARALLEL',
+    'FUNCTION', 'EXECUTOR', 'VERDICTOP', 'DEBUG',
+)
+
+MODULES = ('SipTests', 'SipFunctions', 'DiameterTests', 'CommonFunctions')
+
+FUNCTIONS = (
+    'f_init', 'f_send_request', 'f_receive_response', 'f_check_state',
+    'f_cleanup', 'tc_register', 'tc_invite', 'tc_bye',
+)
+
+COMPONENT_TYPES = (
+    'SipTests.SIP_CT', 'SipTests.UE_CT', 'DiameterTests.HSS_CT',
+    'CommonFunctions.Main_CT',
+)
+
+SIP_METHODS = ('INVITE', 'REGISTER', 'BYE', 'ACK', 'OPTIONS', 'CANCEL')
+
+HOSTS = ('10.0.0.1', '10.0.0.2', '192.168.1.10', 'proxy.example.com')
+
+# None of them is a key the stages look for,
+# so random data cannot be mistaken for a connection or a SIP message.
+FIELDS = (
+    'callId', 'cseq', 'branch', 'expires', 'contact', 'userAgent',
+    'maxForwards', 'status', 'reason', 'payload', 'options', 'params',
+    'route', 'via', 'tag', 'realm', 'nonce', 'flags',
+)
+
+ENUMS = ('STATE_IDLE', 'STATE_CALLING', 'STATE_CONNECTED', 'e_none')
+
+MESSAGES = (
+    'Timer T1 started, duration 0.5 s.',
+    'Timer T1 stopped.',
+    'Function {function} started.',
+    'Function {function} finished.',
+    'Setting verdict to pass.',
+    'Matching on port sip_port succeeded.',
+    'Port sip_port was started.',
+    'Waiting for a response from {host}.',
+)
+
+# How many of the latest records with structured data may be repeated.
+RECENT = 64
+
+CONTINUATIONS = (
+    'Stack trace of the caller:',
+    'in {module}.ttcn:{line} ({function})',
+    'Operation finished without errors.',
+    'Additional information: {host}',
+)
+
+
+class LogGenerator:
+    """
+        Generates log records of several kinds.
+
+        Each option is the share of the records of a kind;
+        the rest of the records are plain messages:
+
+        :param component_refs: Announcements of new components,
+        what `TagComponentIDs` looks for.
+        :param connections: Records with a `connOpened` in their sdata.
+        :param message_ids: SIP messages with an id at their end,
+        for `IdentifyMessage` and `IdentifyMessageType`.
+        :param sdata: Records with other structured data.
+
+        :param multiline: The share of the records
+        that span more than one line,
+        either with their sdata spread over several lines,
+        or with some lines of plain text added.
+        :param sdata_depth: How deep structured data may nest.
+        :param repeats: The share of the records repeating the content
+        of one of the latest records with structured data,
+        like periodic status messages and retransmissions do.
+    """
+
+    def __init__(self,
+                 seed: int = 0,
+                 component_refs: float = 0.05,
+                 connections: float = 0.05,
+                 message_ids: float = 0.1,
+                 sdata: float = 0.3,
+                 multiline: float = 0.2,
+                 sdata_depth: int = 3,
+                 repeats: float = 0):
+        assert 0 <= component_refs + connections + message_ids + sdata <= 1, \
+            'The shares of the kinds of records must add up to at most 1.'
+        assert 0 <= multiline <= 1, 'The share must be between 0 and 1.'
+        assert 0 <= repeats <= 1, 'The share must be between 0 and 1.'
+        assert sdata_depth >= 1, 'Structured data has at least one level.'
+
+        self._random = Random(seed)
+        self._thresholds = []
+        share = 0
+        for kind, kind_share in (
+            (self._component, component_refs),
+            (self._connection, connections),
+            (self._sip_message, message_ids),
+            (self._sdata, sdata),
+        ):
+            share += kind_share
+            self._thresholds.append((share, kind))
+
+        self.multiline = multiline
+        self.sdata_depth = sdata_depth
+        self.repeats = repeats
+        self._recent = deque(maxlen=RECENT)
+        self._time = START
+        self._component_id = 2
+
+    def records(self, count: int) -> Iterator[str]:
+        """
+            Yields `count` records, lines of a record joined by newlines.
+        """
+        for _ in range(count):
+            yield f'{self._header()} {self._content()}'
+
+    def lines(self, count: int) -> Iterator[str]:
+        """
+            Yields the lines of `count` records, ending with newlines,
+            as if they were read from a file.
+        """
+        for record in self.records(count):
+            for line in record.split('\n'):
+                yield line + '\n'
+
+    def _header(self) -> str:
+        rng = self._random
+        self._time += timedelta(microseconds=rng.randint(1, 5000))
+        time = self._time
+        stamp = (
+            f'{time.year}/{time:%b}/{time.day:02} '
+            f'{time.hour:02}:{time.minute:02}:{time.second:02}'
+            f'.{time.microsecond:06}'
+        )
+
+        if rng.random() < 0.1:
+            scope = '-'
+        else:
+            scope = (
+                f'{rng.choice(MODULES)}.ttcn:{rng.randint(1, 3000)}'
+                f'(function:{rng.choice(FUNCTIONS)})'
+            )
+
+        return (
+            f'{stamp} {rng.choice(APPLICATIONS)} '
+            f'{rng.choice(EVENT_TYPES)} {scope}'
+        )
+
+    def _content(self) -> str:
+        # Without repeats, no random number is drawn for them,
+        # so the log is the same as it was before they were added.
+        if self.repeats and self._recent:
+            if self._random.random() < self.repeats:
+                return self._random.choice(self._recent)
+
+        choice = self._random.random()
+        for threshold, kind in self._thresholds:
+            if choice < threshold:
+                content = kind()
+                # Components are announced only once.
+                if self.repeats and kind != self._component:
+                    self._recent.append(content)
+                return content
+        return self._plain()
+
+    def _spread(self) -> Optional[str]:
+        """
+            The indentation of the lines of the record,
+            or None if it should fit on a single line.
+        """
+        if self._random.random() < self.multiline:
+            return '    '
+        return None
+
+    def _plain(self) -> str:
+        rng = self._random
+        content = self._fill(rng.choice(MESSAGES))
+        if rng.random() < self.multiline:
+            content += ''.join(
+                '\n    ' + self._fill(rng.choice(CONTINUATIONS))
+                for _ in range(rng.randint(1, 4))
+            )
+        return content
+
+    def _fill(self, text: str) -> str:
+        rng = self._random
+        return text.format(
+            function=rng.choice(FUNCTIONS),
+            module=rng.choice(MODULES),
+            host=rng.choice(HOSTS),
+            line=rng.randint(1, 3000)
+        )
+
+    def _component(self) -> str:
+        self._component_id += 1
+        return (
+            f'PTC was created. '
+            f'Component reference: {self._component_id}, '
+            f'alive: no, type: {self._random.choice(COMPONENT_TYPES)}.'
+        )
+
+    def _connection(self) -> str:
+        rng = self._random
+        return 'Connection opened: ' + _render(
+            [('connOpened', _render([
+                ('remName', _quote(rng.choice(HOSTS))),
+                ('remPort', str(rng.randint(1024, 65535))),
+                ('locName', _quote(rng.choice(HOSTS))),
+                ('locPort', str(rng.randint(1024, 65535))),
+            ], None))],
+            self._spread()
+        )
+
+    def _sip_message(self) -> str:
+        rng = self._random
+        indent = self._spread()
+        method = rng.choice(SIP_METHODS)
+        request = _render([
+            ('method', _quote(method)),
+            ('requestUri', _quote(f'sip:user@{rng.choice(HOSTS)}')),
+            ('headers', self._map(self.sdata_depth - 2, indent, 4)),
+        ], indent, 3)
+        sdata = _render([
+            ('aspsSip', _render_list([_render(
+                [('aspRequest', request)], indent, 2
+            )], indent, 1)),
+            ('internalMessage', _render([
+                ('description', _quote(method)),
+            ], indent, 1)),
+        ], indent)
+        return (
+            f'Sent on sip_port to system '
+            f'@SipTypes.ASP_SIP_Message : {sdata} id {rng.randint(1, 10**6)}'
+        )
+
+    def _sdata(self) -> str:
+        rng = self._random
+        return (
+            f'Received on sip_port from system '
+            f'@SipTypes.{rng.choice(FIELDS).capitalize()} : '
+            f'{self._map(self.sdata_depth - 1, self._spread(), 0)}'
+        )
+
+    def _map(self, depth: int, indent: Optional[str], level: int) -> str:
+        rng = self._random
+        return _render([
+            (key, self._value(depth, indent, level + 1))
+            for key
+            in rng.sample(FIELDS, rng.randint(1, 6))
+        ], indent, level)
+
+    def _value(self, depth: int, indent: Optional[str], level: int) -> str:
+        rng = self._random
+        kind = rng.randrange(10 if depth > 0 else 8)
+        if kind == 0:
+            return str(rng.randint(-1000, 10**6))
+        if kind == 1:
+            return f'{rng.uniform(-100, 100):.3f}'
+        if kind == 2:
+            return rng.choice(('true', 'false'))
+        if kind == 3:
+            return rng.choice(('omit', '<unbound>'))
+        if kind == 4:
+            text = rng.choice(FUNCTIONS)
+            return f"'{text.encode().hex().upper()}'O ({text})"
+        if kind == 5:
+            return f'{rng.choice(ENUMS)} ({rng.randint(0, 15)})'
+        if kind == 6:
+            return _render_list(
+                [_quote(rng.choice(HOSTS)) for _ in range(rng.randint(1, 4))],
+                None
+            )
+        if kind == 7:
+            return _quote(self._fill(rng.choice(MESSAGES)))
+        return self._map(depth - 1, indent, level)
+
+
+def _quote(text: str) -> str:
+    return f'"{text}"'
+
+
+def _render(fields: List[tuple], indent: Optional[str], level: int = 0) -> str:
+    return _render_list(
+        [f'{key} := {value}' for key, value in fields], indent, level
+    )
+
+
+def _render_list(items: List[str],
+                 indent: Optional[str],
+                 level: int = 0) -> str:
+    if indent is None:
+        return '{ ' + ', '.join(items) + ' }'
+
+    inside = '\n' + indent * (level + 1)
+    return (
+        '{' + inside + (',' + inside).join(items) +
+        '\n' + indent * level + '}'
+    )
+
+
+def write_log(path: str, count: int, **options) -> int:
+    """
+        Writes a log of `count` records,
+        generated by a `LogGenerator` with the given options.
+
+        :returns: The size of the log in bytes.
+    """
+    from os.path import getsize
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.writelines(LogGenerator(**options).lines(count))
+    return getsize(path)
@@ -0,0 +1,502 @@
+"""
+    This module contains the timed scenarios of the benchmark,
+    and the comparison of their results with a saved baseline.
+
+    Every scenario processes the same generated log,
+    so its speed is reported both in records and in megabytes per second.
+"""
+
+import gc
+import os
+from contextlib import contextmanager, redirect_stdout
+from fnmatch import fnmatchcase
+from glob import glob
+from time import perf_counter
+from typing import (
+    Callable, ContextManager, Dict, Iterable, List, Tuple
+)
+
+from analyzer.benchmark.generator import write_log
+from analyzer.logs.record import LogRecord
+
+EXAMPLES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'examples'
+)
+
+# The stages of this pipeline are measured one by one, too.
+STAGES_OF = os.path.join(EXAMPLES, 'complex_pipeline.yml')
+
+DEFAULT_THRESHOLD = 0.1
+
+# About the size of the largest SIP messages of real logs.
+LARGE_SDATA_SIZE = 64 * 1024
+
+
+class Workload:
+    """
+        A generated log, written to `directory`,
+        and the forms the scenarios read it in,
+        each prepared once, when a scenario first asks for it.
+    """
+
+    def __init__(self, directory: str, records: int, **options):
+        self.directory = directory
+        self.records = records
+        self.options = options
+        self.path = os.path.join(directory, 'benchmark.log')
+        self.size = write_log(self.path, records, **options)
+
+        self._prepared = {}
+
+    def describe(self) -> dict:
+        """
+            What results can only be compared with
+            if they were measured on the same log.
+        """
+        return {'records': self.records, 'bytes': self.size, **self.options}
+
+    def lines(self) -> List[str]:
+        return self._prepare('lines', self._read_lines)
+
+    def texts(self) -> List[str]:
+        """
+            The records as single strings, the way `LogRecord` takes them.
+        """
+        return self._prepare('texts', lambda: [
+            '\n'.join(lines)
+            for lines
+            in _gather_records(self.lines())
+        ])
+
+    def parsed(self) -> List[LogRecord]:
+        from analyzer.logs.parsing import scan_records
+
+        def parse() -> List[LogRecord]:
+            records = [*scan_records(self.lines())]
+            for record in records:
+                record.content
+            assert len(records) == self.records
+            return records
+
+        return self._prepare('parsed', parse)
+
+    def bodies(self) -> List[str]:
+        """
+            The contents of the records,
+            gathered into bodies of `LARGE_SDATA_SIZE` characters.
+        """
+        def gather() -> List[str]:
+            bodies = []
+            gathered = []
+            size = 0
+            for record in self.parsed():
+                gathered.append(str(record.content))
+                size += len(gathered[-1])
+                if size >= LARGE_SDATA_SIZE:
+                    bodies.append('\n'.join(gathered))
+                    gathered = []
+                    size = 0
+            if gathered:
+                bodies.append('\n'.join(gathered))
+            return bodies
+
+        return self._prepare('bodies', gather)
+
+    def compressed(self, codec: str) -> str:
+        """
+            :param codec: The name of a module of the standard library,
+            'gzip', 'bz2' or 'lzma'.
+            :returns: The path of the compressed log.
+        """
+        def compress() -> str:
+            from importlib import import_module
+            path = f'{self.path}.{codec}'
+            with open(self.path, 'rb') as plain, \
+                    import_module(codec).open(path, 'wb') as compressed:
+                compressed.write(plain.read())
+            return path
+
+        return self._prepare(f'compressed {codec}', compress)
+
+    def cache(self) -> str:
+        def write() -> str:
+            from analyzer.logs.cache import write_cache
+            path = f'{self.path}.cache'
+            write_cache(self.parsed(), path)
+            return path
+
+        return self._prepare('cache', write)
+
+    def stage_inputs(self) -> List[Tuple[str, object, list]]:
+        """
+            The name and an instance of every stage of `STAGES_OF`,
+            in the order the pipeline runs them,
+            with the combined results of the stages before it,
+            for every record.
+        """
+        def run_stages() -> List[Tuple[str, object, list]]:
+            from analyzer.pipeline.pipeline import merge_results
+            from analyzer.pipeline.stage import PipelineStageResult
+            from analyzer.util import import_from
+
+            records = self.parsed()
+            states = [PipelineStageResult()] * len(records)
+            inputs = []
+            for definition in _configuration(STAGES_OF).stages_in_order():
+                stage = import_from(definition.module, definition.klass)(
+                    **definition.options
+                )
+                inputs.append((definition.name, stage, states))
+                with _discarded_output():
+                    states = merge_results(states, stage.process_batch(
+                        records, states
+                    ))
+            return inputs
+
+        return self._prepare('stage inputs', run_stages)
+
+    def _prepare(self, name: str, prepare: Callable[[], object]):
+        if name not in self._prepared:
+            self._prepared[name] = prepare()
+        return self._prepared[name]
+
+    def _read_lines(self) -> List[str]:
+        with open(self.path, encoding='utf-8') as f:
+            return f.readlines()
+
+
+def _gather_records(lines: List[str]):
+    from analyzer.logs.parsing import gather_records
+    return gather_records(lines)
+
+
+def _definition(path: str) -> dict:
+    from analyzer.pipeline.plan import parse_definition
+    with open(path, 'rb') as f:
+        return parse_definition(f.read())
+
+
+def _configuration(path: str):
+    # Validated every time, as the CLI does without its plan cache.
+    from analyzer.pipeline.plan import load_configuration
+    return load_configuration(path)
+
+
+@contextmanager
+def _discarded_output():
+    """
+        Stages printing their results, like `EmitResultToStdoutJsonL`,
+        print into nothing while they are measured.
+    """
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+
+# Every scenario returns the seconds spent on the measured work,
+# so it can prepare its input beforehand, without being timed.
+Scenario = Callable[[Workload], float]
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str) -> Callable[[Scenario], Scenario]:
+    def register(run: Scenario) -> Scenario:
+        SCENARIOS[name] = run
+        return run
+    return register
+
+
+@scenario('gather_records')
+def _gather(workload: Workload) -> float:
+    lines = workload.lines()
+    started = perf_counter()
+    for _ in _gather_records(lines):
+        pass
+    return perf_counter() - started
+
+
+@scenario('scan_records')
+def _scan(workload: Workload) -> float:
+    from analyzer.logs.parsing import scan_records
+    lines = workload.lines()
+    started = perf_counter()
+    for _ in scan_records(lines):
+        pass
+    return perf_counter() - started
+
+
+@scenario('log_record')
+def _log_record(workload: Workload) -> float:
+    texts = workload.texts()
+    started = perf_counter()
+    for text in texts:
+        LogRecord(text)
+    return perf_counter() - started
+
+
+@scenario('log_record_timestamp')
+def _timestamp(workload: Workload) -> float:
+    records = [LogRecord(text) for text in workload.texts()]
+    started = perf_counter()
+    for record in records:
+        record.timestamp
+    return perf_counter() - started
+
+
+def _reading(name: str,
+             prepare: Callable[[Workload], str],
+             open_records: Callable[[str], ContextManager[Iterable]]):
+    """
+        Registers a scenario reading every record of a file,
+        the header and content of each of them included.
+
+        :param prepare: Returns the path of the file to read.
+    """
+    @scenario(f'read:{name}')
+    def read(workload: Workload) -> float:
+        path = prepare(workload)
+        started = perf_counter()
+        with open_records(path) as records:
+            for record in records:
+                record.event_type
+                record.content
+        return perf_counter() - started
+
+
+@contextmanager
+def _scanned(path: str):
+    from analyzer.logs.compressed import open_log
+    from analyzer.logs.parsing import scan_records
+    with open_log(path) as lines:
+        yield scan_records(lines)
+
+
+def _mapped(path: str):
+    from analyzer.logs.mapped import MappedLog
+    return MappedLog(path)
+
+
+def _cached(path: str):
+    from analyzer.logs.cache import CachedLog
+    return CachedLog(path)
+
+
+_reading('text', lambda workload: workload.path, _scanned)
+_reading('mapped', lambda workload: workload.path, _mapped)
+_reading('cache', Workload.cache, _cached)
+for _codec in ('gzip', 'bz2', 'lzma'):
+    _reading(
+        _codec,
+        lambda workload, codec=_codec: workload.compressed(codec),
+        _scanned
+    )
+
+
+def _stage(name: str):
+    @scenario(f'stage:{name}')
+    def run(workload: Workload) -> float:
+        from analyzer.pipeline.patterns import CONTENT_PATTERNS
+        from analyzer.pipeline.pipeline import DEFAULT_BATCH_SIZE
+        records = workload.parsed()
+        stage, states = next(
+            (stage, states)
+            for stage_name, stage, states
+            in workload.stage_inputs()
+            if stage_name == name
+        )
+        # Nothing is found by the stages before this one,
+        # nor by the previous runs.
+        CONTENT_PATTERNS.clear()
+
+        started = perf_counter()
+        with _discarded_output():
+            for start in range(0, len(records), DEFAULT_BATCH_SIZE):
+                end = start + DEFAULT_BATCH_SIZE
+                stage.process_batch(records[start:end], states[start:end])
+        return perf_counter() - started
+
+
+# Only the names are read here, the stages are imported
+# when the benchmark is run.
+for _name in _definition(STAGES_OF):
+    _stage(_name)
+
+
+@scenario('parse_sdata:large')
+def _large_sdata(workload: Workload) -> float:
+    """
+        Parses the structured data of every record,
+        gathered into lists of `LARGE_SDATA_SIZE` characters.
+    """
+    from analyzer.application.stages.sdata import (
+        STRUCTURED_DATA_AS_STRING, ParseSdata
+    )
+    stage, states = next(
+        (stage, states)
+        for _, stage, states
+        in workload.stage_inputs()
+        if isinstance(stage, ParseSdata)
+    )
+
+    messages = []
+    gathered = []
+    size = 0
+    for state in states:
+        sdata = state.structured.get(STRUCTURED_DATA_AS_STRING)
+        if sdata is None:
+            continue
+        gathered.append(sdata)
+        size += len(sdata)
+        if size >= LARGE_SDATA_SIZE:
+            messages.append('{ ' + ', '.join(gathered) + ' }')
+            gathered = []
+            size = 0
+    if gathered:
+        messages.append('{ ' + ', '.join(gathered) + ' }')
+
+    started = perf_counter()
+    for message in messages:
+        stage.parse_object(message, 0)
+    return perf_counter() - started
+
+
+# Record bodies that would take the regular expressions
+# searching for structured data seconds, or hours.
+PATHOLOGICAL_BODIES: Dict[str, Callable[[str], str]] = {
+    # Many blocks of structured data in one body.
+    'blocks': lambda body: body,
+    'no_assignment': lambda body: body.replace(':=', ':'),
+    'unclosed': lambda body: body.replace('}', ''),
+    'unterminated': lambda body: '{ "' + body.replace('"', '\\"'),
+}
+
+
+def _segregate(name: str, pathological: Callable[[str], str]):
+    @scenario(f'segregate_sdata:{name}')
+    def run(workload: Workload) -> float:
+        """
+            Finds the structured data in the contents of the records,
+            gathered into large bodies and made pathological.
+        """
+        from analyzer.application.stages.sdata import find_sdata
+        bodies = [pathological(body) for body in workload.bodies()]
+
+        started = perf_counter()
+        for body in bodies:
+            find_sdata(body)
+        return perf_counter() - started
+
+
+for _name, _pathological in PATHOLOGICAL_BODIES.items():
+    _segregate(_name, _pathological)
+
+
+def _pipeline(path: str):
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    @scenario(f'pipeline:{name}')
+    def run(workload: Workload) -> float:
+        from analyzer.logs.mapped import MappedLog
+        from analyzer.pipeline.pipeline import Pipeline
+        pipeline = Pipeline(_configuration(path))
+
+        started = perf_counter()
+        with _discarded_output(), MappedLog(workload.path) as log:
+            for _ in pipeline.process_many(log):
+                pass
+        return perf_counter() - started
+
+
+for _path in sorted(glob(os.path.join(EXAMPLES, '*.yml'))):
+    _pipeline(_path)
+
+
+# Stages of `STAGES_OF` reading a few paths of the structured data.
+SELECTIVE_SINKS = ('find_network_connections', 'identify_message_type')
+
+
+@scenario('pipeline:selective')
+def _selective(workload: Workload) -> float:
+    """
+        Runs only the stages reading the structured data, and what they need,
+        without the cache of parsed structured data,
+        so the structured data of every record is parsed as far as it is read.
+    """
+    from analyzer.logs.mapped import MappedLog
+    from analyzer.pipeline.configuration import PipelineConfiguration
+    from analyzer.pipeline.pipeline import Pipeline
+    definition = _definition(STAGES_OF)
+    definition['parse_sdata']['options'] = {'cache_size': 0}
+    pipeline = Pipeline(
+        PipelineConfiguration(definition, sinks=SELECTIVE_SINKS)
+    )
+
+    started = perf_counter()
+    with MappedLog(workload.path) as log:
+        for _ in pipeline.process_many(log):
+            pass
+    return perf_counter() - started
+
+
+def select(patterns: Iterable[str] = ()) -> List[str]:
+    """
+        The names of the scenarios matching any of the shell-style patterns,
+        or every scenario, if there are none.
+    """
+    patterns = [*patterns]
+    return [
+        name
+        for name
+        in SCENARIOS
+        if not patterns or any(fnmatchcase(name, p) for p in patterns)
+    ]
+
+
+def measure(workload: Workload, name: str, repeat: int = 3) -> dict:
+    """
+        Runs a scenario `repeat` times, keeping the fastest run,
+        the one least disturbed by everything else running on the machine.
+    """
+    assert repeat > 0, 'A scenario must run at least once.'
+
+    run = SCENARIOS[name]
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        elapsed = run(workload)
+        best = elapsed if best is None else min(best, elapsed)
+
+    best = max(best, 1e-9)
+    return {
+        'seconds': best,
+        'records_per_second': workload.records / best,
+        'mb_per_second': workload.size / best / 1e6,
+    }
+
+
+def compare(results: dict,
+            baseline: dict,
+            threshold: float = DEFAULT_THRESHOLD
+            ) -> List[Tuple[str, float, bool]]:
+    """
+        Compares the speed of every scenario with the baseline.
+
+        :param threshold: How much slower than the baseline
+        a scenario may get, e.g. 0.1 for 10%.
+        :returns: For every scenario in both, its name,
+        its speed relative to the baseline, and whether it passed.
+        :raises ValueError: If the results were measured on another log.
+    """
+    if results['log'] != baseline['log']:
+        raise ValueError(
+            f'The baseline was measured on another log: {baseline["log"]}'
+        )
+
+    compared = []
+    for name, result in results['scenarios'].items():
+        if name not in baseline['scenarios']:
+            continue
+        before = baseline['scenarios'][name]['records_per_second']
+        ratio = result['records_per_second'] / before
+        compared.append((name, ratio, ratio >= 1 - threshold))
+    return compared
@@ -0,0 +1,117 @@
+"""
+    Tests for the generator of synthetic logs.
+"""
+
+from analyzer.application.stages.components import COMPONENT_NAMESPACE
+from analyzer.application.stages.connections import CONN_KEY
+from analyzer.application.stages.messagetype import MESSAGE_TYPE
+from analyzer.benchmark.generator import LogGenerator, write_log
+from analyzer.logs.parsing import scan_records
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.pipeline import Pipeline
+
+STAGES = {
+    'tag': {
+        'module': 'analyzer.application.stages',
+        'class': 'TagComponentIDs',
+    },
+    'extract': {
+        'module': 'analyzer.application.stages',
+        'class': 'ExtractComponentIDs',
+        'depends_on': 'tag'
+    },
+    'segregate': {
+        'module': 'analyzer.application.stages.sdata',
+        'class': 'SegregateSdata',
+    },
+    'parse': {
+        'module': 'analyzer.application.stages.sdata',
+        'class': 'ParseSdata',
+        'depends_on': 'segregate'
+    },
+    'connections': {
+        'module': 'analyzer.application.stages.connections',
+        'class': 'IdentifyConnectionsByPort',
+        'depends_on': 'parse'
+    },
+    'message_id': {
+        'module': 'analyzer.application.stages.msg_id',
+        'class': 'IdentifyMessage',
+    },
+    'message_type': {
+        'module': 'analyzer.application.stages.messagetype',
+        'class': 'IdentifyMessageType',
+        'depends_on': ['message_id', 'parse']
+    },
+}
+
+
+class TestLogGenerator:
+
+    def test_same_seed_same_log(self):
+        assert (
+            [*LogGenerator(seed=3).lines(200)] ==
+            [*LogGenerator(seed=3).lines(200)]
+        )
+        assert (
+            [*LogGenerator(seed=3).lines(200)] !=
+            [*LogGenerator(seed=4).lines(200)]
+        )
+
+    def test_records_parse(self):
+        generator = LogGenerator(multiline=0.5)
+        texts = [*generator.records(500)]
+        records = [*scan_records(LogGenerator(multiline=0.5).lines(500))]
+
+        assert len(records) == 500
+        assert [record.content for record in records] == [
+            text.split(' ', 5)[5]
+            for text
+            in texts
+        ]
+        assert sum('\n' in text for text in texts) > 100
+
+    def test_stages_find_what_was_generated(self):
+        pipeline = Pipeline(PipelineConfiguration(STAGES))
+        records = scan_records(LogGenerator(
+            component_refs=0.2, connections=0.2, message_ids=0.2, sdata=0.2,
+            multiline=0.5, sdata_depth=5
+        ).lines(1000))
+
+        found = {COMPONENT_NAMESPACE: 0, CONN_KEY: 0, MESSAGE_TYPE: 0}
+        for result in pipeline.process_many(records):
+            for key in found:
+                if key in result.structured:
+                    found[key] += 1
+
+        for count in found.values():
+            assert 150 < count < 250
+
+    def test_repeats(self):
+        contents = [
+            record.content
+            for record
+            in scan_records(LogGenerator(repeats=0.5).lines(1000))
+        ]
+
+        assert len(set(contents)) < 700
+        assert [*LogGenerator(repeats=0).lines(200)] == [
+            *LogGenerator().lines(200)
+        ]
+
+    def test_only_plain_records(self):
+        records = [*scan_records(LogGenerator(
+            component_refs=0, connections=0, message_ids=0, sdata=0
+        ).lines(100))]
+
+        assert not any('{' in record.content for record in records)
+
+
+def test_write_log(tmp_path):
+    path = str(tmp_path / 'generated.log')
+    size = write_log(path, 100, seed=1)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert len(data) == size
+    assert data.decode() == ''.join(LogGenerator(seed=1).lines(100))
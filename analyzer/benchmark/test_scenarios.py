@@ -0,0 +1,89 @@
+"""
+    Tests for the benchmark scenarios and the comparison of their results.
+"""
+
+import os
+from glob import glob
+
+import pytest
+
+from analyzer.benchmark.scenarios import (
+    EXAMPLES, SCENARIOS, Workload, compare, measure, select
+)
+from analyzer.benchmark.scenarios import _configuration
+from analyzer.pipeline.plan import load_configuration
+
+
+def results(log: dict, **speeds) -> dict:
+    return {
+        'log': log,
+        'scenarios': {
+            name: {'records_per_second': speed}
+            for name, speed
+            in speeds.items()
+        }
+    }
+
+
+LOG = {'records': 10, 'bytes': 1000}
+
+
+class TestScenarios:
+
+    def test_every_scenario_runs(self, tmp_path):
+        workload = Workload(str(tmp_path), 50, multiline=0.5)
+
+        for name in SCENARIOS:
+            result = measure(workload, name, repeat=1)
+            assert result['seconds'] > 0
+            assert result['records_per_second'] == pytest.approx(
+                50 / result['seconds']
+            )
+            assert result['mb_per_second'] == pytest.approx(
+                workload.size / result['seconds'] / 1e6
+            )
+
+    def test_pipelines_are_loaded_as_the_cli_loads_them(self):
+        def dependencies(config) -> dict:
+            return {
+                stage.name: [*stage.dependencies]
+                for stage
+                in config.stages_in_order()
+            }
+
+        paths = glob(os.path.join(EXAMPLES, '*.yml'))
+        assert paths
+        for path in paths:
+            assert (
+                dependencies(_configuration(path)) ==
+                dependencies(load_configuration(path))
+            )
+
+    def test_select(self):
+        stages = select(['stage:*'])
+        assert 'stage:parse_sdata' in stages
+        assert all(name.startswith('stage:') for name in stages)
+
+        assert select(['gather_records', 'pipeline:complex_pipeline']) == [
+            'gather_records', 'pipeline:complex_pipeline'
+        ]
+        assert select() == [*SCENARIOS]
+
+
+class TestCompare:
+
+    def test_threshold(self):
+        baseline = results(LOG, fast=100, slow=100, gone=100)
+        current = results(LOG, fast=95, slow=85, new=100)
+
+        assert compare(current, baseline, threshold=0.1) == [
+            ('fast', 0.95, True),
+            ('slow', 0.85, False),
+        ]
+
+    def test_other_log(self):
+        baseline = results(LOG, fast=100)
+        current = results({**LOG, 'records': 20}, fast=100)
+
+        with pytest.raises(ValueError):
+            compare(current, baseline)
@@ -0,0 +1,312 @@
+"""
+Columnar representation of a range of log records.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from analyzer.logs.record import LogRecord, parse_timestamp
+
+ENCODING = 'utf-8'
+
+# Code of a missing value in categorical columns, e.g. `source_file`
+# of a record that has no scope.
+NONE_CODE = -1
+
+
+class RecordBatch:
+    """
+        A few thousand log records, stored column by column.
+
+         * `timestamps`: nanoseconds since the epoch, as int64.
+         * `application`, `event_type` and the `source_*` fields:
+           int32 codes indexing the matching entry of `categories`,
+           or NONE_CODE.
+         * `content`: the UTF-8 encoded content of all records
+           in one uint8 buffer, record `i` spanning
+           `content_offsets[i]:content_offsets[i + 1]`.
+
+        The original date and time strings are kept in `stamps`,
+        so records can be rebuilt exactly as they were read.
+
+        Selections such as `between` or `take` return new batches
+        that share the dictionaries with this one.
+    """
+
+    CATEGORICAL = (
+        'application', 'event_type',
+        'source_file', 'source_line', 'source_scope'
+    )
+
+    def __init__(self,
+                 timestamps: np.ndarray,
+                 stamps: np.ndarray,
+                 codes: Dict[str, np.ndarray],
+                 categories: Dict[str, Sequence[str]],
+                 content: np.ndarray,
+                 content_offsets: np.ndarray):
+        assert len(content_offsets) == len(timestamps) + 1, \
+            'Content offsets must delimit every record.'
+
+        self.timestamps = timestamps
+        self.stamps = stamps
+        self.codes = codes
+        self.categories = categories
+        self.content = content
+        self.content_offsets = content_offsets
+
+    @staticmethod
+    def from_records(records: Iterable[LogRecord]) -> 'RecordBatch':
+        builder = RecordBatchBuilder()
+        for record in records:
+            builder.append_record(record)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray]):
+        """
+            An integer yields a single `LogRecord`,
+            a slice, an index array or a boolean mask yields a `RecordBatch`.
+        """
+        if isinstance(key, (int, np.integer)):
+            return self.record(key)
+        if isinstance(key, slice):
+            key = np.arange(len(self))[key]
+        return self.take(key)
+
+    @property
+    def application(self) -> np.ndarray:
+        return self.codes['application']
+
+    @property
+    def event_type(self) -> np.ndarray:
+        return self.codes['event_type']
+
+    @property
+    def source_file(self) -> np.ndarray:
+        return self.codes['source_file']
+
+    def code_of(self, column: str, value: str) -> int:
+        """
+            The code `value` has in a categorical column,
+            or NONE_CODE if no record of this batch has that value.
+        """
+        try:
+            return self.categories[column].index(value)
+        except ValueError:
+            return NONE_CODE
+
+    def content_of(self, i: int) -> str:
+        begin, end = self.content_offsets[i:i + 2]
+        return str(self.content[begin:end], ENCODING, 'surrogatepass')
+
+    def record(self, i: int) -> LogRecord:
+        if i < 0:
+            i += len(self)
+        stamp = self.stamps[i].decode(ENCODING)
+
+        return LogRecord.from_fields({
+            'date': stamp[:11],
+            'time': stamp[12:],
+            'application': self._category('application', i),
+            'event_type': self._category('event_type', i),
+            'source_file': self._category('source_file', i),
+            'source_line': self._category('source_line', i),
+            'source_scope': self._category('source_scope', i),
+            'content': self.content_of(i),
+        })
+
+    def take(self, indices: np.ndarray) -> 'RecordBatch':
+        """
+            A new batch holding the selected records, in the given order.
+            :param indices: An index array or a boolean mask.
+        """
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        else:
+            # An empty list would be an array of floats.
+            indices = indices.astype(np.intp, copy=False)
+
+        begins = self.content_offsets[:-1][indices]
+        lengths = self.content_offsets[1:][indices] - begins
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Position of every selected content byte in the old buffer.
+        gather = (
+            np.repeat(begins - offsets[:-1], lengths) +
+            np.arange(offsets[-1], dtype=np.int64)
+        )
+
+        return RecordBatch(
+            timestamps=self.timestamps[indices],
+            stamps=self.stamps[indices],
+            codes={
+                column: codes[indices]
+                for column, codes
+                in self.codes.items()
+            },
+            categories=self.categories,
+            content=self.content[gather],
+            content_offsets=offsets
+        )
+
+    def time_mask(self,
+                  since: Optional[int] = None,
+                  until: Optional[int] = None) -> np.ndarray:
+        """
+            Boolean mask of the records within `[since, until)`,
+            both given in nanoseconds since the epoch.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if since is not None:
+            mask &= self.timestamps >= since
+        if until is not None:
+            mask &= self.timestamps < until
+        return mask
+
+    def between(self,
+                since: Optional[int] = None,
+                until: Optional[int] = None) -> 'RecordBatch':
+        return self.take(self.time_mask(since, until))
+
+    def counts(self, column: str) -> Dict[str, int]:
+        """
+            Number of records per value of a categorical column.
+            Values that no record has in this batch are left out.
+        """
+        codes = self.codes[column]
+        counts = np.bincount(
+            codes[codes != NONE_CODE],
+            minlength=len(self.categories[column])
+        )
+        return {
+            value: int(count)
+            for value, count
+            in zip(self.categories[column], counts)
+            if count
+        }
+
+    def event_type_counts(self) -> Dict[str, int]:
+        return self.counts('event_type')
+
+    def group_by(self, column: str) -> Dict[str, 'RecordBatch']:
+        """
+            Splits the batch by the values of a categorical column,
+            keeping the order of the records within each group.
+        """
+        codes = self.codes[column]
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+
+        groups = {}
+        for indices in np.split(order, bounds):
+            if not len(indices):
+                continue
+            groups[self._category(column, indices[0])] = self.take(indices)
+        return groups
+
+    def group_by_application(self) -> Dict[str, 'RecordBatch']:
+        return self.group_by('application')
+
+    def _category(self, column: str, i: int) -> Optional[str]:
+        code = self.codes[column][i]
+        if code == NONE_CODE:
+            return None
+        return self.categories[column][code]
+
+
+class RecordBatchBuilder:
+    """
+        Collects records field by field, then builds a `RecordBatch`.
+    """
+
+    def __init__(self):
+        self._timestamps: List[int] = []
+        self._stamps: List[bytes] = []
+        self._codes: Dict[str, List[int]] = {
+            column: [] for column in RecordBatch.CATEGORICAL
+        }
+        self._dictionaries: Dict[str, Dict[str, int]] = {
+            column: {} for column in RecordBatch.CATEGORICAL
+        }
+        self._content: List[bytes] = []
+        self._content_lengths: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def append(self, fields: Dict[str, str], body: List[str] = None):
+        """
+            Adds a record from the fields captured from its header,
+            as returned by `LogRecord.parse_header_line`,
+            and the lines following the header line.
+        """
+        content = fields['content']
+        if body:
+            if content is not None:
+                body.insert(0, content)
+            content = '\n'.join(body)
+
+        stamp = f"{fields['date']} {fields['time']}"
+        self._append(parse_timestamp(stamp), stamp, fields, content or '')
+
+    def append_record(self, record: LogRecord):
+        self._append(record.timestamp, f'{record.date} {record.time}', {
+            'application': record.application,
+            'event_type': record.event_type,
+            'source_file': record.source_file,
+            'source_line': record.source_line,
+            'source_scope': record.source_scope,
+        }, record.content)
+
+    def build(self) -> RecordBatch:
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(self._content_lengths, out=offsets[1:])
+
+        return RecordBatch(
+            timestamps=np.array(self._timestamps, dtype=np.int64),
+            stamps=np.array(self._stamps, dtype=bytes),
+            codes={
+                column: np.array(codes, dtype=np.int32)
+                for column, codes
+                in self._codes.items()
+            },
+            categories={
+                column: tuple(dictionary)
+                for column, dictionary
+                in self._dictionaries.items()
+            },
+            content=np.frombuffer(b''.join(self._content), dtype=np.uint8),
+            content_offsets=offsets
+        )
+
+    def _append(self,
+                timestamp: int,
+                stamp: str,
+                categorical: Dict[str, str],
+                content: str):
+        self._timestamps.append(timestamp)
+        self._stamps.append(stamp.encode(ENCODING))
+
+        for column in RecordBatch.CATEGORICAL:
+            value = categorical[column]
+            if value is None:
+                code = NONE_CODE
+            else:
+                dictionary = self._dictionaries[column]
+                code = dictionary.setdefault(value, len(dictionary))
+            self._codes[column].append(code)
+
+        encoded = content.encode(ENCODING, 'surrogatepass')
+        self._content.append(encoded)
+        self._content_lengths.append(len(encoded))
@@ -0,0 +1,245 @@
+"""
+Binary cache of parsed log records.
+
+Parsing the headers of a large log takes a good part of a pipeline run,
+so a log that is processed again and again can be parsed only once,
+and its records saved in this format, which is read back
+without matching any patterns.
+
+The file starts with a magic number, followed by blocks of records.
+Each block is a 32 bit record count and payload size, and the payload:
+
+- the distinct names used by the block, as a text column
+- a 32 bit code for every record, for each of the columns
+  `application`, `event_type`, `source_file`, `source_line`
+  and `source_scope`, indexing the names, -1 standing for None
+- the 64 bit timestamps of the records
+- the date and time of the records as they were in the log, as text
+- the contents of the records, as text
+
+A text column is the size of its data in bytes,
+the length of every string in characters, and the UTF-8 encoded data.
+All numbers are little endian.
+"""
+
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
+
+from analyzer.logs.record import LogRecord
+
+MAGIC = b'LACACHE\1'
+
+DEFAULT_BLOCK_SIZE = 4096
+
+ENCODING = 'utf-8'
+
+CATEGORICAL = (
+    'application',
+    'event_type',
+    'source_file',
+    'source_line',
+    'source_scope',
+)
+
+NONE_CODE = -1
+
+# Record count and payload size.
+_BLOCK_HEADER = struct.Struct('<II')
+_SIZE = struct.Struct('<I')
+
+# Arrays are in native byte order, the format is little endian.
+_SWAP = sys.byteorder != 'little'
+
+
+def is_cache(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class CacheWriter:
+    """
+        Writes records to a binary cache, `block_size` records at a time.
+    """
+
+    def __init__(self, f: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE):
+        assert block_size > 0, 'Block size must be positive.'
+
+        self._file = f
+        self._block_size = block_size
+        self._records: List[LogRecord] = []
+        f.write(MAGIC)
+
+    def __enter__(self) -> 'CacheWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, record: LogRecord):
+        self._records.append(record)
+        if len(self._records) >= self._block_size:
+            self.flush()
+
+    def write_all(self, records: Iterable[LogRecord]):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        if not self._records:
+            return
+
+        records, self._records = self._records, []
+        names = {}
+        codes = []
+        for column in CATEGORICAL:
+            column_codes = array('i')
+            for record in records:
+                value = getattr(record, column)
+                if value is None:
+                    column_codes.append(NONE_CODE)
+                else:
+                    column_codes.append(names.setdefault(value, len(names)))
+            codes.append(column_codes)
+
+        timestamps = array('q', [record.timestamp for record in records])
+        stamps = [f'{record.date} {record.time}' for record in records]
+        contents = [record.content for record in records]
+
+        parts = [_SIZE.pack(len(names)), *_text_column(names)]
+        for column in (*codes, timestamps):
+            if _SWAP:
+                column.byteswap()
+            parts.append(column.tobytes())
+        parts.extend(_text_column(stamps))
+        parts.extend(_text_column(contents))
+
+        payload = b''.join(parts)
+        self._file.write(_BLOCK_HEADER.pack(len(records), len(payload)))
+        self._file.write(payload)
+
+
+def write_cache(records: Iterable[LogRecord],
+                path: str,
+                block_size: int = DEFAULT_BLOCK_SIZE):
+    with open(path, 'wb') as f, CacheWriter(f, block_size) as writer:
+        writer.write_all(records)
+
+
+class CachedLog:
+    """
+        A binary cache opened for reading.
+        Iterating over it yields the cached records,
+        reading the file one block at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f'Not a record cache: {path}')
+
+    def __enter__(self) -> 'CachedLog':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return read_records(self._file)
+
+    def close(self):
+        self._file.close()
+
+
+def read_records(f: BinaryIO) -> Iterator[LogRecord]:
+    """
+        Yields the records of a cache, read from the current position
+        of `f`, which must be right after the magic number.
+    """
+    while True:
+        header = f.read(_BLOCK_HEADER.size)
+        if not header:
+            return
+        if len(header) < _BLOCK_HEADER.size:
+            raise ValueError('Truncated record cache.')
+        count, size = _BLOCK_HEADER.unpack(header)
+
+        payload = f.read(size)
+        if len(payload) < size:
+            raise ValueError('Truncated record cache.')
+        yield from _read_block(memoryview(payload), count)
+
+
+def _read_block(payload: memoryview, count: int) -> Iterator[LogRecord]:
+    intern = sys.intern
+
+    name_count, = _SIZE.unpack_from(payload)
+    names, position = _read_text_column(payload, _SIZE.size, name_count)
+    names = [intern(name) for name in names]
+    # Code -1 picks the last item.
+    names.append(None)
+
+    columns = []
+    for typecode in ('i',) * len(CATEGORICAL) + ('q',):
+        column = array(typecode)
+        end = position + count * column.itemsize
+        column.frombytes(payload[position:end])
+        if _SWAP:
+            column.byteswap()
+        columns.append(column)
+        position = end
+
+    stamps, position = _read_text_column(payload, position, count)
+    contents, position = _read_text_column(payload, position, count)
+
+    (
+        applications, event_types, source_files, source_lines, source_scopes,
+        timestamps
+    ) = columns
+    from_parsed = LogRecord.from_parsed
+    for i in range(count):
+        yield from_parsed(
+            stamps[i],
+            timestamps[i],
+            names[applications[i]],
+            names[event_types[i]],
+            names[source_files[i]],
+            names[source_lines[i]],
+            names[source_scopes[i]],
+            contents[i]
+        )
+
+
+def _text_column(strings: Iterable[str]) -> List[bytes]:
+    strings = [*strings]
+    data = ''.join(strings).encode(ENCODING)
+    lengths = array('I', [len(string) for string in strings])
+    if _SWAP:
+        lengths.byteswap()
+    return [_SIZE.pack(len(data)), lengths.tobytes(), data]
+
+
+def _read_text_column(payload: memoryview,
+                      position: int,
+                      count: int) -> Tuple[List[str], int]:
+    size, = _SIZE.unpack_from(payload, position)
+    position += _SIZE.size
+
+    lengths = array('I')
+    end = position + count * lengths.itemsize
+    lengths.frombytes(payload[position:end])
+    if _SWAP:
+        lengths.byteswap()
+
+    text = str(payload[end:end + size], ENCODING)
+    offsets = [0, *accumulate(lengths)]
+    strings = [
+        text[begin:stop]
+        for begin, stop
+        in zip(offsets, offsets[1:])
+    ]
+    return strings, end + size
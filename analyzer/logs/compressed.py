@@ -0,0 +1,153 @@
+"""
+Reading compressed log files.
+
+The codecs of the standard library release the GIL while they work,
+so decompression runs in a background thread that stays a few buffers
+ahead of the reader, while the main thread parses records
+and runs the pipeline.
+"""
+
+import io
+from queue import Queue, Empty, Full
+from threading import Event, Thread
+from typing import Callable, Dict, Optional, TextIO
+
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+DEFAULT_READ_AHEAD = 4
+
+ENCODING = 'utf-8'
+
+
+def _gzip(path: str):
+    import gzip
+    return gzip.open(path, 'rb')
+
+
+def _bz2(path: str):
+    import bz2
+    return bz2.open(path, 'rb')
+
+
+def _xz(path: str):
+    import lzma
+    return lzma.open(path, 'rb')
+
+
+# Recognized by content rather than by name,
+# since archived logs are not always named after their codec.
+CODECS: Dict[bytes, Callable[[str], io.BufferedIOBase]] = {
+    b'\x1f\x8b': _gzip,
+    b'BZh': _bz2,
+    b'\xfd7zXZ\x00': _xz,
+}
+
+
+def codec_of(path: str) -> Optional[Callable[[str], io.BufferedIOBase]]:
+    """
+        The function that opens the file for decompression,
+        or None if the file is not compressed in a known format.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(max(len(m) for m in CODECS))
+
+    for prefix, codec in CODECS.items():
+        if magic.startswith(prefix):
+            return codec
+    return None
+
+
+def is_compressed(path: str) -> bool:
+    return codec_of(path) is not None
+
+
+def open_log(path: str,
+             buffer_size: int = DEFAULT_BUFFER_SIZE,
+             read_ahead: int = DEFAULT_READ_AHEAD) -> TextIO:
+    """
+        Opens a log file for reading text lines,
+        decompressing it in the background if it is compressed.
+    """
+    codec = codec_of(path)
+    # Undecodable bytes are replaced, as the other readers do.
+    if codec is None:
+        return open(path, encoding=ENCODING, errors='replace')
+
+    raw = ReadAheadReader(codec(path), buffer_size, read_ahead)
+    return io.TextIOWrapper(
+        io.BufferedReader(raw, buffer_size),
+        encoding=ENCODING, errors='replace'
+    )
+
+
+class ReadAheadReader(io.RawIOBase):
+    """
+        A read-only stream that reads another one in a background thread,
+        keeping up to `read_ahead` buffers of `buffer_size` bytes
+        ready to be consumed.
+    """
+
+    def __init__(self,
+                 source: io.BufferedIOBase,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 read_ahead: int = DEFAULT_READ_AHEAD):
+        assert buffer_size > 0, 'Buffer size must be positive.'
+        assert read_ahead > 0, 'Must read at least one buffer ahead.'
+
+        self._source = source
+        self._buffer_size = buffer_size
+        self._buffers = Queue(maxsize=read_ahead)
+        self._stopped = Event()
+        self._current = memoryview(b'')
+        self._exhausted = False
+
+        self._thread = Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._current and not self._exhausted:
+            chunk = self._buffers.get()
+            if isinstance(chunk, BaseException):
+                self._exhausted = True
+                raise chunk
+            if not chunk:
+                self._exhausted = True
+            self._current = memoryview(chunk)
+
+        count = min(len(buffer), len(self._current))
+        buffer[:count] = self._current[:count]
+        self._current = self._current[count:]
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._stopped.set()
+            # Unblock the thread if it is waiting for room in the queue.
+            try:
+                while True:
+                    self._buffers.get_nowait()
+            except Empty:
+                pass
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+    def _fill(self):
+        try:
+            while not self._stopped.is_set():
+                chunk = self._source.read(self._buffer_size)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._buffers.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
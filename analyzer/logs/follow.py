@@ -0,0 +1,268 @@
+"""
+Following a log file that is still being written.
+
+The file is polled for new data, and only complete records are handed out.
+A record is complete once the header of the next one appears,
+or once nothing has been written for a while.
+Lines are only read once they are terminated,
+unless the file has been rotated or truncated.
+
+The offset of the first record that has not been processed yet
+is saved to a checkpoint file, along with the inode of the log,
+so a restarted follower resumes where the previous one stopped.
+"""
+
+import json
+import os
+from threading import Lock
+from time import monotonic, sleep
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from analyzer.logs.record import LogRecord
+
+ENCODING = 'utf-8'
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_IDLE_TIMEOUT = 2.0
+DEFAULT_CHECKPOINT_INTERVAL = 1.0
+# Bytes read from the file at a time,
+# so a large file is handed out a part at a time.
+DEFAULT_READ_SIZE = 1 << 20
+
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+
+class Checkpoint:
+    """
+        Position of a follower in a log file.
+    """
+
+    def __init__(self, inode: int = 0, offset: int = 0):
+        self.inode = inode
+        self.offset = offset
+
+    @staticmethod
+    def load(path: str) -> Optional['Checkpoint']:
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            return Checkpoint(int(saved['inode']), int(saved['offset']))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def path_for(log_path: str) -> str:
+        return log_path + CHECKPOINT_SUFFIX
+
+    def save(self, path: str):
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'inode': self.inode, 'offset': self.offset}, f)
+        os.replace(path + '.tmp', path)
+
+
+class LogFollower:
+    """
+        Yields the records of a growing log file as they are completed.
+
+        :param checkpoint_path: Where to keep the position of the follower,
+        or None to always start at the beginning of the file.
+        :param idle_timeout: Seconds without new data,
+        after which the last record is considered complete.
+        :param read_size: Bytes to read in a poll at most.
+    """
+
+    def __init__(self,
+                 path: str,
+                 checkpoint_path: Optional[str] = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+                 read_size: int = DEFAULT_READ_SIZE,
+                 clock: Callable[[], float] = monotonic):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.checkpoint_interval = checkpoint_interval
+        self.read_size = read_size
+        self._clock = clock
+
+        self._file = None
+        # Held while the file is read, so another thread,
+        # e.g. the one that gave up on the records,
+        # can only close it in between.
+        self._lock = Lock()
+        self.checkpoint = Checkpoint()
+        self._last_checkpoint = clock()
+
+        resume = None
+        if checkpoint_path is not None:
+            resume = Checkpoint.load(checkpoint_path)
+        self._open(resume)
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return self.follow()
+
+    def follow(self) -> Iterator[LogRecord]:
+        """
+            Polls the file until the follower is closed,
+            yielding the completed records.
+            The checkpoint is advanced past a record
+            once the consumer asks for the next one.
+        """
+        try:
+            while self._file is not None:
+                completed = self.poll()
+                for record, end in completed:
+                    yield record
+                    self.checkpoint.offset = end
+                self._save_checkpoint_periodically()
+                if not completed and not self._more:
+                    sleep(self.poll_interval)
+        finally:
+            self.close()
+
+    def poll(self) -> List[Tuple[LogRecord, int]]:
+        """
+            Reads what has been written since the last poll,
+            up to `read_size` bytes of it.
+
+            :returns: The records that have been completed,
+            with the offset right after the end of each of them,
+            none once the follower has been closed.
+        """
+        with self._lock:
+            if self._file is None:
+                return []
+            return self._poll()
+
+    def _poll(self) -> List[Tuple[LogRecord, int]]:
+        completed = []
+        if self._reopen_if_replaced(completed) and (completed or self._more):
+            # Offsets of the records still refer to the old file,
+            # so they have to be consumed before switching over.
+            return completed
+
+        data = self._read()
+        now = self._clock()
+        if data:
+            self._last_data = now
+            self._consume(data, completed)
+        elif now - self._last_data >= self.idle_timeout:
+            # An unterminated line may be a header the writer is in the
+            # middle of, so it is left in the buffer until it is ended.
+            self._complete_record(self._buffer_offset, completed)
+
+        return completed
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._save_checkpoint()
+                self._file.close()
+                self._file = None
+
+    def _open(self, resume: Optional[Checkpoint]):
+        self._file = open(self.path, 'rb')
+        stat = os.fstat(self._file.fileno())
+
+        offset = 0
+        if (
+            resume is not None and
+            resume.inode == stat.st_ino and
+            resume.offset <= stat.st_size
+        ):
+            offset = resume.offset
+        self._file.seek(offset)
+
+        self.checkpoint = Checkpoint(stat.st_ino, offset)
+        self._buffer = b''
+        self._buffer_offset = offset
+        self._fields = None
+        self._body = []
+        self._last_data = self._clock()
+        # Whether the last read stopped short of the end of the file.
+        self._more = False
+
+    def _read(self) -> bytes:
+        data = self._file.read(self.read_size)
+        self._more = len(data) == self.read_size
+        return data
+
+    def _consume(self, data: bytes, completed: list):
+        *lines, self._buffer = (self._buffer + data).split(b'\n')
+        for line in lines:
+            self._consume_line(line, completed)
+
+    def _reopen_if_replaced(self, completed: list) -> bool:
+        """
+            Starts reading the file from the beginning
+            if it has been rotated or truncated.
+            What was appended to the old file since the last poll is read,
+            a part at a time, and records left in it are completed first,
+            and the file is only reopened once there are none.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotated away, but the new file is not there yet.
+            return False
+
+        position = self._buffer_offset + len(self._buffer)
+        if (
+            stat.st_ino == self.checkpoint.inode and
+            stat.st_size >= position
+        ):
+            return False
+
+        # Whatever was left of the old file will not grow anymore.
+        data = self._read()
+        if data:
+            self._consume(data, completed)
+            if self._more:
+                return True
+        position = self._buffer_offset + len(self._buffer)
+        if self._buffer:
+            line, self._buffer = self._buffer, b''
+            self._consume_line(line, completed, terminated=False)
+        self._complete_record(position, completed)
+        if not completed:
+            self._file.close()
+            self._open(None)
+        return True
+
+    def _consume_line(self, raw: bytes, completed: list,
+                      terminated: bool = True):
+        offset = self._buffer_offset
+        self._buffer_offset += len(raw) + (1 if terminated else 0)
+
+        line = raw.decode(ENCODING, 'replace').rstrip()
+        fields = LogRecord.parse_header_line(line)
+        if fields is None:
+            if self._fields is not None:
+                self._body.append(line)
+            elif not completed:
+                # Nothing to wait for before this line.
+                self.checkpoint.offset = self._buffer_offset
+            return
+
+        self._complete_record(offset, completed)
+        self._fields = fields
+
+    def _complete_record(self, end: int, completed: list):
+        if self._fields is None:
+            return
+        record = LogRecord.from_fields(self._fields, self._body)
+        completed.append((record, end))
+        self._fields = None
+        self._body = []
+
+    def _save_checkpoint_periodically(self):
+        now = self._clock()
+        if now - self._last_checkpoint >= self.checkpoint_interval:
+            self._save_checkpoint()
+            self._last_checkpoint = now
+
+    def _save_checkpoint(self):
+        if self.checkpoint_path is not None:
+            self.checkpoint.save(self.checkpoint_path)
@@ -0,0 +1,278 @@
+"""
+Sparse timestamp index of a log file, kept in a sidecar file next to it.
+
+The log is divided into segments of roughly `interval` bytes,
+each beginning at a record header.
+For every segment the index stores its offset,
+and the smallest and largest timestamp of the records in it,
+which is enough to find the part of the log that may contain
+records of a given time window with a binary search,
+even if the records are not perfectly ordered by time.
+"""
+
+import os
+import struct
+from array import array
+from hashlib import blake2b
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional, Tuple
+
+from analyzer.logs.mapped import MappedLog
+from analyzer.logs.record import LogRecord, parse_timestamp
+
+DEFAULT_INTERVAL = 1024 * 1024
+
+SIDECAR_SUFFIX = '.idx'
+
+_MAGIC = b'LAIDX\0\0\2'
+# Indexed log size, inode of the log, interval, number of segments,
+# digest of the indexed part of the log, see `sample_digest`.
+_HEADER = struct.Struct('<8sQQQQ16s')
+
+# Bytes hashed at the start and at the end of the indexed part of a log.
+_SAMPLE_SIZE = 64 * 1024
+
+
+class TimestampIndex:
+
+    def __init__(self,
+                 interval: int = DEFAULT_INTERVAL,
+                 inode: int = 0):
+        assert interval > 0, 'Interval must be positive.'
+
+        self.interval = interval
+        self.inode = inode
+        # Number of bytes of the log that have been indexed.
+        self.size = 0
+        self.digest = bytes(16)
+        self.offsets = array('q')
+        self.minimums = array('q')
+        self.maximums = array('q')
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @staticmethod
+    def sidecar_path(log_path: str) -> str:
+        return log_path + SIDECAR_SUFFIX
+
+    @staticmethod
+    def for_log(log_path: str,
+                interval: int = DEFAULT_INTERVAL) -> 'TimestampIndex':
+        """
+            Loads the sidecar index of a log,
+            brings it up to date if the log has grown since,
+            and saves it again if it had to be changed.
+
+            The index is built from scratch if there is no sidecar,
+            or if the log has been replaced, truncated,
+            or rewritten in place, see `sample_digest`.
+            A sidecar that cannot be written is not an error,
+            the index is then only kept in memory.
+        """
+        stat = os.stat(log_path)
+        sidecar = TimestampIndex.sidecar_path(log_path)
+
+        index = None
+        try:
+            with open(sidecar, 'rb') as f:
+                index = TimestampIndex.load(f)
+        except (OSError, ValueError):
+            pass
+
+        if (
+            index is None or
+            index.inode != stat.st_ino or
+            index.size > stat.st_size or
+            index.digest != sample_digest(log_path, index.size)
+        ):
+            index = TimestampIndex(interval, stat.st_ino)
+
+        if index.size == stat.st_size:
+            return index
+
+        with MappedLog(log_path) as log:
+            index.update(log)
+        index.digest = sample_digest(log_path, index.size)
+
+        try:
+            with open(sidecar + '.tmp', 'wb') as f:
+                index.save(f)
+            os.replace(sidecar + '.tmp', sidecar)
+        except OSError:
+            pass
+
+        return index
+
+    def update(self, log: MappedLog):
+        """
+            Indexes the part of the log that has not been indexed yet.
+            The last segment is scanned again,
+            because records may have been appended to it.
+        """
+        if self.offsets:
+            resume = self.offsets.pop()
+            self.minimums.pop()
+            self.maximums.pop()
+        else:
+            resume = 0
+
+        segment_offset = None
+        for offset, timestamp in log.timestamps(resume):
+            if (
+                segment_offset is None or
+                offset - segment_offset >= self.interval
+            ):
+                segment_offset = offset
+                self.offsets.append(offset)
+                self.minimums.append(timestamp)
+                self.maximums.append(timestamp)
+            elif timestamp < self.minimums[-1]:
+                self.minimums[-1] = timestamp
+            elif timestamp > self.maximums[-1]:
+                self.maximums[-1] = timestamp
+
+        self.size = len(log)
+
+    def window(self,
+               since: Optional[int] = None,
+               until: Optional[int] = None) -> Tuple[int, Optional[int]]:
+        """
+            Byte range of the log that contains every record
+            with a timestamp within `[since, until)`.
+
+            :returns: The offset to start reading records at,
+            and the offset to stop at, or None to read until the end.
+        """
+        count = len(self)
+        first, last = 0, count
+
+        if since is not None:
+            # Segments before the first one with a record at or after `since`
+            # cannot contain anything interesting.
+            latest_so_far = [*accumulate(self.maximums, max)]
+            first = bisect_left(latest_so_far, since)
+
+        if until is not None:
+            # Neither can the ones after the last one
+            # with a record before `until`.
+            earliest_from = [*accumulate(reversed(self.minimums), min)]
+            earliest_from.reverse()
+            last = bisect_left(earliest_from, until)
+
+        if first >= last:
+            return self.size, self.size
+
+        start = self.offsets[first]
+        end = self.offsets[last] if last < count else None
+        return start, end
+
+    def save(self, f):
+        f.write(_HEADER.pack(
+            _MAGIC, self.size, self.inode, self.interval, len(self),
+            self.digest
+        ))
+        for column in (self.offsets, self.minimums, self.maximums):
+            column.tofile(f)
+
+    @staticmethod
+    def load(f) -> 'TimestampIndex':
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError('Truncated timestamp index.')
+        magic, size, inode, interval, count, digest = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise ValueError('Not a timestamp index.')
+
+        index = TimestampIndex(interval, inode)
+        index.size = size
+        index.digest = digest
+        try:
+            for column in (index.offsets, index.minimums, index.maximums):
+                column.fromfile(f, count)
+        except EOFError:
+            raise ValueError('Truncated timestamp index.')
+        return index
+
+
+def sample_digest(log_path: str, size: int) -> bytes:
+    """
+        A digest of the first `size` bytes of a log,
+        that changes when they are rewritten, but not when more is appended.
+        Only their start and their end are hashed,
+        which is where a rewritten log differs almost always.
+    """
+    with open(log_path, 'rb') as f:
+        digest = blake2b(f.read(min(size, _SAMPLE_SIZE)), digest_size=16)
+        if size > _SAMPLE_SIZE:
+            f.seek(max(_SAMPLE_SIZE, size - _SAMPLE_SIZE))
+            digest.update(f.read(size - f.tell()))
+    return digest.digest()
+
+
+def records_between(log: MappedLog,
+                    since: Optional[int] = None,
+                    until: Optional[int] = None,
+                    index: TimestampIndex = None,
+                    start: int = 0,
+                    end: int = None) -> Iterator[LogRecord]:
+    """
+        Yields the records of the log
+        with a timestamp within `[since, until)`.
+
+        With an index, only the part of the log
+        that may contain such records is read.
+        `start` and `end` further restrict the byte range to read.
+    """
+    if index is not None:
+        window_start, window_end = index.window(since, until)
+        start = max(start, window_start)
+        if window_end is not None:
+            end = window_end if end is None else min(end, window_end)
+
+    return within(log.records(start, end), since, until)
+
+
+def within(records: Iterable[LogRecord],
+           since: Optional[int] = None,
+           until: Optional[int] = None) -> Iterator[LogRecord]:
+    """
+        Yields the records with a timestamp within `[since, until)`.
+    """
+    for record in records:
+        timestamp = record.timestamp
+        if since is not None and timestamp < since:
+            continue
+        if until is not None and timestamp >= until:
+            continue
+        yield record
+
+
+def parse_time(value: str) -> int:
+    """
+        Converts a point in time given by a user to a timestamp.
+        Accepts the format of the log (`2014/Oct/24 19:16:48.062933`)
+        and ISO 8601 (`2014-10-24T19:16:48.062933`),
+        the fractional seconds being optional in both.
+        Just like the log, the value is taken to be UTC.
+    """
+    from datetime import datetime, timezone
+
+    value = value.strip()
+    if value[4:5] == '/':
+        if value[12:].count(':') == 2 and '.' not in value[12:]:
+            value += '.0'
+        fields = LogRecord.parse_header_line(f'{value} - - -')
+        if fields is None:
+            raise ValueError(f'Invalid point in time: {value}')
+        return parse_timestamp(f"{fields['date']} {fields['time']}")
+
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (
+        (delta.days * 86400 + delta.seconds) * 10**9 +
+        delta.microseconds * 1000
+    )
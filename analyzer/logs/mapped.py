@@ -0,0 +1,187 @@
+"""
+Memory-mapped access to log files on disk.
+
+Record boundaries are found by searching the raw bytes of the file,
+and records are handed out as zero-copy slices of the mapping.
+Only the header lines are decoded, and parsed once, while the file is split,
+the bodies are only decoded when the content of a record is read.
+"""
+
+import mmap
+import re
+from itertools import chain
+from typing import Dict, Iterator, Tuple
+
+from analyzer.logs.record import LogRecord, parse_timestamp
+
+
+# Candidate record starts: a date right after a line break,
+# with the rest of its line.
+# Starting the pattern with a literal lets the regex engine
+# skip ahead to the next newline instead of trying every position.
+_HEADER_CANDIDATE = re.compile(
+    rb'\n(\d{4}/(?:%s)/[^\n]*)' % '|'.join(LogRecord.MONTHS).encode()
+)
+# The first line of the file, which no line break comes before.
+_FIRST_LINE = re.compile(rb'([^\n]*)')
+
+ENCODING = 'utf-8'
+
+_parse_header_line = LogRecord.parse_header_line
+
+
+class MappedLog:
+    """
+        A log file mapped into memory.
+
+        Iterating over it yields `MappedLogRecord` objects,
+        that must not be used after the log has been closed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            # Empty files cannot be mapped.
+            self._map = b''
+        self._view = memoryview(self._map)
+
+    def __enter__(self) -> 'MappedLog':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def __iter__(self) -> Iterator['MappedLogRecord']:
+        return self.records()
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                # Some records are still alive,
+                # the mapping goes away with the last of them.
+                pass
+        self._file.close()
+
+    def headers(self, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+            Yields the offset and the length of the first line
+            of all records that begin at or after `start`, in file order.
+            A header is only recognized at the beginning of a line.
+        """
+        for offset, _, header_length, _ in self._spans(start):
+            yield offset, header_length
+
+    def timestamps(self, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+            Yields the offset and the timestamp (see `LogRecord.timestamp`)
+            of all records that begin at or after `start`, in file order.
+        """
+        for offset, _, _, fields in self._spans(start):
+            yield offset, parse_timestamp(f"{fields['date']} {fields['time']}")
+
+    def spans(self,
+              start: int = 0,
+              end: int = None) -> Iterator[Tuple[int, int, int]]:
+        """
+            Yields `(begin, end, header_length)` for every record
+            whose header begins within `[start, end)`.
+            The last one may extend past `end`, up to the next header.
+        """
+        for begin, stop, header_length, _ in self._spans(start, end):
+            yield begin, stop, header_length
+
+    def records(self,
+                start: int = 0,
+                end: int = None) -> Iterator['MappedLogRecord']:
+        """
+            Yields the records whose headers begin within `[start, end)`.
+        """
+        view = self._view
+        for begin, stop, header_length, fields in self._spans(start, end):
+            yield MappedLogRecord(view[begin:stop], header_length, fields)
+
+    def _spans(self, start: int, end: int = None):
+        """
+            `spans`, with the fields of the header of every record.
+            Every header is parsed once.
+        """
+        data = self._map
+        size = len(data)
+        if end is None:
+            end = size
+
+        candidates = _HEADER_CANDIDATE.finditer(data, max(start - 1, 0))
+        if start == 0:
+            candidates = chain((_FIRST_LINE.match(data),), candidates)
+
+        previous = None
+        for candidate in candidates:
+            fields = _parse_header_line(
+                candidate.group(1).decode(ENCODING, 'replace').rstrip()
+            )
+            if fields is None:
+                continue
+            offset, header_end = candidate.span(1)
+            if previous is not None:
+                yield previous[0], offset, previous[1], previous[2]
+            if offset >= end:
+                return
+            previous = offset, header_end - offset, fields
+
+        if previous is not None:
+            yield previous[0], size, previous[1], previous[2]
+
+
+class MappedLogRecord(LogRecord):
+    """
+        A log record that still lives in the mapped file.
+
+        The header fields are the ones parsed while splitting the file,
+        the rest of the record is decoded the first time `content` is read.
+    """
+
+    __slots__ = ('raw',)
+
+    def __init__(self,
+                 raw: memoryview,
+                 header_length: int,
+                 fields: Dict[str, str]):
+        """
+            :param fields: The fields of the header line,
+            see `LogRecord.parse_header_line`.
+        """
+        self.raw = raw
+        self._assign_header(fields)
+        if len(raw) > header_length + 1:
+            # The body is only sliced off once it is read.
+            self._content = (fields['content'], header_length + 1)
+        else:
+            # Nothing but the header line to decode.
+            self._content = fields['content'] or ''
+
+    def _materialize_content(self, unread) -> str:
+        first_line_content, body_offset = unread
+
+        body = _decode(self.raw[body_offset:])
+        if body.endswith('\n'):
+            body = body[:-1]
+
+        lines = [line.rstrip() for line in body.split('\n')] if body else []
+        if first_line_content is not None:
+            lines.insert(0, first_line_content)
+        return '\n'.join(lines)
+
+
+def _decode(raw: memoryview) -> str:
+    return str(raw, ENCODING, 'replace')
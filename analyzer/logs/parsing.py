@@ -2,9 +2,12 @@
 Functions for the purpose of parsing a log file.
 """
 
-from analyzer.logs.record import line_begins_with_record_header
+from analyzer.logs.record import LogRecord, line_begins_with_record_header
 
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Iterable, Iterator, List
+
+if TYPE_CHECKING:
+    from analyzer.logs.batch import RecordBatch  # noqa: F401
 
 
 def gather_records(input_lines: Iterable[str]) -> List[str]:
@@ -34,3 +37,78 @@ def gather_records(input_lines: Iterable[str]) -> List[str]:
 
     if len(record_buffer) > 0:
         yield record_buffer
+
+
+def scan_records(input_lines: Iterable[str]) -> Iterator[LogRecord]:
+    """
+        Single pass counterpart of `gather_records`,
+        that yields finished `LogRecord` objects instead of lines.
+
+        Every line is tested with `LogRecord.parse_header_line` exactly once.
+        The fields it captures for a record header are kept
+        and used to build the record once its last line has been seen,
+        so the header is never matched twice.
+        The lines of the body are only joined if a stage reads the content.
+
+        The records are the same as the ones obtained by joining
+        the lines from `gather_records` and passing them to `LogRecord`.
+    """
+    assert input_lines
+
+    parse_header_line = LogRecord.parse_header_line
+    fields = None
+    body = []
+
+    for line in input_lines:
+        line = line.rstrip()
+        next_fields = parse_header_line(line)
+        if next_fields is None:
+            if fields is not None:
+                body.append(line)
+            continue
+
+        if fields is not None:
+            yield LogRecord.from_fields(fields, body)
+            body = []
+        fields = next_fields
+
+    if fields is not None:
+        yield LogRecord.from_fields(fields, body)
+
+
+def gather_batches(input_lines: Iterable[str],
+                   batch_size: int = 4096) -> Iterator['RecordBatch']:
+    """
+        Columnar counterpart of `scan_records`,
+        that yields `RecordBatch` objects of up to `batch_size` records.
+        No `LogRecord` objects are created on the way.
+    """
+    from analyzer.logs.batch import RecordBatchBuilder
+    assert input_lines
+    assert batch_size > 0, 'Batch size must be positive.'
+
+    parse_header_line = LogRecord.parse_header_line
+    builder = RecordBatchBuilder()
+    fields = None
+    body = []
+
+    for line in input_lines:
+        line = line.rstrip()
+        next_fields = parse_header_line(line)
+        if next_fields is None:
+            if fields is not None:
+                body.append(line)
+            continue
+
+        if fields is not None:
+            builder.append(fields, body)
+            body = []
+            if len(builder) == batch_size:
+                yield builder.build()
+                builder = RecordBatchBuilder()
+        fields = next_fields
+
+    if fields is not None:
+        builder.append(fields, body)
+    if len(builder):
+        yield builder.build()
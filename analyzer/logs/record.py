@@ -2,10 +2,43 @@
 Model for the log format we have to work with.
 """
 
-from typing import Dict, List
+import re
+from datetime import date as Date
+from functools import lru_cache
+from sys import intern
+from typing import Dict, List, Optional
+
+# The range of timestamps, that of signed 64 bit integers.
+TIMESTAMP_MIN = -2**63
+TIMESTAMP_MAX = 2**63 - 1
 
 
 class LogRecord:
+    """
+        A single record of the log.
+
+        Records are numerous, so they are kept small:
+        the timestamp is stored as it appeared in the header,
+        and converted to `timestamp` only when someone asks for it,
+        recurring names are interned,
+        and the lines of `content` are only joined when it is read.
+    """
+
+    __slots__ = (
+        '_stamp',
+        '_timestamp',
+        'application',
+        'event_type',
+        'source_file',
+        'source_line',
+        'source_scope',
+        '_content',
+    )
+
+    MONTHS = (
+        'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+        'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'
+    )
 
     # NOTE: This pattern is meant to be used with the 'x' flag.
     # Either a '-' indicating no known scope, or a location in a source file.
@@ -54,8 +87,8 @@ class LogRecord:
             {scope_pattern}
         )
     """.format(**{
-        # 4 digits, ASCII
-        'year_format': r'\d{4}',
+        # 4 digits, ASCII, from year 1 on, as dates can hold them
+        'year_format': r'(?!0000)\d{4}',
 
         # English, abbreviated to three characters as in old school UNIX
         'month_format': r'Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec',
@@ -90,25 +123,103 @@ class LogRecord:
         if content is None:
             return
 
-        fields = LogRecord.parse_string(content)
+        self._assign(LogRecord.parse_string(content))
+
+    @staticmethod
+    def from_fields(fields: Dict[str, str],
+                    body: List[str] = None) -> 'LogRecord':
+        """
+            Builds a record from already captured header fields,
+            as returned by `parse_string` or `parse_header_line`,
+            without matching the header again.
+
+            :param body: Lines following the header line, if any.
+            They are only joined into `content` when it is first read.
+        """
+        record = LogRecord()
+        if body:
+            record._assign_header(fields)
+            if fields['content'] is not None:
+                body.insert(0, fields['content'])
+            record._content = body
+        else:
+            record._assign(fields)
+        return record
+
+    def _assign(self, fields: Dict[str, str]):
+        self._assign_header(fields)
+        self._content = fields['content'] or ''
+
+    def _assign_header(self, fields: Dict[str, str]):
+        source_file = fields['source_file']
+        source_scope = fields['source_scope']
+
+        self._stamp = f"{fields['date']} {fields['time']}"
+        self._timestamp = None
+        self.application = intern(fields['application'])
+        self.event_type = intern(fields['event_type'])
+        self.source_file = source_file and intern(source_file)
+        self.source_line = fields['source_line']
+        self.source_scope = source_scope and intern(source_scope)
+
+    @property
+    def date(self) -> str:
+        # The date is fixed width: YYYY/Mon/DD
+        return self._stamp[:11]
 
-        self.date = fields['date']
-        self.time = fields['time']
-        self.application = fields['application']
-        self.event_type = fields['event_type']
-        self.source = {
-            'file': fields['source_file'],
-            'line': fields['source_line'],
-            'scope': fields['source_scope'],
+    @property
+    def time(self) -> str:
+        return self._stamp[12:]
+
+    @property
+    def timestamp(self) -> int:
+        """
+            Nanoseconds since the UNIX epoch.
+            The log does not say which timezone it was written in,
+            so the timestamp is computed as if it were UTC.
+        """
+        timestamp = self._timestamp
+        if timestamp is None:
+            timestamp = parse_timestamp(self._stamp)
+            self._timestamp = timestamp
+        return timestamp
+
+    @property
+    def source(self) -> Dict[str, str]:
+        return {
+            'file': self.source_file,
+            'line': self.source_line,
+            'scope': self.source_scope,
+        }
+
+    @property
+    def content(self) -> str:
+        content = self._content
+        if content.__class__ is not str:
+            content = self._materialize_content(content)
+            self._content = content
+        return content
+
+    def _materialize_content(self, lines: List[str]) -> str:
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+            The fields of the record as a plain dict,
+            suitable for serialization.
+        """
+        return {
+            'date': self.date,
+            'time': self.time,
+            'application': self.application,
+            'event_type': self.event_type,
+            'source': self.source,
+            'content': self.content,
         }
-        self.content = fields['content'] or ''
 
     @staticmethod
     def parse_scope(content: str) -> Dict[str, str]:
-        from re import match, X
-
-        indicator_pattern = f'^{LogRecord.SCOPE_PATTERN}$'
-        matched = match(indicator_pattern, content, X)
+        matched = _SCOPE_REGEX.match(content)
         assert matched, 'Could not parse source indicator.'
 
         fields = matched.groupdict()
@@ -118,23 +229,187 @@ class LogRecord:
 
     @staticmethod
     def parse_string(content: str) -> List[str]:
-        from re import match, X, M, S
         assert content is not None, 'Must pass record to be parsed.'
         assert type(content) == str, 'Record must be string.'
 
-        m = match(f"""
-            \\A
-            {LogRecord.HEADER_PATTERN}
-            (?:\\s  # No one specified whether messages without body exist.
-                (?P<content> .*)
-            )?
-            \\Z
-        """, content, X | M | S)
+        m = _RECORD_REGEX.match(content)
         assert m, 'Could not parse log record.'
 
         return m.groupdict()
 
+    @staticmethod
+    def parse_header_line(line: str) -> Optional[Dict[str, str]]:
+        """
+            Parses the first line of a log record.
+
+            The header is made of five fields separated by single spaces,
+            so most lines can be taken apart with a plain `str.split`
+            and a few cheap checks.
+            Anything that does not pass those checks is handed over
+            to the full header pattern, so the fast path never accepts
+            a line the pattern would reject.
+
+            :param line: A single line, without the trailing newline.
+            :returns: The same fields as `parse_string` would,
+            with `content` holding the rest of this line only,
+            or None if the line does not start a record.
+        """
+        # Every header starts with the year, most body lines do not.
+        if not line[:1].isdecimal():
+            return None
+
+        fields = _split_header_line(line)
+        if fields is not None:
+            return fields
+
+        m = _RECORD_REGEX.match(line)
+        if m is None:
+            return None
+        return m.groupdict()
+
+    @classmethod
+    def from_parsed(cls,
+                    stamp: str,
+                    timestamp: Optional[int],
+                    application: str,
+                    event_type: str,
+                    source_file: Optional[str],
+                    source_line: Optional[str],
+                    source_scope: Optional[str],
+                    content: str) -> 'LogRecord':
+        """
+            Builds a record from fields parsed before,
+            e.g. stored in a cache, without checking them again.
+
+            :param stamp: The date and time, as they were in the header.
+            :param timestamp: See `timestamp`, computed when read if None.
+            Names are expected to be interned already.
+        """
+        record = cls()
+        record._stamp = stamp
+        record._timestamp = timestamp
+        record.application = application
+        record.event_type = event_type
+        record.source_file = source_file
+        record.source_line = source_line
+        record.source_scope = source_scope
+        record._content = content
+        return record
+
 
 def line_begins_with_record_header(string: str) -> bool:
-    from re import match, X
-    return match(f'\\A{LogRecord.HEADER_PATTERN}', string, X)
+    return _HEADER_REGEX.match(string)
+
+
+def parse_timestamp(stamp: str) -> int:
+    """
+        Converts the date and time of a record header,
+        separated by a single whitespace, to nanoseconds since the epoch.
+        Times from before 1677 or after 2262 are clamped to
+        `TIMESTAMP_MIN` and `TIMESTAMP_MAX`, so every timestamp
+        fits the 64 bit columns of batches, caches and indices.
+    """
+    time = stamp[12:]
+    hours, minutes, rest = time.split(':', 2)
+
+    # The separator after the seconds is not necessarily a dot,
+    # and may even be a digit: split the same way the header pattern would.
+    seconds_length = 2 if rest[:2].isdecimal() and len(rest) > 3 else 1
+    seconds = rest[:seconds_length]
+    fraction = rest[seconds_length + 1:]
+
+    timestamp = (
+        _midnight(stamp[:11]) +
+        (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 10**9 +
+        int(fraction[:9].ljust(9, '0'))
+    )
+    return min(max(timestamp, TIMESTAMP_MIN), TIMESTAMP_MAX)
+
+
+@lru_cache(maxsize=1024)
+def _midnight(date: str) -> int:
+    year, month, day = date.split('/')
+    days = (
+        Date(int(year), _MONTH_NUMBERS[month], 1).toordinal() +
+        int(day) - 1 - _EPOCH_ORDINAL
+    )
+    return days * 86400 * 10**9
+
+
+_SCOPE_REGEX = re.compile(f'^{LogRecord.SCOPE_PATTERN}$', re.X)
+_HEADER_REGEX = re.compile(f'\\A{LogRecord.HEADER_PATTERN}', re.X)
+_RECORD_REGEX = re.compile(f"""
+    \\A
+    {LogRecord.HEADER_PATTERN}
+    (?:\\s  # No one specified whether messages without body exist.
+        (?P<content> .*)
+    )?
+    \\Z
+""", re.X | re.M | re.S)
+
+_MONTH_NUMBERS = {
+    month: number
+    for number, month
+    in enumerate(LogRecord.MONTHS, start=1)
+}
+_EPOCH_ORDINAL = Date(1970, 1, 1).toordinal()
+
+_DATE_SEPARATORS = frozenset(f'/{month}/' for month in LogRecord.MONTHS)
+_DAYS = frozenset(f'{day:02}' for day in range(32))
+
+
+def _split_header_line(line: str) -> Optional[Dict[str, str]]:
+    """
+        Fixed-field fast path of `LogRecord.parse_header_line`.
+        Only handles the canonical `YYYY/Mon/DD hh:mm:ss.f+` timestamp.
+        Returns None whenever it is not sure, never a wrong answer.
+    """
+    parts = line.split(' ', 5)
+    if len(parts) < 5:
+        return None
+
+    date = parts[0]
+    time = parts[1]
+    if not (
+        len(date) == 11 and
+        date[4:9] in _DATE_SEPARATORS and
+        date[:4] != '0000' and
+        date[9:] in _DAYS and
+        len(time) > 9 and time[2:9:3] == '::.' and
+        (date[:4] + time[:2] + time[3:5] + time[6:8] + time[9:]).isdecimal()
+    ):
+        return None
+
+    # Application and event type may contain anything but whitespace.
+    # `isprintable` is False for every whitespace character except ' ',
+    # and there can be no ' ' in these after the split.
+    application = parts[2]
+    event_type = parts[3]
+    scope = parts[4]
+    if not (application.isprintable() and event_type.isprintable()):
+        return None
+
+    if scope == '-':
+        source_file = source_line = source_scope = None
+    else:
+        source_file, colon, rest = scope.partition(':')
+        source_line, paren, source_scope = rest.partition('(')
+        if not (
+            paren and source_file and
+            source_line.isdecimal() and
+            source_scope[-1:] == ')' and len(source_scope) > 1 and
+            scope.isprintable()
+        ):
+            return None
+        source_scope = source_scope[:-1]
+
+    return {
+        'date': date,
+        'time': time,
+        'application': application,
+        'event_type': event_type,
+        'source_file': source_file,
+        'source_line': source_line,
+        'source_scope': source_scope,
+        'content': parts[5] if len(parts) == 6 else None,
+    }
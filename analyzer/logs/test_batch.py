@@ -0,0 +1,108 @@
+"""
+Tests for the columnar record representation.
+"""
+
+import numpy as np
+import pytest
+from analyzer.logs.batch import RecordBatch
+from analyzer.logs.parsing import gather_batches, scan_records
+
+
+def header(second: int, application: str, event_type: str) -> str:
+    return ' '.join([
+        f'2014/Oct/24 19:16:{second:02}.062933',
+        application,
+        event_type,
+        'ExampleComponentTest.ttcn:313(function:ExampleTestedFunction)'
+    ])
+
+
+@pytest.fixture
+def sample_lines():
+    return [
+        f'{header(0, "111", "SYSCALL")} open(0x7F323232) = -1',
+        f'{header(1, "112", "PORTEVENT")} Multiline',
+        '  body \N{BLACK HEART SUIT}',
+        header(2, '111', 'SYSCALL'),
+        f'{header(3, "113", "PORTEVENT")} Message',
+        '2014/Oct/24 19:16:04.1 111 SYSCALL - Scopeless',
+    ]
+
+
+class TestRecordBatch:
+
+    def test_batches_hold_the_same_records(self, sample_lines):
+        expected = [r.to_dict() for r in scan_records(sample_lines)]
+        batches = [*gather_batches(sample_lines, batch_size=2)]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [
+            record.to_dict()
+            for batch in batches
+            for record in batch
+        ] == expected
+
+    def test_from_records(self, sample_lines):
+        records = [*scan_records(sample_lines)]
+        batch = RecordBatch.from_records(records)
+
+        assert len(batch) == 5
+        assert [r.timestamp for r in records] == [*batch.timestamps]
+        assert [r.to_dict() for r in batch] == [r.to_dict() for r in records]
+
+    def test_timestamps_beyond_64_bits(self, sample_lines):
+        records = [*scan_records([
+            sample_lines[0].replace('2014/', '2300/', 1)
+        ])]
+        batch = RecordBatch.from_records(records)
+
+        assert [*batch.timestamps] == [np.iinfo(np.int64).max]
+        assert [r.to_dict() for r in batch] == [r.to_dict() for r in records]
+
+    def test_columns(self, sample_lines):
+        batch, = gather_batches(sample_lines)
+
+        assert batch.timestamps.dtype == np.int64
+        assert [*np.diff(batch.timestamps)] == [10**9] * 3 + [
+            10**9 - 62933000 + 100000000
+        ]
+        assert batch.categories['application'] == ('111', '112', '113')
+        assert [*batch.application] == [0, 1, 0, 2, 0]
+        assert [*batch.source_file] == [0, 0, 0, 0, -1]
+        assert batch.content_of(1) == 'Multiline\n  body \N{BLACK HEART SUIT}'
+        assert batch.content_of(2) == ''
+
+    def test_time_range(self, sample_lines):
+        batch, = gather_batches(sample_lines)
+        since, until = batch.timestamps[1], batch.timestamps[3]
+        selected = batch.between(since, until)
+
+        assert [r.to_dict() for r in selected] == [
+            r.to_dict() for r in [*batch][1:3]
+        ]
+        assert len(batch.between(since=since)) == 4
+        assert len(batch.between(until=until)) == 3
+
+    def test_take(self, sample_lines):
+        batch, = gather_batches(sample_lines)
+
+        assert [r.content for r in batch.take([3, 0])] == [
+            'Message', 'open(0x7F323232) = -1'
+        ]
+        assert len(batch.take([])) == 0
+
+    def test_event_type_counts(self, sample_lines):
+        batch, = gather_batches(sample_lines)
+
+        assert batch.event_type_counts() == {'SYSCALL': 3, 'PORTEVENT': 2}
+        assert batch[1:].event_type_counts() == {'SYSCALL': 2, 'PORTEVENT': 2}
+
+    def test_group_by_application(self, sample_lines):
+        batch, = gather_batches(sample_lines)
+        groups = batch.group_by_application()
+
+        assert sorted(groups) == ['111', '112', '113']
+        assert [r.content for r in groups['111']] == [
+            'open(0x7F323232) = -1', '', 'Scopeless'
+        ]
+        assert [r.content for r in groups['113']] == ['Message']
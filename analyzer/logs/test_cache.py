@@ -0,0 +1,93 @@
+"""
+Tests for the binary record cache.
+"""
+
+import io
+
+import pytest
+from analyzer.logs.cache import (
+    CachedLog, CacheWriter, MAGIC, is_cache, read_records, write_cache
+)
+from analyzer.logs.parsing import scan_records
+
+
+@pytest.fixture
+def sample_records() -> list:
+    lines = []
+    for i in range(100):
+        lines.append(
+            f'2014/Oct/24 19:16:{i % 60:02}.{i:06} {100 + i % 3} SYSCALL '
+            f'file{i % 4}.cpp:{i}(scope{i % 2}) Record {i}'
+        )
+        if i % 5 == 0:
+            lines.append('árvíztűrő tükörfúrógép')
+        if i % 7 == 0:
+            lines.append(f'2014/Oct/24 19:17:00.0 {i} INFO - ')
+    return [*scan_records(line + '\n' for line in lines)]
+
+
+def dicts(records) -> list:
+    return [
+        (record.to_dict(), record.timestamp)
+        for record
+        in records
+    ]
+
+
+class TestRecordCache:
+
+    def test_records_survive_round_trip(self, tmp_path, sample_records):
+        path = str(tmp_path / 'sample.cache')
+        write_cache(sample_records, path, block_size=16)
+
+        assert is_cache(path)
+        with CachedLog(path) as log:
+            assert dicts(log) == dicts(sample_records)
+
+    def test_records_beyond_64_bit_timestamps(self, tmp_path):
+        records = [*scan_records([
+            '0001/Jan/01 00:00:00.0 hc USER - Early\n',
+            '2300/Oct/24 19:16:48.062933 hc USER - Late\n',
+        ])]
+        path = str(tmp_path / 'sample.cache')
+        write_cache(records, path)
+
+        with CachedLog(path) as log:
+            assert dicts(log) == dicts(records)
+
+    def test_names_are_interned(self, tmp_path, sample_records):
+        path = str(tmp_path / 'sample.cache')
+        write_cache(sample_records, path)
+
+        with CachedLog(path) as log:
+            event_types = [record.event_type for record in log]
+        first = {}
+        for event_type in event_types:
+            assert first.setdefault(event_type, event_type) is event_type
+
+    def test_empty_cache(self):
+        f = io.BytesIO()
+        with CacheWriter(f):
+            pass
+
+        assert f.getvalue() == MAGIC
+        f.seek(len(MAGIC))
+        assert [*read_records(f)] == []
+
+    def test_truncated_cache(self, sample_records):
+        f = io.BytesIO()
+        with CacheWriter(f) as writer:
+            writer.write_all(sample_records)
+
+        truncated = io.BytesIO(f.getvalue()[:-10])
+        truncated.seek(len(MAGIC))
+        with pytest.raises(ValueError):
+            [*read_records(truncated)]
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / 'sample.log'
+        path.write_text('2014/Oct/24 19:16:48.062933 111 SYSCALL - Hello\n')
+
+        assert not is_cache(str(path))
+        with pytest.raises(ValueError):
+            CachedLog(str(path))
@@ -0,0 +1,79 @@
+"""
+Tests for reading compressed logs.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+
+import pytest
+from analyzer.logs.compressed import ReadAheadReader, is_compressed, open_log
+
+
+CODECS = [gzip, bz2, lzma]
+
+
+@pytest.fixture
+def sample_text() -> str:
+    return ''.join(
+        f'2014/Oct/24 19:16:48.062933 111 SYSCALL - Record {i}\nbody\n'
+        for i in range(1000)
+    )
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_reads_compressed_logs(tmp_path, sample_text, codec):
+    path = tmp_path / 'sample.log.compressed'
+    path.write_bytes(codec.compress(sample_text.encode()))
+
+    assert is_compressed(str(path))
+    with open_log(str(path), buffer_size=100, read_ahead=2) as f:
+        assert f.read() == sample_text
+
+
+def test_reads_plain_logs(tmp_path, sample_text):
+    path = tmp_path / 'sample.log'
+    path.write_text(sample_text)
+
+    assert not is_compressed(str(path))
+    with open_log(str(path)) as f:
+        assert [*f] == sample_text.splitlines(keepends=True)
+
+
+@pytest.mark.parametrize('codec', [None, gzip])
+def test_invalid_bytes_are_replaced(tmp_path, codec):
+    data = b'2014/Oct/24 19:16:48.062933 111 SYSCALL - \xff\n'
+    path = tmp_path / 'sample.log'
+    path.write_bytes(codec.compress(data) if codec else data)
+
+    with open_log(str(path)) as f:
+        assert f.read() == data.decode('utf-8', 'replace')
+
+
+class FailingStream(io.RawIOBase):
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        raise OSError('Corrupt input')
+
+
+def test_read_errors_reach_the_reader():
+    reader = ReadAheadReader(FailingStream(), buffer_size=10)
+
+    with pytest.raises(OSError) as e:
+        reader.read(10)
+
+    assert e.match('Corrupt input')
+    reader.close()
+
+
+def test_close_before_the_end():
+    source = io.BytesIO(b'x' * 1000)
+    reader = ReadAheadReader(source, buffer_size=10, read_ahead=1)
+
+    assert reader.read(5) == b'xxxxx'
+    reader.close()
+
+    assert source.closed
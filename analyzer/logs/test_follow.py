@@ -0,0 +1,212 @@
+"""
+Tests for following a growing log file.
+"""
+
+import os
+from threading import Event, Thread
+
+import pytest
+from analyzer.logs.follow import Checkpoint, DEFAULT_READ_SIZE, LogFollower
+
+
+def header(i: int) -> str:
+    return f'2014/Oct/24 19:16:{i:02}.062933 111 SYSCALL - Record {i}'
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def log_path(tmp_path) -> str:
+    path = tmp_path / 'growing.log'
+    path.write_text('')
+    return str(path)
+
+
+def append(path: str, text: str):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def contents(completed) -> list:
+    return [record.content for record, _ in completed]
+
+
+class TestLogFollower:
+
+    def test_records_complete_at_next_header(self, log_path, clock):
+        follower = LogFollower(log_path, clock=clock)
+
+        append(log_path, f'{header(0)}\nbody\n{header(1)}\nbo')
+        assert contents(follower.poll()) == ['Record 0\nbody']
+
+        append(log_path, f'dy\n{header(2)}\n')
+        assert contents(follower.poll()) == ['Record 1\nbody']
+        assert follower.poll() == []
+        follower.close()
+
+    def test_last_record_completes_when_idle(self, log_path, clock):
+        follower = LogFollower(log_path, idle_timeout=2, clock=clock)
+
+        append(log_path, f'{header(0)}\nunterminated')
+        assert follower.poll() == []
+
+        clock.now = 1
+        assert follower.poll() == []
+
+        clock.now = 3
+        completed = follower.poll()
+        assert contents(completed) == ['Record 0']
+        assert completed[0][1] == len(f'{header(0)}\n')
+
+        append(log_path, f'\n{header(1)}\n')
+        clock.now = 6
+        assert contents(follower.poll()) == []
+        clock.now = 9
+        assert contents(follower.poll()) == ['Record 1']
+        follower.close()
+
+    def test_large_file_is_read_a_part_at_a_time(self, log_path, clock):
+        records = ''.join(f'{header(i)}\nbody\n' for i in range(20))
+        append(log_path, records)
+        follower = LogFollower(log_path, read_size=256, clock=clock)
+
+        polls = []
+        while True:
+            completed = follower.poll()
+            if not completed:
+                break
+            polls.append(contents(completed))
+        follower.close()
+
+        assert len(records) > 256 * 4
+        assert len(polls) > 4
+        assert all(len(poll) < 19 for poll in polls)
+        assert sum(polls, []) == [f'Record {i}\nbody' for i in range(19)]
+
+    def test_header_written_in_two_parts(self, log_path, clock):
+        follower = LogFollower(log_path, idle_timeout=2, clock=clock)
+
+        append(log_path, f'{header(0)}\nbody\n{header(1)[:20]}')
+        assert follower.poll() == []
+
+        # The writer pauses in the middle of the header.
+        clock.now = 3
+        completed = follower.poll()
+        assert contents(completed) == ['Record 0\nbody']
+        assert completed[0][1] == len(f'{header(0)}\nbody\n')
+
+        append(log_path, f'{header(1)[20:]}\n')
+        clock.now = 4
+        assert follower.poll() == []
+        clock.now = 7
+        assert contents(follower.poll()) == ['Record 1']
+        follower.close()
+
+    def test_resumes_from_checkpoint(self, log_path, tmp_path, clock):
+        checkpoint = str(tmp_path / 'growing.checkpoint')
+        append(log_path, ''.join(f'{header(i)}\n' for i in range(4)))
+
+        follower = LogFollower(log_path, checkpoint, clock=clock)
+        records = follower.follow()
+        assert [next(records).content for _ in range(2)] == [
+            'Record 0', 'Record 1'
+        ]
+        # The second record has not been processed completely.
+        records.close()
+
+        saved = Checkpoint.load(checkpoint)
+        assert saved.inode == os.stat(log_path).st_ino
+        assert saved.offset == len(f'{header(0)}\n')
+
+        follower = LogFollower(log_path, checkpoint, clock=clock)
+        assert contents(follower.poll()) == ['Record 1', 'Record 2']
+        follower.close()
+
+    def test_starts_over_after_rotation(self, log_path, tmp_path, clock):
+        checkpoint = str(tmp_path / 'growing.checkpoint')
+        append(log_path, f'{header(0)}\n{header(1)}\n')
+
+        follower = LogFollower(log_path, checkpoint, clock=clock)
+        assert contents(follower.poll()) == ['Record 0']
+
+        os.rename(log_path, log_path + '.1')
+        append(log_path, f'{header(5)}\n{header(6)}\n')
+
+        # What was pending in the old file comes first.
+        assert contents(follower.poll()) == ['Record 1']
+        assert contents(follower.poll()) == ['Record 5']
+        assert follower.checkpoint.inode == os.stat(log_path).st_ino
+        follower.close()
+
+    @pytest.mark.parametrize('read_size', [DEFAULT_READ_SIZE, 64])
+    def test_reads_what_was_appended_before_rotation(self, log_path, clock,
+                                                     read_size):
+        append(log_path, f'{header(1)}\n{header(2)}\n')
+        follower = LogFollower(log_path, read_size=read_size, clock=clock)
+        assert contents(follower.poll() + follower.poll()) == ['Record 1']
+
+        append(log_path, f'{header(3)}\n{header(4)}\n')
+        os.rename(log_path, log_path + '.1')
+        append(log_path, f'{header(5)}\n{header(6)}\n')
+
+        completed = []
+        for _ in range(10):
+            completed += follower.poll()
+        assert contents(completed) == [
+            'Record 2', 'Record 3', 'Record 4', 'Record 5'
+        ]
+        follower.close()
+
+    def test_starts_over_after_truncation(self, log_path, clock):
+        append(log_path, ''.join(f'{header(i)}\n' for i in range(4)))
+        follower = LogFollower(log_path, clock=clock)
+        assert len(follower.poll()) == 3
+
+        with open(log_path, 'w') as f:
+            f.write(f'{header(7)}\n{header(8)}\n')
+
+        assert contents(follower.poll()) == ['Record 3']
+        assert contents(follower.poll()) == ['Record 7']
+        follower.close()
+
+    def test_ignores_invalid_checkpoint(self, log_path, tmp_path, clock):
+        checkpoint = tmp_path / 'growing.checkpoint'
+        checkpoint.write_text('{"inode": 1, "offset": 1000}')
+        append(log_path, f'{header(0)}\n{header(1)}\n')
+
+        follower = LogFollower(log_path, str(checkpoint), clock=clock)
+        assert contents(follower.poll()) == ['Record 0']
+        follower.close()
+
+    def test_closed_while_followed_in_another_thread(self, log_path):
+        append(log_path, f'{header(0)}\n{header(1)}\n')
+        follower = LogFollower(log_path, poll_interval=0.001)
+        followed = []
+        first = Event()
+
+        def follow():
+            for record in follower.follow():
+                followed.append(record.content)
+                first.set()
+
+        thread = Thread(target=follow)
+        thread.start()
+        assert first.wait(5)
+        follower.close()
+        thread.join(5)
+
+        assert not thread.is_alive()
+        assert followed == ['Record 0']
+        assert follower.poll() == []
@@ -0,0 +1,149 @@
+"""
+Tests for the sidecar timestamp index.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+from analyzer.logs.index import (
+    TimestampIndex, parse_time, records_between
+)
+from analyzer.logs.mapped import MappedLog
+
+
+def line(second: int, content: str = 'Something happened') -> str:
+    minutes, seconds = divmod(second, 60)
+    return (
+        f'2014/Oct/24 19:{minutes:02}:{seconds:02}.000000 111 SYSCALL - ' +
+        content
+    )
+
+
+def write_log(path, seconds) -> str:
+    path.write_text(''.join(f'{line(s)}\nbody\n' for s in seconds))
+    return str(path)
+
+
+def contents_between(path, since, until, index=None):
+    with MappedLog(path) as log:
+        return [
+            record.time
+            for record
+            in records_between(log, since, until, index)
+        ]
+
+
+@pytest.fixture
+def sample_log(tmp_path) -> str:
+    # Mostly in order, with a few records out of place.
+    seconds = [*range(600)]
+    seconds[100], seconds[400] = seconds[400], seconds[100]
+    return write_log(tmp_path / 'sample.log', seconds)
+
+
+class TestTimestampIndex:
+
+    def test_window_contains_all_matching_records(self, sample_log):
+        index = TimestampIndex.for_log(sample_log, interval=1000)
+        assert len(index) > 10
+
+        for window in [
+            (None, None),
+            ('2014-10-24 19:05', None),
+            (None, '2014-10-24 19:02'),
+            ('2014-10-24 19:06', '2014-10-24 19:07'),
+            ('2014-10-24 19:01:40', '2014-10-24 19:01:41'),
+            ('2014-10-24 20:00', None),
+        ]:
+            since, until = [
+                parse_time(value) if value else None
+                for value in window
+            ]
+            assert (
+                contents_between(sample_log, since, until, index) ==
+                contents_between(sample_log, since, until)
+            )
+
+    def test_timestamps_beyond_64_bits(self, tmp_path):
+        path = write_log(tmp_path / 'sample.log', range(300))
+        with open(path, 'a') as f:
+            f.write(line(300).replace('2014/', '2300/', 1) + '\n')
+            f.write(line(301).replace('2014/', '0001/', 1) + '\n')
+        index = TimestampIndex.for_log(path, interval=1000)
+        loaded = TimestampIndex.for_log(path, interval=1000)
+
+        assert [*loaded.maximums] == [*index.maximums]
+        for window in [
+            ('2014-10-24 19:03', None),
+            ('2300-01-01', None),
+            (None, '2014-10-24 19:00:10'),
+        ]:
+            since, until = [
+                parse_time(value) if value else None
+                for value in window
+            ]
+            assert (
+                contents_between(path, since, until, index) ==
+                contents_between(path, since, until)
+            )
+
+    def test_window_skips_unrelated_parts(self, sample_log):
+        index = TimestampIndex.for_log(sample_log, interval=1000)
+        start, end = index.window(
+            parse_time('2014/Oct/24 19:08:00'),
+            parse_time('2014/Oct/24 19:09:00')
+        )
+        size = os.path.getsize(sample_log)
+
+        assert size * 0.7 < start < end < size * 0.95
+
+    def test_sidecar_is_reused_and_updated(self, sample_log):
+        index = TimestampIndex.for_log(sample_log, interval=1000)
+        sidecar = TimestampIndex.sidecar_path(sample_log)
+        assert os.path.exists(sidecar)
+
+        with open(sidecar, 'rb') as f:
+            loaded = TimestampIndex.load(f)
+        assert loaded.offsets == index.offsets
+        assert loaded.size == os.path.getsize(sample_log)
+
+        with open(sample_log, 'a') as f:
+            f.write(f'{line(3600)}\n')
+
+        grown = TimestampIndex.for_log(sample_log)
+        assert grown.size == os.path.getsize(sample_log)
+        assert grown.offsets[:-1] == index.offsets[:-1]
+        assert grown.maximums[-1] == parse_time('2014/Oct/24 20:00:00')
+
+    def test_rebuilt_after_truncation(self, sample_log):
+        TimestampIndex.for_log(sample_log, interval=1000)
+        write_log(Path(sample_log), [0, 1])
+
+        index = TimestampIndex.for_log(sample_log, interval=1000)
+        assert len(index) == 1
+        assert index.maximums[0] == parse_time('2014/Oct/24 19:00:01')
+
+    def test_rebuilt_after_rewrite_in_place(self, sample_log):
+        TimestampIndex.for_log(sample_log, interval=1000)
+        inode = os.stat(sample_log).st_ino
+        write_log(Path(sample_log), range(3600, 4800))
+        assert os.stat(sample_log).st_ino == inode
+
+        index = TimestampIndex.for_log(sample_log, interval=1000)
+        assert index.minimums[0] == parse_time('2014/Oct/24 20:00:00')
+        assert contents_between(
+            sample_log, parse_time('2014/Oct/24 20:10:00'),
+            parse_time('2014/Oct/24 20:10:02'), index
+        ) == ['19:70:00.000000', '19:70:01.000000']
+
+
+def test_parse_time_formats():
+    expected = parse_time('2014/Oct/24 19:16:48.062933')
+
+    assert parse_time('2014-10-24T19:16:48.062933') == expected
+    assert parse_time('2014-10-24 19:16:48.062933+00:00') == expected
+    assert parse_time('2014/Oct/24 19:16:48') == expected - 62933000
+
+    with pytest.raises(ValueError):
+        parse_time('2014/Foo/24 19:16:48')
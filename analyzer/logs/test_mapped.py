@@ -0,0 +1,73 @@
+"""
+Tests for memory-mapped log files.
+"""
+
+import pytest
+from analyzer.logs.mapped import MappedLog
+from analyzer.logs.parsing import scan_records
+
+
+HEADER = (
+    '2014/Oct/24 19:16:48.062933 111 SYSCALL ' +
+    'ExampleComponentTest.ttcn:313(function:ExampleTestedFunction)'
+)
+
+
+@pytest.fixture
+def sample_log(tmp_path) -> str:
+    path = tmp_path / 'sample.log'
+    path.write_bytes('\r\n'.join([
+        'Preamble before the first record',
+        f'{HEADER} open(0x7F323232) = -1',
+        f'{HEADER} Multiline  ',
+        '  {  ',
+        '    id := 1',
+        '  }',
+        '',
+        f'{HEADER}',
+        f'{HEADER} Not a header: {HEADER}',
+        f'{HEADER} Non-ASCII: \N{BLACK HEART SUIT}',
+        '',
+    ]).encode())
+    return str(path)
+
+
+class TestMappedLog:
+
+    def test_matches_text_scanner(self, sample_log):
+        with open(sample_log) as f:
+            expected = [record.to_dict() for record in scan_records(f)]
+
+        with MappedLog(sample_log) as log:
+            records = [record.to_dict() for record in log]
+
+        assert len(records) == 5
+        assert records == expected
+
+    def test_empty_file_yields_nothing(self, tmp_path):
+        path = tmp_path / 'empty.log'
+        path.write_bytes(b'')
+
+        with MappedLog(str(path)) as log:
+            assert not [*log]
+
+    def test_spans_are_aligned_to_headers(self, sample_log):
+        with MappedLog(sample_log) as log:
+            spans = [*log.spans()]
+            starts = [begin for begin, _, _ in spans]
+
+            assert [*log.spans(starts[1])] == spans[1:]
+            assert [*log.spans(starts[1] - 1)] == spans[1:]
+            assert [*log.spans(starts[1] + 1)] == spans[2:]
+            assert [*log.spans(0, starts[2])] == spans[:2]
+            assert [*log.spans(0, starts[2] + 1)] == spans[:3]
+
+    def test_content_is_decoded_on_access(self, sample_log):
+        with MappedLog(sample_log) as log:
+            record = [*log][1]
+
+            assert bytes(record.raw).startswith(HEADER.encode())
+            assert record.event_type == 'SYSCALL'
+            assert isinstance(record._content, tuple)
+            assert record.content == 'Multiline\n  {\n    id := 1\n  }\n'
+            assert record._content == record.content
@@ -3,7 +3,8 @@ Tests for parsing utilities.
 """
 
 import pytest
-from analyzer.logs.parsing import gather_records
+from analyzer.logs.parsing import gather_records, scan_records
+from analyzer.logs.record import LogRecord
 
 
 @pytest.fixture
@@ -73,3 +74,49 @@ class TestRecordSeparation:
 
         assert len(lines_by_record) == 1
         assert lines_by_record[0] == record_lines
+
+
+class TestRecordScanning:
+
+    def test_garbage_yields_no_records(self):
+        assert not [*scan_records([
+            'This does not quite',
+            'look anything like',
+            'a log record to parse.'
+        ])]
+
+    def test_yields_parsed_records(self, sample_line):
+        records = [*scan_records([sample_line] * 2)]
+
+        assert len(records) == 2
+        for record in records:
+            assert record.date == '2014/Oct/24'
+            assert record.time == '19:16:48.062933'
+            assert record.source['line'] == '313'
+            assert record.content == 'open(0x7F323232) = -1'
+
+    def test_matches_gather_records(self,
+                                    sample_line,
+                                    sample_line_without_scope):
+        header_only = sample_line.rsplit(' ', 2)[0]
+        lines = [
+            'Preamble before the first record',
+            sample_line,
+            '  continued, with indentation  ',
+            '',
+            sample_line_without_scope,
+            header_only,
+            header_only,
+            'body on the second line only',
+            sample_line.replace(' ', '\t', 1),
+            sample_line.replace(' 111 ', ' 111\t', 1),
+        ]
+        expected = [
+            LogRecord('\n'.join(record_lines)).to_dict()
+            for record_lines
+            in gather_records(lines)
+        ]
+        scanned = [record.to_dict() for record in scan_records(lines)]
+
+        assert len(scanned) == 6
+        assert scanned == expected
@@ -4,6 +4,7 @@ Unit tests for LogRecord
 
 import pytest
 from analyzer.logs.record import LogRecord, line_begins_with_record_header
+from analyzer.logs.record import TIMESTAMP_MAX, TIMESTAMP_MIN
 
 
 @pytest.fixture
@@ -123,6 +124,117 @@ class TestRecordParsing:
         self.assert_record_matches_sample(sample_multiline_record)
 
 
+class TestRecordFields:
+
+    def test_records_have_no_instance_dict(self, sample_singleline_record):
+        record = LogRecord(sample_singleline_record['sample'])
+        assert not hasattr(record, '__dict__')
+
+    def test_names_are_interned(self, sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        one = LogRecord(sample)
+        other = LogRecord(''.join([*sample]))
+
+        assert one.event_type is other.event_type
+        assert one.application is other.application
+        assert one.source_file is other.source_file
+
+    def test_timestamp(self, sample_singleline_record):
+        record = LogRecord(sample_singleline_record['sample'])
+        from datetime import datetime, timezone
+        expected = datetime(
+            2014, 10, 24, 19, 16, 48, 62933, tzinfo=timezone.utc
+        )
+
+        assert record.timestamp == int(expected.timestamp()) * 10**9 + 62933000
+
+    def test_timestamp_precision(self, sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        shorter = LogRecord(sample.replace('.062933', '.5', 1))
+        longer = LogRecord(sample.replace('.062933', '.0000000017', 1))
+        midnight = LogRecord(sample).timestamp - 69408062933000
+
+        assert shorter.timestamp == midnight + 69408500000000
+        assert longer.timestamp == midnight + 69408000000001
+
+    def test_timestamps_are_clamped_to_64_bits(self,
+                                               sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        late = LogRecord(sample.replace('2014/', '2300/', 1))
+        early = LogRecord(sample.replace('2014/', '0001/', 1))
+
+        assert late.date == '2300/Oct/24'
+        assert late.timestamp == TIMESTAMP_MAX == 2**63 - 1
+        assert early.timestamp == TIMESTAMP_MIN == -2**63
+
+    def test_content_is_joined_on_access(self, sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        fields = LogRecord.parse_header_line(sample)
+        record = LogRecord.from_fields(fields, ['first', 'second'])
+
+        assert record.content == 'open(0x7F323232) = -1\nfirst\nsecond'
+        assert record.to_dict() == LogRecord(
+            f'{sample}\nfirst\nsecond'
+        ).to_dict()
+
+    def test_from_parsed_fields(self, sample_singleline_record):
+        expected = LogRecord(sample_singleline_record['sample'])
+        record = LogRecord.from_parsed(
+            f'{expected.date} {expected.time}',
+            None,
+            expected.application,
+            expected.event_type,
+            expected.source_file,
+            expected.source_line,
+            expected.source_scope,
+            expected.content
+        )
+
+        assert record.to_dict() == expected.to_dict()
+        assert record.timestamp == expected.timestamp
+
+
+class TestHeaderLineParsing:
+
+    def test_fast_path_matches_pattern(self, sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        assert (
+            LogRecord.parse_header_line(sample) ==
+            LogRecord.parse_string(sample)
+        )
+
+    def test_falls_back_to_pattern(self, sample_singleline_record):
+        # Tabs and single digit hours are valid, but not fixed-field.
+        sample = sample_singleline_record['sample'].replace(
+            ' 19:', '\t9:', 1
+        )
+        fields = LogRecord.parse_header_line(sample)
+
+        assert fields == LogRecord.parse_string(sample)
+        assert fields['time'] == '9:16:48.062933'
+
+    def test_rejects_invalid_headers(self, sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        counterexamples = [
+            '',
+            'Once upon a time, in a galaxy far, far away...',
+            sample.replace('Oct', 'Foo', 1),
+            sample.replace('/24 ', '/32 ', 1),
+            sample.replace('2014/', '0000/', 1),
+            sample.replace('.062933', '.', 1),
+            sample.replace(':313(', ':31x(', 1),
+            sample.replace('ExampleTestedFunction)', 'Example)Tested', 1),
+        ]
+        for line in counterexamples:
+            assert LogRecord.parse_header_line(line) is None
+
+    def test_from_fields(self, sample_singleline_record):
+        sample = sample_singleline_record['sample']
+        record = LogRecord.from_fields(LogRecord.parse_header_line(sample))
+
+        assert record.to_dict() == LogRecord(sample).to_dict()
+
+
 class TestRecordStringHeuristics:
 
     def test_header_detection_positive(self, sample_singleline_record):
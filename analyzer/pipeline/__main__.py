@@ -1,31 +1,257 @@
 # module level import
-from analyzer.pipeline.configuration import PipelineConfiguration
+# Everything else is imported when needed,
+# many runs are short enough for imports to matter.
 from analyzer.pipeline.pipeline import Pipeline
-from analyzer.logs.record import LogRecord
-from analyzer.logs.parsing import gather_records
+from analyzer.pipeline.plan import default_cache_directory, load_configuration
+from analyzer.logs.cache import is_cache
+from analyzer.logs.compressed import is_compressed
 
-from sys import argv, stdin, stderr
-import yaml
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from sys import stdin
 
 '''
 Main file for module
 '''
 
 
-if len(argv) != 2:
-    print(f'\nUsage: {argv[0]} <pipeline.yml>', file=stderr)
-    exit(1)
+def time(text: str) -> int:
+    from analyzer.logs.index import parse_time
+    return parse_time(text)
 
-config_yml = yaml.safe_load(open(argv[1], 'rb').read())
-for stage in config_yml.keys():
-    s = config_yml[stage]
-    if 'depends_on' in s:
-        if type(s['depends_on']) == str:
-            config_yml[stage]['depends_on'] = [s['depends_on']]
 
-config = PipelineConfiguration(config_yml)
-pipeline = Pipeline(config)
+parser = ArgumentParser(
+    prog='python -m analyzer.pipeline',
+    description='Runs a log processing pipeline over a log file.'
+)
+parser.add_argument('pipeline', help='pipeline definition (YAML)')
+parser.add_argument(
+    'log', nargs='?',
+    help='log file to process, the standard input if omitted; '
+         'gzip, bzip2 and xz compressed files are decompressed on the fly, '
+         'and record caches written by util/cache_log.py are read as is'
+)
+parser.add_argument(
+    '--workers', type=int, default=1, metavar='N',
+    help='process the log file in N processes'
+)
+parser.add_argument(
+    '--threads', type=int, default=1, metavar='N',
+    help='run stages that do not depend on each other in N threads'
+)
+parser.add_argument(
+    '--assembly-line', action='store_true',
+    help='run every stage in a thread of its own, '
+         'passing batches of records from one to the next'
+)
+parser.add_argument(
+    '--queue-size', type=int, default=4, metavar='N',
+    help='with --assembly-line, how many batches may wait for each stage '
+         'before the stages feeding it are held up'
+)
+parser.add_argument(
+    '--asyncio', type=int, metavar='N',
+    help='run the pipeline on asyncio, with up to N records in flight, '
+         'for pipelines with asynchronous stages'
+)
+parser.add_argument(
+    '--unordered', action='store_true',
+    help='with --workers, write results as soon as a chunk is done, '
+         'instead of in the original order of the records'
+)
+parser.add_argument(
+    '--since', type=time, metavar='TIME',
+    help='only process records logged at or after TIME, '
+         'e.g. "2014/Oct/24 19:16:48" or 2014-10-24T19:16:48'
+)
+parser.add_argument(
+    '--until', type=time, metavar='TIME',
+    help='only process records logged before TIME'
+)
+parser.add_argument(
+    '--follow', action='store_true',
+    help='keep processing records as they are appended to the log file, '
+         'resuming after the last processed record when restarted'
+)
+parser.add_argument(
+    '--checkpoint', metavar='FILE',
+    help='with --follow, where to keep the position in the log file, '
+         'the log file name with a .checkpoint suffix by default'
+)
+parser.add_argument(
+    '--only-sink', action='append', metavar='NAME',
+    help='run only the stage NAME and the stages it depends on, '
+         'instead of every sink of the pipeline; may be given more than once'
+)
+parser.add_argument(
+    '--plan-cache', default=default_cache_directory(), metavar='DIR',
+    help='keep the validated pipeline definitions in DIR, '
+         'so they are not validated again in later runs, '
+         f'{default_cache_directory()} by default'
+)
+parser.add_argument(
+    '--no-plan-cache', action='store_true',
+    help='validate the pipeline definition in every run'
+)
+parser.add_argument(
+    '--profile', action='store_true',
+    help='time every stage, and the reading of the records, '
+         'and print a table of the results to stderr at exit'
+)
+parser.add_argument(
+    '--cprofile', metavar='FILE',
+    help='profile the whole run with cProfile, and save the results to FILE'
+)
+args = parser.parse_args()
 
-for record_lines in gather_records(stdin):
-    record = LogRecord('\n'.join(record_lines))
-    pipeline.process(record)
+if args.cprofile:
+    import atexit
+    import cProfile
+    whole_run = cProfile.Profile()
+    atexit.register(lambda: whole_run.dump_stats(args.cprofile))
+    atexit.register(whole_run.disable)
+    whole_run.enable()
+
+if args.workers < 1:
+    parser.error('--workers must be at least 1')
+if args.threads < 1:
+    parser.error('--threads must be at least 1')
+if args.threads > 1 and args.workers > 1:
+    parser.error('--threads cannot be combined with --workers')
+if args.assembly_line and (args.threads > 1 or args.workers > 1):
+    parser.error('--assembly-line cannot be combined with --threads '
+                 'or --workers')
+if args.queue_size < 1:
+    parser.error('--queue-size must be at least 1')
+if args.profile and args.workers > 1:
+    parser.error('--profile cannot be combined with --workers')
+if args.asyncio is not None and args.asyncio < 1:
+    parser.error('--asyncio must be at least 1')
+if args.asyncio and (
+    args.threads > 1 or args.workers > 1 or args.assembly_line or
+    args.follow
+):
+    parser.error('--asyncio cannot be combined with --threads, --workers, '
+                 '--assembly-line or --follow')
+compressed = args.log is not None and is_compressed(args.log)
+cached = args.log is not None and is_cache(args.log)
+if args.workers > 1 and (not args.log or compressed or cached):
+    parser.error('--workers requires an uncompressed log file')
+if args.follow and (
+    not args.log or compressed or cached or args.workers > 1
+):
+    parser.error('--follow requires an uncompressed log file and one worker')
+if args.follow and args.assembly_line:
+    # Records queued between the stages would be counted as processed
+    # in the checkpoint, and skipped after a restart.
+    parser.error('--follow cannot be combined with --assembly-line')
+time_window = args.since is not None or args.until is not None
+
+try:
+    config = load_configuration(
+        args.pipeline, args.only_sink,
+        None if args.no_plan_cache else args.plan_cache
+    )
+except AssertionError as e:
+    parser.error(f'{args.pipeline}: {e}')
+
+if args.workers > 1:
+    from analyzer.pipeline.parallel import process_file
+    process_file(
+        config, args.log, args.workers, ordered=not args.unordered,
+        since=args.since, until=args.until
+    )
+    exit(0)
+
+profiler = None
+if args.profile:
+    import atexit
+    from analyzer.pipeline.profiling import PipelineProfiler
+    from sys import stderr
+    profiler = PipelineProfiler()
+    atexit.register(profiler.report, stderr)
+
+if args.threads > 1:
+    from analyzer.pipeline.pipeline import ConcurrentPipeline
+    from concurrent.futures import ThreadPoolExecutor
+    pipeline = ConcurrentPipeline(
+        config, ThreadPoolExecutor(args.threads), profiler=profiler
+    )
+elif args.assembly_line:
+    from analyzer.pipeline.pipeline import AssemblyLinePipeline
+    pipeline = AssemblyLinePipeline(
+        config, queue_size=args.queue_size, profiler=profiler
+    )
+elif args.asyncio:
+    from analyzer.pipeline.asynchronous import AsyncPipeline
+    pipeline = AsyncPipeline(
+        config, in_flight=args.asyncio, profiler=profiler
+    )
+else:
+    pipeline = Pipeline(config, profiler=profiler)
+
+
+def run(records):
+    if profiler is not None:
+        records = profiler.read(records)
+
+    if args.asyncio:
+        import asyncio
+        from analyzer.pipeline.asynchronous import read_in_thread
+
+        async def run_async():
+            async for _ in pipeline.process_many(read_in_thread(records)):
+                pass
+
+        asyncio.run(run_async())
+    else:
+        for _ in pipeline.process_many(records):
+            pass
+
+
+if args.follow:
+    from analyzer.logs.follow import Checkpoint, LogFollower
+    from analyzer.logs.index import within
+    follower = LogFollower(
+        args.log, args.checkpoint or Checkpoint.path_for(args.log)
+    )
+    records = within(follower.follow(), args.since, args.until)
+    if profiler is not None:
+        records = profiler.read(records)
+    try:
+        # One at a time, so records are not held back waiting for a batch.
+        for _ in pipeline.process_many(records, batch_size=1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+elif cached:
+    from analyzer.logs.cache import CachedLog
+    from analyzer.logs.index import within
+    with CachedLog(args.log) as log:
+        records = iter(log)
+        if time_window:
+            records = within(records, args.since, args.until)
+        run(records)
+elif args.log and not compressed:
+    from analyzer.logs.mapped import MappedLog
+    with MappedLog(args.log) as log:
+        records = iter(log)
+        if time_window:
+            from analyzer.logs.index import TimestampIndex, records_between
+            records = records_between(
+                log, args.since, args.until,
+                index=TimestampIndex.for_log(args.log)
+            )
+        run(records)
+else:
+    from analyzer.logs.compressed import open_log
+    from analyzer.logs.parsing import scan_records
+    # The standard input is left open for whoever else reads it.
+    with open_log(args.log) if args.log else nullcontext(stdin) as lines:
+        records = scan_records(lines)
+        if time_window:
+            from analyzer.logs.index import within
+            records = within(records, args.since, args.until)
+        run(records)
@@ -0,0 +1,195 @@
+"""
+    This module contains a pipeline running on asyncio,
+    for stages that spend their time waiting for I/O.
+"""
+
+import asyncio
+from collections import deque
+from inspect import iscoroutinefunction
+from itertools import islice
+from typing import (
+    TYPE_CHECKING, AsyncIterable, AsyncIterator, Iterable, List, Optional,
+    Union
+)
+
+from analyzer.logs.record import LogRecord
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.pipeline import Pipeline
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+if TYPE_CHECKING:
+    from analyzer.pipeline.profiling import PipelineProfiler
+
+DEFAULT_IN_FLIGHT = 64
+DEFAULT_READ_SIZE = 1024
+
+
+class AsyncPipeline(Pipeline):
+    """
+        A pipeline that accepts stages with an `async def process`,
+        besides the usual ones.
+
+        Several records are processed at the same time,
+        so while one of them waits for an asynchronous stage,
+        the others can go on.
+        Still, every stage starts processing the records in their order,
+        so plain stages, which are called directly, without a task switch,
+        see the records in the same order as in a serial pipeline.
+
+        `process`, `process_batch` and `process_many` are coroutines here.
+    """
+
+    def __init__(self,
+                 config: PipelineConfiguration,
+                 in_flight: int = DEFAULT_IN_FLIGHT,
+                 profiler: 'PipelineProfiler' = None):
+        assert in_flight > 0, 'At least one record must be in flight.'
+
+        super().__init__(config, profiler)
+        self._in_flight = in_flight
+        self._asynchronous = [
+            _is_asynchronous(stage)
+            for _, stage
+            in self._stages
+        ]
+        # Records start their tasks in order,
+        # so the stages before the first asynchronous one
+        # see them in order without any help.
+        self._first_asynchronous = next(
+            (i for i, asynchronous in enumerate(self._asynchronous)
+             if asynchronous),
+            len(self._stages)
+        )
+
+    async def process(self, record: LogRecord) -> PipelineStageResult:
+        return await self._process(record, None, None)
+
+    async def process_many(self,
+                           records: Union[AsyncIterable[LogRecord],
+                                          Iterable[LogRecord]],
+                           in_flight: int = None
+                           ) -> AsyncIterator[PipelineStageResult]:
+        """
+            Processes up to `in_flight` records at the same time.
+
+            :returns: The combined results of the records, in order.
+        """
+        if in_flight is None:
+            in_flight = self._in_flight
+        assert in_flight > 0, 'At least one record must be in flight.'
+
+        if self._first_asynchronous == len(self._stages):
+            # Nothing to wait for, nothing to gain from tasks.
+            async for record in _iterate(records):
+                yield super().process(record)
+            return
+
+        turns = len(self._stages) - self._first_asynchronous
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        previous = None
+        try:
+            async for record in _iterate(records):
+                started = [loop.create_future() for _ in range(turns)]
+                pending.append(asyncio.ensure_future(
+                    self._process(record, previous, started)
+                ))
+                previous = started
+
+                if len(pending) >= in_flight:
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def process_batch(self,
+                            records: List[LogRecord]
+                            ) -> List[PipelineStageResult]:
+        """
+            Processes the records like `process_many`,
+            rather than a stage at a time, which asynchronous stages lack.
+        """
+        return [result async for result in self.process_many(records)]
+
+    async def _process(self,
+                       record: LogRecord,
+                       previous: Optional[List[asyncio.Future]],
+                       started: Optional[List[asyncio.Future]]
+                       ) -> PipelineStageResult:
+        """
+            :param previous: Resolved when the previous record
+            has started the stage with the same index,
+            counting from the first asynchronous stage.
+            :param started: The same for this record.
+        """
+        results_so_far = PipelineStageResult()
+        try:
+            for i, (name, stage) in enumerate(self._stages):
+                turn = i - self._first_asynchronous
+                if started is not None and turn >= 0:
+                    if previous is not None and not previous[turn].done():
+                        await previous[turn]
+                    started[turn].set_result(None)
+
+                accepts = self._preconditions.get(name)
+                if accepts is not None and not accepts(record, results_so_far):
+                    continue
+                try:
+                    stage_results = stage.process(record, results_so_far)
+                    if self._asynchronous[i]:
+                        stage_results = await stage_results
+                except Exception as e:
+                    raise Exception(f'stage {name}: {str(e)}')
+                results_so_far = results_so_far.merge(stage_results)
+        finally:
+            # Do not hold up the next record if this one failed.
+            for future in started or ():
+                if not future.done():
+                    future.set_result(None)
+
+        return results_so_far
+
+
+async def read_in_thread(records: Iterable[LogRecord],
+                         read_size: int = DEFAULT_READ_SIZE
+                         ) -> AsyncIterator[LogRecord]:
+    """
+        Reads records from a blocking source without blocking the event loop:
+        `read_size` records at a time are read in the default executor,
+        the next ones while the current ones are being processed.
+    """
+    loop = asyncio.get_running_loop()
+    records = iter(records)
+
+    def read() -> List[LogRecord]:
+        return [*islice(records, read_size)]
+
+    upcoming = loop.run_in_executor(None, read)
+    while True:
+        batch = await upcoming
+        if not batch:
+            return
+        upcoming = loop.run_in_executor(None, read)
+        for record in batch:
+            yield record
+
+
+def _is_asynchronous(stage: PipelineStage) -> bool:
+    from analyzer.pipeline.profiling import ProfiledStage
+    if isinstance(stage, ProfiledStage):
+        stage = stage.stage
+    return iscoroutinefunction(stage.process)
+
+
+async def _iterate(records: Union[AsyncIterable[LogRecord],
+                                  Iterable[LogRecord]]
+                   ) -> AsyncIterator[LogRecord]:
+    if hasattr(records, '__aiter__'):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
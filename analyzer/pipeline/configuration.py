@@ -3,11 +3,11 @@
     a log processing pipeline.
 """
 
-from typing import Dict, Iterable
+from typing import Dict, Iterable, List, Mapping
 
 from analyzer.pipeline.stage import PipelineStage, PipelineStageResult  # noqa F401
 
-from analyzer.util import topological_sort
+from analyzer.util import topological_layers, topological_sort
 
 
 # We are not reusing PipelineStage,
@@ -18,27 +18,66 @@ class PipelineStageDefiniton:
                  module: str,
                  klass: str,
                  name: str,
-                 dependencies: Iterable[str]):
+                 dependencies: Iterable[str],
+                 options: Dict[str, object] = None):
 
         self.module = module
         self.klass = klass
         self.name = name
         self.dependencies = dependencies
+        # Keyword arguments of the stage.
+        self.options = options or {}
 
 
 class PipelineConfiguration:
     """
         This class represents a parsed and validated pipeline configuration.
+
+        Only the stages needed by the sinks of the pipeline are kept:
+        the sinks themselves, and the stages they depend on,
+        directly or through other stages.
+        Sinks are the stages marked with `sink: true`,
+        or if there are none, the stages no other stage depends on,
+        which keeps every stage.
+
+        Stages are instantiated with the mapping under their `options` key,
+        if any, as keyword arguments.
     """
-    EXPECTED_STAGE_KEYS = ('module', 'class', 'depends_on')
+    EXPECTED_STAGE_KEYS = ('module', 'class', 'depends_on', 'sink', 'options')
 
-    def __init__(self, stages: Dict[str, dict]):
+    def __init__(self,
+                 stages: Dict[str, dict],
+                 sinks: Iterable[str] = None):
+        """
+            :param sinks: The names of the stages to use as sinks,
+            instead of the ones marked or inferred from the configuration.
+        """
         assert stages, 'A pipeline must have at least one stage'
 
         all_names = stages.keys()
         unique_names = set(all_names)
         assert all_names == unique_names, 'All stages must have unique names'
 
+        if sinks is None:
+            sinks = _marked_sinks(stages) or _inferred_sinks(stages)
+        sinks = [*sinks]
+        assert sinks, 'A pipeline must have at least one sink'
+        for sink in sinks:
+            assert sink in stages, f'No stage named {sink}'
+        self._sinks = sinks
+
+        # Stages that are not needed are not even imported,
+        # so they cannot fail the validation either.
+        needed = set(topological_sort(sinks, lambda name: _depends_on(
+            stages.get(name, {})
+        )))
+        stages = {
+            stage: config
+            for stage, config
+            in stages.items()
+            if stage in needed
+        }
+
         errors = []
         validated = []
         for stage, config in stages.items():
@@ -50,18 +89,36 @@ class PipelineConfiguration:
                 module=config['module'],
                 klass=config['class'],
                 name=stage,
-                dependencies=config.get('depends_on', [])
+                dependencies=config.get('depends_on', []),
+                options=config.get('options')
             ))
 
         if errors:
             raise Exception(errors)
         self._stages = validated
 
+    @classmethod
+    def from_validated(cls,
+                       stages: List[PipelineStageDefiniton],
+                       sinks: List[str]) -> 'PipelineConfiguration':
+        """
+            Restores a configuration validated before,
+            see `analyzer.pipeline.plan`, without validating it again.
+        """
+        config = cls.__new__(cls)
+        config._stages = stages
+        config._sinks = sinks
+        return config
+
     @property
     def stages(self) -> Dict[str, PipelineStage]:
         from copy import deepcopy
         return deepcopy(self._stages)
 
+    @property
+    def sinks(self) -> List[str]:
+        return [*self._sinks]
+
     @staticmethod
     def is_stage_config_valid(c: Dict[str, dict]) -> Iterable[str]:
         def ensure_target_is_stage() -> Iterable[str]:
@@ -71,11 +128,15 @@ class PipelineConfiguration:
             for config_key in c:
                 assert config_key in PipelineConfiguration.EXPECTED_STAGE_KEYS
 
+            options = c.get('options') or {}
+            if not isinstance(options, Mapping):
+                return [f'{mod}.{cls}: options must be a mapping']
+
             try:
                 from analyzer.util import import_from
                 stage_t = import_from(mod, cls)
-                stage = stage_t()
-                assert isinstance(stage, PipelineStage)
+                # Instantiated only by the pipeline, once.
+                assert issubclass(stage_t, PipelineStage)
             except Exception as e:
                 return [f'{mod}.{cls}: Not a PipelineStage: {str(e)}']
 
@@ -91,12 +152,41 @@ class PipelineConfiguration:
         ]
 
     def stages_in_order(self):
-        def get_dependencies(stage):
-            return [
-                dep
-                for dep
-                in self._stages
-                if dep.name in stage.dependencies
-            ]
-
-        return topological_sort(self._stages, get_dependencies)
+        return topological_sort(self._stages, self._get_dependencies)
+
+    def stages_in_layers(self):
+        """
+            The stages in the order of `stages_in_order`,
+            grouped into layers of stages that do not depend on each other.
+        """
+        return topological_layers(self._stages, self._get_dependencies)
+
+    def _get_dependencies(self, stage):
+        return [
+            dep
+            for dep
+            in self._stages
+            if dep.name in stage.dependencies
+        ]
+
+
+def _depends_on(config: dict) -> List[str]:
+    dependencies = config.get('depends_on', [])
+    if isinstance(dependencies, str):
+        return [dependencies]
+    return dependencies
+
+
+def _marked_sinks(stages: Dict[str, dict]) -> List[str]:
+    return [stage for stage, config in stages.items() if config.get('sink')]
+
+
+def _inferred_sinks(stages: Dict[str, dict]) -> List[str]:
+    dependencies = {
+        dependency
+        for config
+        in stages.values()
+        for dependency
+        in _depends_on(config)
+    }
+    return [stage for stage in stages if stage not in dependencies]
@@ -0,0 +1,127 @@
+"""
+    This module contains a multi-process driver for the pipeline,
+    that splits a log file into chunks of records
+    and runs an independent pipeline over each chunk.
+"""
+
+from io import StringIO
+from typing import Iterator, List, TextIO, Tuple
+
+from analyzer.logs.index import TimestampIndex, records_between
+from analyzer.logs.mapped import MappedLog
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.pipeline import Pipeline
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def chunk_ranges(path: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 start: int = 0,
+                 end: int = None) -> List[Tuple[int, int]]:
+    """
+        Splits a log file, or the `[start, end)` byte range of it,
+        into ranges of roughly `chunk_size` bytes.
+        Every range begins at a record header,
+        and every record that begins within the split range
+        belongs to exactly one of the resulting ranges.
+    """
+    assert chunk_size > 0, 'Chunk size must be positive.'
+
+    with MappedLog(path) as log:
+        size = len(log) if end is None else min(end, len(log))
+        first = next(log.headers(start), None)
+        if first is None or first[0] >= size:
+            return []
+
+        starts = [first[0]]
+        for target in range(starts[0] + chunk_size, size, chunk_size):
+            if target <= starts[-1]:
+                continue
+            header = next(log.headers(target), None)
+            if header is None or header[0] >= size:
+                break
+            starts.append(header[0])
+
+    return [*zip(starts, [*starts[1:], size])]
+
+
+def process_file(config: PipelineConfiguration,
+                 path: str,
+                 workers: int,
+                 ordered: bool = True,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 output: TextIO = None,
+                 since: int = None,
+                 until: int = None):
+    """
+        Runs the pipeline over a log file in `workers` processes.
+
+        Each process builds its own `Pipeline` from `config`.
+        Whatever the stages print to the standard output
+        is collected per chunk and written to `output`,
+        either in the original order of the records,
+        or in the order the chunks are finished if `ordered` is False.
+
+        Only the records with timestamps within `[since, until)`
+        are processed, see `analyzer.logs.index.records_between`.
+    """
+    if output is None:
+        from sys import stdout as output
+
+    for text in process_chunks(
+        config, path, workers, ordered, chunk_size, since, until
+    ):
+        output.write(text)
+
+
+def process_chunks(config: PipelineConfiguration,
+                   path: str,
+                   workers: int,
+                   ordered: bool = True,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   since: int = None,
+                   until: int = None) -> Iterator[str]:
+    """
+        Same as `process_file`, but yields the output of every chunk.
+    """
+    from multiprocessing import Pool
+    assert workers > 0, 'Must have at least one worker.'
+
+    start, end = 0, None
+    if since is not None or until is not None:
+        start, end = TimestampIndex.for_log(path).window(since, until)
+
+    chunks = [
+        (path, chunk_start, chunk_end, since, until)
+        for chunk_start, chunk_end
+        in chunk_ranges(path, chunk_size, start, end)
+    ]
+
+    with Pool(workers, initializer=_initialize, initargs=(config,)) as pool:
+        run = pool.imap if ordered else pool.imap_unordered
+        yield from run(_process_chunk, chunks)
+
+
+# One pipeline per worker process, built by the pool initializer.
+_pipeline = None
+
+
+def _initialize(config: PipelineConfiguration):
+    global _pipeline
+    _pipeline = Pipeline(config)
+
+
+def _process_chunk(chunk: Tuple[str, int, int, int, int]) -> str:
+    from contextlib import redirect_stdout
+    path, start, end, since, until = chunk
+
+    output = StringIO()
+    with redirect_stdout(output), MappedLog(path) as log:
+        records = records_between(
+            log, since, until, start=start, end=end
+        )
+        for _ in _pipeline.process_many(records):
+            pass
+
+    return output.getvalue()
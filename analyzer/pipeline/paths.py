@@ -0,0 +1,167 @@
+"""
+    This module contains projections: paths into structured data,
+    like `hu.analyzer.sdata.data.connOpened.remPort`
+    or `aspsSip[*].aspRequest`, that stages declare once,
+    compiled into functions reading what they lead to.
+
+    Reading a path never adds anything to the data it reads,
+    what is not there is read as a default value.
+"""
+
+import re
+from collections.abc import Sequence
+from typing import Callable, Collection, List, Optional, Union
+
+# A key, after a dot unless it is the first one
+# (`^` only matches at the start of the path, wherever the match starts),
+# or the index of an item of a list, or `*` for every item.
+_STEP = re.compile(r'(?:^|\.)([^.\[\]]+)|\[(\*|-?\d+)\]')
+
+# What the compiled steps read where there is nothing.
+_MISSING = object()
+
+# A key, an index, or None for every item of a list.
+Step = Union[str, int, None]
+Getter = Callable[[object], object]
+
+
+class Projection:
+    """
+        A path into structured data,
+        e.g. into the `structured` data of a `PipelineStageResult`.
+
+        A path is a key, followed by more keys after dots,
+        and indices of items of lists between brackets.
+        `[*]` reads the rest of the path from every item of a list,
+        and makes a list of what could be read.
+
+        The keys of the results of the stages have dots in them,
+        so the first key of a path is the longest of `roots`
+        the path starts with, if any.
+    """
+
+    __slots__ = ('path', 'steps', '_get')
+
+    def __init__(self, path: str, roots: Collection[str] = ()):
+        self.path = path
+        self.steps = parse_path(path, roots)
+        self._get = _compile(self.steps)
+
+    def __call__(self, data: object, default: object = None) -> object:
+        value = self._get(data)
+        return default if value is _MISSING else value
+
+    def exists(self, data: object) -> bool:
+        return self._get(data) is not _MISSING
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r})'
+
+
+def parse_path(path: str, roots: Collection[str] = ()) -> List[Step]:
+    """
+        The keys, indices, and None for `[*]`, in `path`,
+        see `Projection`.
+    """
+    assert not path.startswith('.'), f'Invalid path: {path}'
+    steps: List[Step] = []
+    seek = 0
+    for root in sorted(roots, key=len, reverse=True):
+        if path.startswith(root) and path[len(root):len(root) + 1] in '.[':
+            steps.append(root)
+            seek = len(root)
+            break
+
+    while seek < len(path):
+        match = _STEP.match(path, seek)
+        assert match, f'Invalid path: {path}'
+        key, index = match.groups()
+        if key is not None:
+            steps.append(key)
+        elif index == '*':
+            steps.append(None)
+        else:
+            steps.append(int(index))
+        seek = match.end()
+
+    assert steps, 'A path must have at least one key.'
+    return steps
+
+
+def _compile(steps: List[Step]) -> Getter:
+    """
+        Every step reads from what the one before it has read,
+        and passes what it reads to the next one, if there is any.
+        Keys one after the other are read by the same step.
+    """
+    then: Optional[Getter] = None
+    keys: List[str] = []
+    for step in reversed(steps):
+        if isinstance(step, str):
+            keys.insert(0, step)
+            continue
+        if keys:
+            then = _keys(keys, then)
+            keys = []
+        if step is None:
+            then = _every(then)
+        else:
+            then = _index(step, then)
+    if keys:
+        then = _keys(keys, then)
+    return then
+
+
+def _keys(keys: List[str], then: Optional[Getter]) -> Getter:
+    keys = tuple(keys)
+
+    def get(data):
+        for key in keys:
+            # Raising for everything that is not a mapping,
+            # e.g. for None, would cost more than the lookup.
+            lookup = getattr(data, 'get', None)
+            if lookup is None:
+                return _MISSING
+            data = lookup(key, _MISSING)
+            if data is _MISSING:
+                return data
+        return data if then is None else then(data)
+
+    return get
+
+
+def _is_list(data: object) -> bool:
+    # Lists and tuples, `FrozenList`s among them, skip the slower checks.
+    return isinstance(data, (list, tuple)) or (
+        isinstance(data, Sequence) and not isinstance(data, (str, bytes))
+    )
+
+
+def _index(index: int, then: Optional[Getter]) -> Getter:
+    def get(data):
+        if not _is_list(data):
+            return _MISSING
+        try:
+            data = data[index]
+        except IndexError:
+            return _MISSING
+        return data if then is None else then(data)
+
+    return get
+
+
+def _every(then: Optional[Getter]) -> Getter:
+    def get(data):
+        if not _is_list(data):
+            return _MISSING
+        if then is None:
+            return [*data]
+
+        found = []
+        for item in data:
+            value = then(item)
+            if value is not _MISSING:
+                found.append(value)
+        return found
+
+    return get
@@ -0,0 +1,130 @@
+"""
+    This module contains a registry of the regular expressions
+    stages search the content of the records with.
+
+    Stages register their patterns when their module is imported,
+    compiled once, and the registry remembers what each of them
+    has found in the content of recent records,
+    so a pattern several stages ask for is searched for only once
+    in each record.
+"""
+
+import re
+from sys import getsizeof
+from threading import Lock
+from typing import Dict, Match, Optional, Pattern
+
+from analyzer.logs.record import LogRecord
+from analyzer.util import LRUCache
+
+# Bytes of contents, and of what was found in them, the registry keeps.
+# Enough for the batches of every stage of a busy assembly line.
+DEFAULT_CACHE_SIZE = 32 * 1024 * 1024
+# Bytes of what was found in a content besides the content itself:
+# the dict, and the few matches in it.
+FOUND_SIZE = 1024
+
+
+class ContentPattern:
+    """
+        A pattern registered with a `PatternRegistry`.
+    """
+
+    __slots__ = ('registry', 'index', 'name', 'regex')
+
+    def __init__(self,
+                 registry: 'PatternRegistry',
+                 index: int,
+                 name: str,
+                 regex: Pattern):
+        self.registry = registry
+        self.index = index
+        self.name = name
+        self.regex = regex
+
+    def search(self, record: LogRecord) -> Optional[Match]:
+        """
+            The same as `self.regex.search(record.content)`.
+        """
+        return self.registry.search(self, record.content)
+
+
+class PatternRegistry:
+    """
+        Named patterns, and what they have found in recent records.
+
+        What was found is kept for recently searched contents,
+        up to `cache_size` bytes of them, see `found_size`,
+        so the stages processing a batch of records one after the other
+        share the results.
+        Contents are used as keys, records are never kept,
+        so neither are the files they are read from.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        assert cache_size > 0, 'Cache size must be positive.'
+
+        self._patterns: Dict[str, ContentPattern] = {}
+        self._found = LRUCache(cache_size, found_size)
+        self._lock = Lock()
+
+    def register(self,
+                 name: str,
+                 pattern: str,
+                 flags: int = 0) -> ContentPattern:
+        """
+            Registering the same name with the same pattern again
+            returns the pattern registered first.
+        """
+        regex = re.compile(pattern, flags)
+        with self._lock:
+            registered = self._patterns.get(name)
+            if registered is not None:
+                assert registered.regex == regex, \
+                    f'Another pattern is registered as {name}.'
+                return registered
+
+            registered = ContentPattern(
+                self, len(self._patterns), name, regex
+            )
+            self._patterns[name] = registered
+            return registered
+
+    def __getitem__(self, name: str) -> ContentPattern:
+        return self._patterns[name]
+
+    def clear(self):
+        """
+            Forgets what the patterns have found.
+        """
+        self._found = LRUCache(self._found.budget, found_size)
+
+    def search(self,
+               pattern: ContentPattern,
+               content: str) -> Optional[Match]:
+        remembered = self._found
+        found = remembered.get(content)
+        if found is None:
+            found = {}
+            remembered.put(content, found)
+
+        index = pattern.index
+        if index not in found:
+            found[index] = pattern.regex.search(content)
+        return found[index]
+
+
+def found_size(content: str, found: Dict[int, Optional[Match]]) -> int:
+    """
+        The bytes a content, and what was found in it, take up,
+        for the cache of a `PatternRegistry`.
+    """
+    return getsizeof(content) + FOUND_SIZE
+
+
+# The patterns of the stages of the analyzer.
+CONTENT_PATTERNS = PatternRegistry()
+
+
+def register(name: str, pattern: str, flags: int = 0) -> ContentPattern:
+    return CONTENT_PATTERNS.register(name, pattern, flags)
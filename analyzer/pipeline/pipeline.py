@@ -4,36 +4,392 @@
     that may be used in a streaming manner.
 """
 
+from itertools import islice
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional
+)
+
 from analyzer.logs.record import LogRecord
 from analyzer.pipeline.configuration import PipelineConfiguration
-from analyzer.pipeline.stage import PipelineStageResult
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from analyzer.pipeline.profiling import PipelineProfiler
+
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_QUEUE_SIZE = 4
+
+# Whether a stage has any work with a record,
+# given the combined results of the stages before it.
+Precondition = Callable[[LogRecord, PipelineStageResult], bool]
+
+# Results are immutable, so records that skip a stage can share one.
+_NOTHING = PipelineStageResult()
 
 
 class Pipeline:
-    def __init__(self, config: PipelineConfiguration):
+    def __init__(self,
+                 config: PipelineConfiguration,
+                 profiler: 'PipelineProfiler' = None):
+        """
+            :param profiler: If given, the calls of every stage are counted
+            and timed, see `analyzer.pipeline.profiling`.
+        """
         from analyzer.util import import_from
         self._configuration = config
-        stages = []
+        layers = []
+        # The dispatch plan: the precondition of every stage that has one.
+        self._preconditions = {}
 
-        for stage_def in self._configuration.stages_in_order():
-            stage = import_from(stage_def.module, stage_def.klass)
-            stages.append((stage_def.name, stage()))
+        for layer in self._configuration.stages_in_layers():
+            stages = []
+            for stage_def in layer:
+                try:
+                    stage = import_from(stage_def.module, stage_def.klass)(
+                        **stage_def.options
+                    )
+                except Exception as e:
+                    raise Exception(f'stage {stage_def.name}: {str(e)}')
+                accepts = precondition(stage)
+                if accepts is not None:
+                    self._preconditions[stage_def.name] = accepts
+                if profiler is not None:
+                    stage = profiler.instrument(stage_def.name, stage)
+                stages.append((stage_def.name, stage))
+            layers.append(stages)
 
-        self._stages = stages
+        self._layers = layers
+        self._stages = [stage for layer in layers for stage in layer]
 
     def process(self, record: LogRecord) -> PipelineStageResult:
         results_so_far = PipelineStageResult()
+        preconditions = self._preconditions
         for (name, stage) in self._stages:
+            accepts = preconditions.get(name)
+            if accepts is not None and not accepts(record, results_so_far):
+                continue
             try:
                 stage_results = stage.process(record, results_so_far)
-                results_so_far = PipelineStageResult(
-                    tags=[*results_so_far.tags, *stage_results.tags],
-                    structured={
-                        **results_so_far.structured,
-                        **stage_results.structured
-                    }
-                )
+                results_so_far = results_so_far.merge(stage_results)
             except Exception as e:
                 raise Exception(f'stage {name}: {str(e)}')
 
         return results_so_far
+
+    def process_many(self,
+                     records: Iterable[LogRecord],
+                     batch_size: int = DEFAULT_BATCH_SIZE
+                     ) -> Iterator[PipelineStageResult]:
+        """
+            Processes records `batch_size` at a time,
+            passing each batch through the stages with `process_batch`.
+
+            Every stage sees the records in order,
+            but a stage gets the whole batch before the next one does.
+
+            :returns: The combined results of the records, in order.
+        """
+        assert batch_size > 0, 'Batch size must be positive.'
+
+        records = iter(records)
+        while True:
+            batch = [*islice(records, batch_size)]
+            if not batch:
+                return
+            yield from self.process_batch(batch)
+
+    def process_batch(self,
+                      records: List[LogRecord]) -> List[PipelineStageResult]:
+        states = [PipelineStageResult()] * len(records)
+        for (name, stage) in self._stages:
+            stage_results = _process_stage_batch(
+                name, stage, records, states, self._preconditions.get(name)
+            )
+            states = merge_results(states, stage_results)
+
+        return states
+
+
+class ConcurrentPipeline(Pipeline):
+    """
+        A pipeline that runs stages that do not depend on each other
+        at the same time, in the threads or processes of `executor`.
+
+        Stages get the combined results of every stage before their layer,
+        see `PipelineConfiguration.stages_in_layers`,
+        which includes everything they depend on,
+        but not necessarily every stage the serial pipeline runs before them.
+        The results of a layer are merged in the order
+        the serial pipeline would have merged them,
+        so the final results are the same.
+
+        With a process pool, stages and records are pickled for every call,
+        so stages cannot keep state between records.
+    """
+
+    def __init__(self,
+                 config: PipelineConfiguration,
+                 executor: 'Executor',
+                 profiler: 'PipelineProfiler' = None):
+        super().__init__(config, profiler)
+        self._executor = executor
+
+    def process(self, record: LogRecord) -> PipelineStageResult:
+        return self.process_batch([record])[0]
+
+    def process_batch(self,
+                      records: List[LogRecord]) -> List[PipelineStageResult]:
+        states = [PipelineStageResult()] * len(records)
+        for layer in self._layers:
+            if len(layer) == 1:
+                (name, stage), = layer
+                layer_results = [_process_stage_batch(
+                    name, stage, records, states,
+                    self._preconditions.get(name)
+                )]
+            else:
+                futures = [
+                    self._executor.submit(
+                        _process_stage_batch, name, stage, records, states,
+                        self._preconditions.get(name)
+                    )
+                    for name, stage
+                    in layer
+                ]
+                layer_results = [future.result() for future in futures]
+
+            for stage_results in layer_results:
+                states = merge_results(states, stage_results)
+
+        return states
+
+
+class AssemblyLinePipeline(Pipeline):
+    """
+        A pipeline that runs every `stages_per_worker` consecutive stages
+        in a thread of their own, connected by queues,
+        so different batches of records are processed by different stages
+        at the same time.
+
+        Each queue holds at most `queue_size` batches.
+        When a stage falls behind, the stages before it wait for room,
+        and so does the thread reading the records in the end,
+        so no more than a few batches are held in memory at any time.
+
+        Every stage still sees the records in order,
+        with the results of every stage before it.
+    """
+
+    def __init__(self,
+                 config: PipelineConfiguration,
+                 stages_per_worker: int = 1,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 profiler: 'PipelineProfiler' = None):
+        assert stages_per_worker > 0, 'Workers must run at least one stage.'
+        assert queue_size > 0, 'Queue size must be positive.'
+
+        super().__init__(config, profiler)
+        self._groups = [
+            self._stages[i:i + stages_per_worker]
+            for i
+            in range(0, len(self._stages), stages_per_worker)
+        ]
+        self._queue_size = queue_size
+
+    def process_many(self,
+                     records: Iterable[LogRecord],
+                     batch_size: int = DEFAULT_BATCH_SIZE
+                     ) -> Iterator[PipelineStageResult]:
+        assert batch_size > 0, 'Batch size must be positive.'
+
+        queues = [Queue(self._queue_size) for _ in range(len(self._groups))]
+        queues.append(Queue(self._queue_size))
+        stopped = Event()
+
+        threads = [Thread(
+            target=_feed_batches,
+            args=(records, batch_size, queues[0], stopped),
+            daemon=True
+        )]
+        for group, inbox, outbox in zip(self._groups, queues, queues[1:]):
+            threads.append(Thread(
+                target=_run_stages,
+                args=(group, self._preconditions, inbox, outbox, stopped),
+                daemon=True
+            ))
+
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                _, states = item
+                yield from states
+        finally:
+            # Workers notice this while waiting on their queues,
+            # if the results are not wanted anymore.
+            stopped.set()
+
+
+# Marks the end of the records in the queues of an assembly line.
+_END = object()
+
+
+def _feed_batches(records: Iterable[LogRecord],
+                  batch_size: int,
+                  outbox: Queue,
+                  stopped: Event):
+    try:
+        records = iter(records)
+        while True:
+            batch = [*islice(records, batch_size)]
+            if not batch:
+                break
+            states = [PipelineStageResult()] * len(batch)
+            if not _put(outbox, (batch, states), stopped):
+                return
+        _put(outbox, _END, stopped)
+    except Exception as e:
+        _put(outbox, e, stopped)
+
+
+def _run_stages(stages: List[tuple],
+                preconditions: Dict[str, Precondition],
+                inbox: Queue,
+                outbox: Queue,
+                stopped: Event):
+    while True:
+        item = _get(inbox, stopped)
+        if item is None:
+            return
+        if item is _END or isinstance(item, BaseException):
+            _put(outbox, item, stopped)
+            return
+
+        records, states = item
+        try:
+            for (name, stage) in stages:
+                stage_results = _process_stage_batch(
+                    name, stage, records, states, preconditions.get(name)
+                )
+                states = merge_results(states, stage_results)
+        except Exception as e:
+            _put(outbox, e, stopped)
+            return
+
+        if not _put(outbox, (records, states), stopped):
+            return
+
+
+def _put(queue: Queue, item, stopped: Event) -> bool:
+    while not stopped.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _get(queue: Queue, stopped: Event):
+    while not stopped.is_set():
+        try:
+            return queue.get(timeout=0.1)
+        except Empty:
+            continue
+    return None
+
+
+def _process_stage_batch(name: str,
+                         stage: PipelineStage,
+                         records: List[LogRecord],
+                         states: List[PipelineStageResult],
+                         accepts: Precondition = None
+                         ) -> List[PipelineStageResult]:
+    """
+        :param accepts: The precondition of the stage, if any.
+        Only the records that satisfy it are passed to the stage,
+        the others get an empty result.
+    """
+    if accepts is not None:
+        selected = [
+            i
+            for i, (record, state)
+            in enumerate(zip(records, states))
+            if accepts(record, state)
+        ]
+        if len(selected) < len(records):
+            results = [_NOTHING] * len(records)
+            if selected:
+                stage_results = _process_stage_batch(
+                    name, stage,
+                    [records[i] for i in selected],
+                    [states[i] for i in selected]
+                )
+                for i, result in zip(selected, stage_results):
+                    results[i] = result
+            return results
+
+    try:
+        stage_results = stage.process_batch(records, states)
+        assert len(stage_results) == len(records), \
+            'Must return a result for every record.'
+        return stage_results
+    except Exception as e:
+        raise Exception(f'stage {name}: {str(e)}')
+
+
+def precondition(stage: PipelineStage) -> Optional[Precondition]:
+    """
+        Compiles the requirements a stage declares,
+        see `PipelineStage`, into a single function,
+        that tells whether a record with the given results
+        of the previous stages satisfies them.
+
+        :returns: None if the stage has no requirements.
+    """
+    tags = tuple(stage.requires_tags)
+    keys = tuple(stage.requires_structured)
+    event_types = frozenset(stage.requires_event_types)
+    applications = frozenset(stage.requires_applications)
+    if not (tags or keys or event_types or applications):
+        return None
+
+    def accepts(record: LogRecord, state: PipelineStageResult) -> bool:
+        if tags:
+            state_tags = state.tags
+            for tag in tags:
+                if tag not in state_tags:
+                    return False
+        if keys:
+            structured = state.structured
+            for key in keys:
+                if key not in structured:
+                    return False
+        return (
+            (not event_types or record.event_type in event_types)
+            and (not applications or record.application in applications)
+        )
+
+    return accepts
+
+
+def merge_results(states: List[PipelineStageResult],
+                  stage_results: List[PipelineStageResult]
+                  ) -> List[PipelineStageResult]:
+    """
+        The results of the stages run so far, for every record,
+        merged with the results of the next stage.
+    """
+    return [
+        state.merge(stage_result)
+        for state, stage_result
+        in zip(states, stage_results)
+    ]
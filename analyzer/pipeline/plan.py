@@ -0,0 +1,163 @@
+"""
+    This module contains a cache of validated pipeline configurations,
+    so the many short runs of the command line tool
+    neither parse the same YAML file, nor validate its stages, every time.
+
+    A plan is stored under the hash of the pipeline definition
+    and the selected sinks, together with the size and modification time
+    of every module its stages are imported from or defined in.
+    If any of those modules has changed since, the plan is validated again.
+"""
+
+import json
+import os
+import sys
+from hashlib import sha256
+from typing import Dict, Iterable, List, Optional
+
+from analyzer.pipeline.configuration import (
+    PipelineConfiguration, PipelineStageDefiniton
+)
+
+# Changes whenever the format of the plans does.
+PLAN_VERSION = 3
+
+
+def default_cache_directory() -> str:
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(cache, 'log-analyzer', 'plans')
+
+
+def load_configuration(path: str,
+                       sinks: Iterable[str] = None,
+                       cache_directory: str = None) -> PipelineConfiguration:
+    """
+        Loads a pipeline definition from a YAML file,
+        or the plan validated from it before, if it is still valid.
+
+        :param sinks: See `PipelineConfiguration`.
+        :param cache_directory: Where plans are kept,
+        plans are not used if None.
+    """
+    with open(path, 'rb') as f:
+        definition = f.read()
+    if sinks is not None:
+        sinks = [*sinks]
+
+    plan_path = None
+    if cache_directory is not None:
+        key = sha256(json.dumps([PLAN_VERSION, sinks]).encode())
+        key.update(definition)
+        plan_path = os.path.join(cache_directory, f'{key.hexdigest()}.json')
+        config = _load_plan(plan_path)
+        if config is not None:
+            return config
+
+    config = PipelineConfiguration(parse_definition(definition), sinks)
+
+    if plan_path is not None:
+        _save_plan(plan_path, config)
+    return config
+
+
+def parse_definition(definition: bytes) -> Dict[str, dict]:
+    """
+        The stages of a pipeline definition in YAML,
+        as `PipelineConfiguration` takes them:
+        a single stage `depends_on` is given as a list of it.
+    """
+    import yaml
+    stages = yaml.safe_load(definition)
+    for config in stages.values():
+        if isinstance(config.get('depends_on'), str):
+            config['depends_on'] = [config['depends_on']]
+    return stages
+
+
+def _load_plan(path: str) -> Optional[PipelineConfiguration]:
+    try:
+        with open(path) as f:
+            plan = json.load(f)
+
+        for file, fingerprint in plan['modules'].values():
+            if _fingerprint(file) != fingerprint:
+                return None
+
+        return PipelineConfiguration.from_validated(
+            [
+                PipelineStageDefiniton(
+                    module=stage['module'],
+                    klass=stage['class'],
+                    name=stage['name'],
+                    dependencies=stage['depends_on'],
+                    options=stage['options']
+                )
+                for stage
+                in plan['stages']
+            ],
+            plan['sinks']
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        # Unreadable, or written by something else: validated again.
+        return None
+
+
+def _save_plan(path: str, config: PipelineConfiguration):
+    stages = config.stages
+    # Validation has imported all of them.
+    # Classes may be re-exported by a package, like the application stages,
+    # so the modules that define them are checked too.
+    modules = set()
+    for stage in stages:
+        modules.add(stage.module)
+        stage_t = getattr(sys.modules[stage.module], stage.klass)
+        modules.add(stage_t.__module__)
+    files = {
+        name: getattr(sys.modules[name], '__file__', None)
+        for name
+        in modules
+    }
+    plan = {
+        'stages': [
+            {
+                'name': stage.name,
+                'module': stage.module,
+                'class': stage.klass,
+                'depends_on': [*stage.dependencies],
+                'options': stage.options,
+            }
+            for stage
+            in stages
+        ],
+        'sinks': config.sinks,
+        'modules': {
+            name: [file, _fingerprint(file)]
+            for name, file
+            in files.items()
+        },
+    }
+
+    # Written under another name first,
+    # so concurrent runs never read half of a plan.
+    try:
+        serialized = json.dumps(plan)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}'
+        with open(temporary, 'w') as f:
+            f.write(serialized)
+        os.replace(temporary, path)
+    except (OSError, TypeError, ValueError):
+        # Options JSON cannot hold are validated every time.
+        pass
+
+
+def _fingerprint(path: Optional[str]) -> Optional[List[int]]:
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [-1]
+    return [stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,181 @@
+"""
+    This module contains the tools to find out
+    where a pipeline spends its time.
+
+    Stages are only wrapped in a `ProfiledStage` if profiling was asked for,
+    so a pipeline that is not profiled runs exactly the same code as before.
+"""
+
+from inspect import isawaitable
+from math import log2
+from time import perf_counter_ns
+from typing import Dict, Iterable, Iterator, TextIO
+
+from analyzer.logs.record import LogRecord
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+# Latencies are counted in buckets 2^(1/8) apart, about 9% wide,
+# so percentiles are approximate, but memory use does not grow.
+_BUCKETS_PER_OCTAVE = 8
+
+PERCENTILES = (50, 90, 99)
+
+READING = 'reading'
+
+
+class Profile:
+    """
+        Statistics of the calls of a single stage.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.non_empty = 0
+        self.errors = 0
+        self.total_ns = 0
+        self._buckets: Dict[int, int] = {}
+
+    def add(self, elapsed_ns: int):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        bucket = int(log2(max(elapsed_ns, 1)) * _BUCKETS_PER_OCTAVE)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    def percentile(self, p: float) -> float:
+        """
+            The latency of a single call in nanoseconds,
+            that `p` percent of the calls did not exceed.
+        """
+        if not self.calls:
+            return 0.0
+
+        wanted = self.calls * p / 100
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= wanted:
+                break
+        return 2 ** ((bucket + 1) / _BUCKETS_PER_OCTAVE)
+
+
+class ProfiledStage(PipelineStage):
+    """
+        Stands in for a stage of a profiled pipeline,
+        counting and timing its calls.
+
+        Batches are passed to `process` a record at a time,
+        instead of the `process_batch` of the stage,
+        so the latency of every record is timed on its own.
+    """
+
+    def __init__(self, stage: PipelineStage, profile: Profile):
+        self.stage = stage
+        self.profile = profile
+
+    def process(self,
+                record: LogRecord,
+                state: PipelineStageResult = None) -> PipelineStageResult:
+        started = perf_counter_ns()
+        try:
+            result = self.stage.process(record, state)
+        except Exception:
+            self.profile.errors += 1
+            raise
+
+        if isawaitable(result):
+            return self._awaited(result, started)
+
+        self.profile.add(perf_counter_ns() - started)
+        if result:
+            self.profile.non_empty += 1
+        return result
+
+    def statistics(self) -> Dict[str, int]:
+        return self.stage.statistics()
+
+    async def _awaited(self, result, started: int) -> PipelineStageResult:
+        # The time spent waiting counts too,
+        # even if other records were being processed meanwhile.
+        try:
+            result = await result
+        except Exception:
+            self.profile.errors += 1
+            raise
+
+        self.profile.add(perf_counter_ns() - started)
+        if result:
+            self.profile.non_empty += 1
+        return result
+
+
+class PipelineProfiler:
+    """
+        Collects a `Profile` for every stage of a pipeline,
+        and one for reading the records.
+    """
+
+    def __init__(self):
+        self.reading = Profile(READING)
+        self.stages: Dict[str, Profile] = {}
+        self._instrumented: Dict[str, PipelineStage] = {}
+
+    def instrument(self, name: str, stage: PipelineStage) -> PipelineStage:
+        profile = Profile(name)
+        self.stages[name] = profile
+        self._instrumented[name] = stage
+        return ProfiledStage(stage, profile)
+
+    def read(self, records: Iterable[LogRecord]) -> Iterator[LogRecord]:
+        """
+            Yields the records, timing how long it takes to get each of them.
+            Every reader parses the headers of the records as it splits them,
+            so the parsing counts as reading.
+        """
+        records = iter(records)
+        profile = self.reading
+        while True:
+            started = perf_counter_ns()
+            try:
+                record = next(records)
+            except StopIteration:
+                return
+            profile.add(perf_counter_ns() - started)
+            yield record
+
+    def report(self, output: TextIO):
+        """
+            Writes a table of the statistics of every stage,
+            in the order they were run,
+            followed by the counters of the stages that keep any.
+        """
+        columns = (
+            f"{'stage':<32} {'calls':>10} {'non-empty':>10} {'errors':>7} "
+            f"{'total s':>9} {'mean µs':>9} " +
+            ' '.join(f"{f'p{p} µs':>9}" for p in PERCENTILES)
+        )
+        print(columns, file=output)
+        print('-' * len(columns), file=output)
+
+        for profile in (self.reading, *self.stages.values()):
+            mean = profile.total_ns / profile.calls if profile.calls else 0
+            print(
+                f'{profile.name:<32.32} {profile.calls:>10} '
+                f'{profile.non_empty:>10} {profile.errors:>7} '
+                f'{profile.total_ns / 1e9:>9.3f} {mean / 1e3:>9.1f} ' +
+                ' '.join(
+                    f'{profile.percentile(p) / 1e3:>9.1f}'
+                    for p
+                    in PERCENTILES
+                ),
+                file=output
+            )
+
+        for name, stage in self._instrumented.items():
+            counters = stage.statistics()
+            if counters:
+                print(f'{name}: ' + ', '.join(
+                    f'{counter} {value}'
+                    for counter, value
+                    in counters.items()
+                ), file=output)
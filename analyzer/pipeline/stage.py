@@ -4,10 +4,12 @@
 """
 
 from analyzer.logs.record import LogRecord
-from analyzer.util import AutovivifiedDict
+from analyzer.util import (
+    AutovivifiedFrozenDict, EMPTY_AUTOVIVIFIED, FrozenList
+)
 
 from abc import abstractmethod
-from typing import Dict, Iterable
+from typing import Collection, Dict, Iterable, List, Sequence
 
 
 class PipelineStageResult:
@@ -19,7 +21,11 @@ class PipelineStageResult:
          * Nothing at all - not all stages have to yield a result all the time.
 
         This class ensures that results passed into it can be retrieved
-        unmodified regardless of what callers may attempt to do.
+        unmodified regardless of what callers may attempt to do:
+        tags are kept in a `FrozenList`, structured data in a `FrozenDict`,
+        and both are handed out as they are, without copying them.
+        Reading a key that is not in the structured data
+        gives an empty mapping, just like an `AutovivifiedDict` would.
     """
 
     def __init__(
@@ -27,30 +33,50 @@ class PipelineStageResult:
                     tags: Iterable[str] = None,
                     structured: Dict[str, dict] = None):
 
-        from copy import deepcopy
-
         if tags:
-            self._tags = deepcopy(tags)
+            self._tags = FrozenList(tags)
         else:
-            self._tags = []
+            self._tags = _NO_TAGS
 
         if structured:
-            self._structured = AutovivifiedDict(deepcopy(structured))
+            if isinstance(structured, AutovivifiedFrozenDict):
+                self._structured = structured
+            else:
+                self._structured = AutovivifiedFrozenDict(structured)
         else:
-            self._structured = AutovivifiedDict()
+            self._structured = EMPTY_AUTOVIVIFIED
 
     def __bool__(self):
-        return bool(self.tags or self.structured)
+        return bool(self._tags or self._structured)
 
     @property
-    def tags(self):
-        from copy import deepcopy
-        return deepcopy(self._tags)
+    def tags(self) -> FrozenList:
+        return self._tags
 
     @property
-    def structured(self):
-        from copy import deepcopy
-        return AutovivifiedDict(deepcopy(self._structured))
+    def structured(self) -> AutovivifiedFrozenDict:
+        return self._structured
+
+    def merge(self, other: 'PipelineStageResult') -> 'PipelineStageResult':
+        """
+            The results of this stage, followed by those of `other`.
+            Structured data of `other` take precedence.
+
+            Nothing is copied, the new result shares its data
+            with both of the merged ones.
+        """
+        if not other:
+            return self
+        if not self:
+            return other
+
+        merged = PipelineStageResult()
+        merged._tags = self._tags + other._tags
+        merged._structured = self._structured.merge(other._structured)
+        return merged
+
+
+_NO_TAGS = FrozenList()
 
 
 class PipelineStage:
@@ -61,8 +87,26 @@ class PipelineStage:
         It provides some common properties related
         to the building of a pipeline and prevents
         certain accidents from happening through immutability.
+
+        Stages may declare what a record needs for them to have any work,
+        so the pipeline does not call them for other records at all,
+        see `analyzer.pipeline.pipeline.precondition`:
+         * `requires_tags`: every one of these tags,
+         * `requires_structured`: every one of these structured data keys,
+           from the stages before,
+         * `requires_event_types`: any one of these event types,
+         * `requires_applications`: any one of these applications.
+        A stage that declares nothing is called for every record.
+
+        Stages are instantiated with the `options` of their definition
+        as keyword arguments.
     """
 
+    requires_tags: Collection[str] = ()
+    requires_structured: Collection[str] = ()
+    requires_event_types: Collection[str] = ()
+    requires_applications: Collection[str] = ()
+
     @abstractmethod
     def process(self,
                 record: LogRecord,
@@ -75,3 +119,32 @@ class PipelineStage:
             :param state: The combined result of all previous stages, if any.
             :returns: A PipelineStageResult that may contain tags or data.
         """
+
+    def process_batch(
+                self,
+                records: Sequence[LogRecord],
+                states: Sequence[PipelineStageResult]
+            ) -> List[PipelineStageResult]:
+        """
+            Processes several records at once.
+            Stages that can do their work in bulk may override this,
+            by default it simply calls `process` for every record.
+
+            :param records: Log records to process.
+            :param states: The combined result of all previous stages
+            for each of the records.
+            :returns: A PipelineStageResult for each of the records,
+            in the same order.
+        """
+        return [
+            self.process(record, state)
+            for record, state
+            in zip(records, states)
+        ]
+
+    def statistics(self) -> Dict[str, int]:
+        """
+            Counters a stage keeps about its work, e.g. of its caches,
+            reported when the pipeline is profiled.
+        """
+        return {}
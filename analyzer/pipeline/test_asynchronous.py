@@ -0,0 +1,122 @@
+"""
+    Tests for the asyncio based pipeline.
+"""
+
+import asyncio
+
+import pytest
+
+from analyzer.logs.record import LogRecord
+from analyzer.pipeline.asynchronous import AsyncPipeline, read_in_thread
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+HEADER = '2014/Oct/24 19:16:48.062933 111 SYSCALL -'
+
+# Contents of the records, in the order the sink has seen them.
+SEEN = []
+# How many lookups are waiting now, and the most that have at once.
+IN_FLIGHT = {'now': 0, 'most': 0}
+
+
+class SlowLookup(PipelineStage):
+    async def process(self, record, state):
+        number = int(record.content.split()[-1])
+        IN_FLIGHT['now'] += 1
+        IN_FLIGHT['most'] = max(IN_FLIGHT['most'], IN_FLIGHT['now'])
+        try:
+            # Later records finish first.
+            await asyncio.sleep(0.01 * (5 - number % 5))
+        finally:
+            IN_FLIGHT['now'] -= 1
+        if number == 13:
+            raise ValueError('unlucky')
+        return PipelineStageResult(structured={'looked_up': number})
+
+
+class Sink(PipelineStage):
+    def process(self, record, state):
+        SEEN.append(record.content)
+        looked_up = state.structured.get('looked_up')
+        return PipelineStageResult(tags=[f'seen {looked_up}'])
+
+
+def pipeline_definition(with_lookup: bool = True) -> dict:
+    # The module pytest has loaded, the one SEEN is in.
+    definition = {
+        'sink': {'module': __name__, 'class': 'Sink'},
+    }
+    if with_lookup:
+        definition['lookup'] = {'module': __name__, 'class': 'SlowLookup'}
+        definition['sink']['depends_on'] = ['lookup']
+    return definition
+
+
+def records(count: int) -> list:
+    return [LogRecord(f'{HEADER} Record {i}') for i in range(count)]
+
+
+async def collect(results) -> list:
+    return [result async for result in results]
+
+
+class TestAsyncPipeline:
+
+    def test_keeps_records_in_flight_and_in_order(self):
+        pipeline = AsyncPipeline(
+            PipelineConfiguration(pipeline_definition()), in_flight=10
+        )
+        SEEN.clear()
+        IN_FLIGHT['most'] = 0
+
+        results = asyncio.run(collect(pipeline.process_many(records(10))))
+
+        # Waiting one after the other, there would only ever be one.
+        assert IN_FLIGHT['most'] > 1
+        assert [r.tags for r in results] == [[f'seen {i}'] for i in range(10)]
+        assert SEEN == [f'Record {i}' for i in range(10)]
+
+    def test_single_record(self):
+        pipeline = AsyncPipeline(PipelineConfiguration(pipeline_definition()))
+
+        result = asyncio.run(pipeline.process(records(1)[0]))
+        assert result.structured == {'looked_up': 0}
+        assert result.tags == ['seen 0']
+
+    def test_batch(self):
+        pipeline = AsyncPipeline(PipelineConfiguration(pipeline_definition()))
+
+        results = asyncio.run(pipeline.process_batch(records(3)))
+        assert [r.tags for r in results] == [[f'seen {i}'] for i in range(3)]
+
+    def test_stage_errors_reach_the_caller(self):
+        pipeline = AsyncPipeline(
+            PipelineConfiguration(pipeline_definition()), in_flight=4
+        )
+
+        with pytest.raises(Exception) as e:
+            asyncio.run(collect(pipeline.process_many(records(20))))
+        assert e.match('stage lookup: unlucky')
+
+    def test_plain_stages_from_async_reader(self):
+        pipeline = AsyncPipeline(
+            PipelineConfiguration(pipeline_definition(with_lookup=False))
+        )
+        SEEN.clear()
+
+        results = asyncio.run(collect(pipeline.process_many(
+            read_in_thread(records(5), read_size=2)
+        )))
+        assert [r.tags for r in results] == [['seen None']] * 5
+        assert SEEN == [f'Record {i}' for i in range(5)]
+
+
+def test_read_in_thread():
+    async def read():
+        return [
+            record.content
+            async for record
+            in read_in_thread(iter(records(7)), read_size=3)
+        ]
+
+    assert asyncio.run(read()) == [f'Record {i}' for i in range(7)]
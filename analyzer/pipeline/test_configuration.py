@@ -17,6 +17,16 @@ class MockPipelineStage(PipelineStage):
         return PipelineStageResult()
 
 
+class MockOptionsStage(PipelineStage):
+    def __init__(self, greeting: str = 'Hello'):
+        self.greeting = greeting
+
+    def process(self,
+                record: LogRecord,
+                state: PipelineStageResult) -> PipelineStageResult:
+        return PipelineStageResult(tags=[self.greeting])
+
+
 class MockNotStage:
     def process(self, *args, **kwargs):
         pass
@@ -79,3 +89,91 @@ class TestPipelineConfiguration:
         assert ordered[0].name == 'mock_stage_y0'
         assert ordered[1].name == 'mock_stage_z1'
         assert ordered[2].name == 'mock_stage_x2'
+
+
+def mock_stage(*dependencies: str, **keys) -> dict:
+    return {
+        'module': 'analyzer.pipeline.test_configuration',
+        'class': 'MockPipelineStage',
+        'depends_on': [*dependencies],
+        **keys
+    }
+
+
+# Two sinks, 'report' and 'statistics', sharing the 'parse' stage.
+SHARED_CONFIG = {
+    'parse': mock_stage(),
+    'tag': mock_stage('parse'),
+    'report': mock_stage('tag'),
+    'count': mock_stage('parse'),
+    'statistics': mock_stage('count'),
+}
+
+
+def names(config: PipelineConfiguration) -> list:
+    return [stage.name for stage in config.stages_in_order()]
+
+
+class TestSinks:
+    def test_stages_nothing_depends_on_are_sinks(self):
+        config = PipelineConfiguration(SHARED_CONFIG)
+
+        assert config.sinks == ['report', 'statistics']
+        assert len(config.stages) == 5
+
+    def test_marked_sinks(self):
+        config = PipelineConfiguration({
+            **SHARED_CONFIG,
+            'statistics': mock_stage('count', sink=True),
+        })
+
+        assert config.sinks == ['statistics']
+        assert names(config) == ['parse', 'count', 'statistics']
+
+    def test_selected_sinks(self):
+        config = PipelineConfiguration(SHARED_CONFIG, sinks=['tag'])
+
+        assert config.sinks == ['tag']
+        assert names(config) == ['parse', 'tag']
+
+    def test_unneeded_stages_are_not_validated(self):
+        config = PipelineConfiguration({
+            **SHARED_CONFIG,
+            'broken': {'module': 'no.such.module', 'class': 'Stage'},
+        }, sinks=['statistics'])
+
+        assert names(config) == ['parse', 'count', 'statistics']
+
+    def test_unknown_sink(self):
+        with pytest.raises(AssertionError) as e:
+            PipelineConfiguration(SHARED_CONFIG, sinks=['nothing'])
+
+        e.match('No stage named nothing')
+
+
+class TestOptions:
+    def test_options_are_passed_to_the_stage(self):
+        from analyzer.pipeline.pipeline import Pipeline
+        config = PipelineConfiguration({
+            'greet': {
+                'module': 'analyzer.pipeline.test_configuration',
+                'class': 'MockOptionsStage',
+                'options': {'greeting': 'Hi'},
+            },
+        })
+        record = LogRecord('2014/Oct/24 19:16:48.062933 111 SYSCALL - Hi')
+
+        assert config.stages[0].options == {'greeting': 'Hi'}
+        assert Pipeline(config).process(record).tags == ['Hi']
+
+    def test_options_must_be_a_mapping(self):
+        with pytest.raises(Exception) as e:
+            PipelineConfiguration({
+                'greet': {
+                    'module': 'analyzer.pipeline.test_configuration',
+                    'class': 'MockOptionsStage',
+                    'options': ['Hi'],
+                },
+            })
+
+        e.match('options must be a mapping')
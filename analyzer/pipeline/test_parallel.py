@@ -0,0 +1,81 @@
+"""
+    Tests for the multi-process pipeline driver.
+"""
+
+import pytest
+
+from analyzer.logs.mapped import MappedLog
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.parallel import chunk_ranges, process_chunks
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+
+HEADER = (
+    '2014/Oct/24 19:16:48.062933 111 SYSCALL ' +
+    'ExampleComponentTest.ttcn:313(function:ExampleTestedFunction)'
+)
+
+
+class PrintContent(PipelineStage):
+    def process(self, record, state):
+        print(record.content)
+        return PipelineStageResult()
+
+
+@pytest.fixture
+def sample_log(tmp_path) -> str:
+    path = tmp_path / 'sample.log'
+    path.write_text('\n'.join(
+        f'{HEADER} Record {i}\nwith a body' for i in range(200)
+    ))
+    return str(path)
+
+
+@pytest.fixture
+def config() -> PipelineConfiguration:
+    return PipelineConfiguration({
+        'print_content': {
+            'module': 'analyzer.pipeline.test_parallel',
+            'class': 'PrintContent'
+        }
+    })
+
+
+class TestParallelPipeline:
+
+    def test_chunks_cover_all_records(self, sample_log):
+        ranges = chunk_ranges(sample_log, chunk_size=1000)
+        assert len(ranges) > 1
+
+        with MappedLog(sample_log) as log:
+            expected = [*log.spans()]
+            chunked = [
+                span
+                for start, end in ranges
+                for span in log.spans(start, end)
+            ]
+            starts = [begin for begin, _, _ in expected]
+
+        assert chunked == expected
+        for start, _ in ranges:
+            assert start in starts
+
+    def test_ordered_output(self, sample_log, config):
+        output = ''.join(process_chunks(
+            config, sample_log, workers=2, chunk_size=1000
+        ))
+
+        assert output == ''.join(
+            f'Record {i}\nwith a body\n' for i in range(200)
+        )
+
+    def test_unordered_output(self, sample_log, config):
+        output = ''.join(process_chunks(
+            config, sample_log, workers=2, ordered=False, chunk_size=1000
+        ))
+
+        assert sorted(output.splitlines()) == sorted(
+            line
+            for i in range(200)
+            for line in (f'Record {i}', 'with a body')
+        )
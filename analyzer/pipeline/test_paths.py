@@ -0,0 +1,82 @@
+"""
+    Tests for the projections of structured data.
+"""
+
+import pytest
+
+from analyzer.pipeline.paths import Projection, parse_path
+from analyzer.pipeline.stage import PipelineStageResult
+from analyzer.util import AutovivifiedDict
+
+SDATA = 'hu.analyzer.sdata.data'
+
+
+@pytest.fixture
+def structured():
+    return PipelineStageResult(structured={
+        SDATA: {
+            'connOpened': {'remName': 'sip', 'remPort': 5060},
+            'aspsSip': [
+                {'aspRequest': {'method': 'INVITE'}},
+                {'aspResponse': 200},
+                {'aspRequest': {'method': 'ACK'}},
+            ],
+            'omitted': None,
+        },
+        'message_type': 'INVITE',
+    }).structured
+
+
+class TestParsePath:
+    def test_keys_and_indices(self):
+        assert parse_path('a.b[0][*].c[-1]') == ['a', 'b', 0, None, 'c', -1]
+
+    def test_roots(self):
+        assert parse_path(f'{SDATA}.connOpened', [SDATA, 'hu']) == [
+            SDATA, 'connOpened'
+        ]
+        assert parse_path(SDATA, [SDATA]) == [SDATA]
+        assert parse_path(f'{SDATA}x.y', [SDATA]) == [
+            'hu', 'analyzer', 'sdata', 'datax', 'y'
+        ]
+
+    @pytest.mark.parametrize('path', ['', 'a..b', 'a.', '.a', 'a[b]', 'a[]'])
+    def test_invalid(self, path):
+        with pytest.raises(AssertionError):
+            parse_path(path)
+
+
+class TestProjection:
+    def test_read(self, structured):
+        assert Projection(f'{SDATA}.connOpened.remPort', [SDATA])(
+            structured
+        ) == 5060
+        assert Projection('message_type')(structured) == 'INVITE'
+        assert Projection(f'{SDATA}.aspsSip[-1].aspRequest.method', [SDATA])(
+            structured
+        ) == 'ACK'
+
+    def test_every_item(self, structured):
+        requests = Projection(f'{SDATA}.aspsSip[*].aspRequest.method', [SDATA])
+        assert requests(structured) == ['INVITE', 'ACK']
+        assert len(Projection(f'{SDATA}.aspsSip[*]', [SDATA])(structured)) == 3
+
+    def test_missing(self, structured):
+        for path in ('connOpened.locName', 'connOpened.remName.x',
+                     'aspsSip[3]', 'aspsSip.x', 'connOpened[0]',
+                     'connOpened.remName[0]', 'omitted.x'):
+            projection = Projection(f'{SDATA}.{path}', [SDATA])
+            assert projection(structured) is None
+            assert projection(structured, 'default') == 'default'
+            assert not projection.exists(structured)
+
+        omitted = Projection(f'{SDATA}.omitted', [SDATA])
+        assert omitted.exists(structured)
+        assert omitted(structured, 'default') is None
+
+    def test_reading_adds_nothing(self):
+        data = AutovivifiedDict()
+        data['a']['b'] = 1
+        assert Projection('a.c.d')(data) is None
+        assert Projection('x.y')(data) is None
+        assert data == {'a': {'b': 1}}
@@ -0,0 +1,86 @@
+"""
+    Tests for the registry of content patterns.
+"""
+
+import re
+
+import pytest
+
+from analyzer.logs.record import LogRecord
+from analyzer.pipeline.patterns import PatternRegistry, found_size
+
+RECORD = (
+    '2014/Oct/24 19:16:48.123456 mtc PARALLEL - '
+    'PTC was created. Component reference: 3, alive: no, type: Sip.SIP_CT.'
+)
+
+
+@pytest.fixture
+def registry():
+    # Room for two contents as long as the ones of the tests.
+    return PatternRegistry(cache_size=2 * found_size(RECORD + 'a', {}))
+
+
+@pytest.fixture
+def record():
+    return LogRecord(RECORD)
+
+
+class TestPatternRegistry:
+    def test_finds_what_the_regex_does(self, registry, record):
+        pattern = registry.register(
+            'id', r'reference:\s(?P<id>\d+)', re.I
+        )
+        assert pattern.search(record).group('id') == '3'
+        assert pattern.search(LogRecord(RECORD.replace('3,', 'x,'))) is None
+
+    def test_shares_matches(self, registry, record):
+        pattern = registry.register('type', r'type:\s(?P<type>\S+)\.$')
+        assert pattern.search(record) is pattern.search(LogRecord(RECORD))
+
+    def test_searches_once_per_content(self, registry, record):
+        searched = []
+
+        class CountingRegex:
+            def search(self, content):
+                searched.append(content)
+                return None
+
+        pattern = registry.register('anything', 'anything')
+        pattern.regex = CountingRegex()
+        assert pattern.search(record) is None
+        assert pattern.search(record) is None
+        assert searched == [record.content]
+
+    def test_forgets_least_recently_used_content(self, registry):
+        pattern = registry.register('digit', r'\d')
+        first, second, third = (LogRecord(f'{RECORD}{i}') for i in 'abc')
+
+        found = pattern.search(first)
+        found_second = pattern.search(second)
+        assert pattern.search(first) is found
+
+        pattern.search(third)
+        assert pattern.search(first) is found
+        assert pattern.search(second) is not found_second
+        assert pattern.search(second).group() == found_second.group()
+
+    def test_clear(self, registry, record):
+        pattern = registry.register('digit', r'\d')
+        found = pattern.search(record)
+        registry.clear()
+        assert pattern.search(record) is not found
+
+    def test_register_again(self, registry):
+        pattern = registry.register('digit', r'\d')
+        assert registry.register('digit', r'\d') is pattern
+        assert registry['digit'] is pattern
+
+        with pytest.raises(AssertionError):
+            registry.register('digit', r'\w')
+
+    def test_patterns_are_separate(self, registry, record):
+        digit = registry.register('digit', r'\d')
+        word = registry.register('word', r'[a-z]+')
+        assert digit.search(record).group() == '3'
+        assert word.search(record).group() == 'was'
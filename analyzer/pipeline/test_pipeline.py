@@ -2,9 +2,17 @@
     Tests for the log processing pipeline.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, Event, Thread
+from time import sleep
+
+import pytest
+
 from analyzer.logs.record import LogRecord
 from analyzer.pipeline.configuration import PipelineConfiguration
-from analyzer.pipeline.pipeline import Pipeline
+from analyzer.pipeline.pipeline import (
+    AssemblyLinePipeline, ConcurrentPipeline, Pipeline, precondition
+)
 from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
 
 
@@ -55,6 +63,90 @@ class ExtractIntroducedNames(PipelineStage):
         return PipelineStageResult()
 
 
+# Both waiting stages have to reach it before either can go on,
+# which only happens if they run at the same time.
+MEETING_POINT = Barrier(2, timeout=5)
+
+
+class WaitForOtherStage(PipelineStage):
+    def process(self, record, state):
+        MEETING_POINT.wait()
+        return PipelineStageResult(structured={
+            type(self).__name__: record.content
+        })
+
+
+class WaitForOtherStageToo(WaitForOtherStage):
+    pass
+
+
+class CountResults(PipelineStage):
+    def process(self, record, state):
+        return PipelineStageResult(structured={
+            'count': len(state.structured)
+        })
+
+
+# Holds up HeldUpStage until set.
+RELEASE = Event()
+
+
+class HeldUpStage(PipelineStage):
+    def process(self, record, state):
+        RELEASE.wait(timeout=5)
+        return PipelineStageResult()
+
+
+class FailingStage(PipelineStage):
+    def process(self, record, state):
+        raise ValueError('no luck')
+
+
+# Records the stages with preconditions were called with.
+CALLED_WITH = []
+
+
+class GreetIntroduced(PipelineStage):
+    requires_tags = (TAG_INTRO,)
+    requires_structured = (TAG_INTRO,)
+
+    def process(self, record, state):
+        CALLED_WITH.append(record.content)
+        name = state.structured[TAG_INTRO]['name']
+        return PipelineStageResult(tags=[f'hello {name}'])
+
+
+class CountUserEvents(PipelineStage):
+    requires_event_types = ('USER', 'DEBUG')
+    requires_applications = ('mtc',)
+
+    def process(self, record, state):
+        CALLED_WITH.append(record.content)
+        return PipelineStageResult(tags=['counted'])
+
+
+INTRODUCTIONS = {
+    'tag': {
+        'module': 'analyzer.pipeline.test_pipeline',
+        'class': 'TagIntroduction',
+    },
+    'extract': {
+        'module': 'analyzer.pipeline.test_pipeline',
+        'class': 'ExtractIntroducedNames',
+        'depends_on': 'tag'
+    }
+}
+
+
+def introductions(count: int) -> list:
+    header = '2014/Oct/24 19:16:48.062933 111 SYSCALL -'
+    return [
+        LogRecord(f'{header} {message}')
+        for message
+        in ["I'm Anne", 'Nobody', 'Ich bin Angela'] * count
+    ]
+
+
 class TestPipeline:
     def test_instantiate_mock_pipeline(self):
         test_pipeline_definition = {
@@ -101,3 +193,196 @@ class TestPipeline:
         ]
 
         assert names == ['Sally', 'Anne', 'Marianne', 'Angela']
+
+    def test_batches_give_the_same_results(self):
+        pipeline = Pipeline(PipelineConfiguration(INTRODUCTIONS))
+        logs = introductions(5)
+
+        one_by_one = [pipeline.process(r) for r in logs]
+        batched = [*pipeline.process_many(logs, batch_size=4)]
+
+        assert [r.tags for r in batched] == [r.tags for r in one_by_one]
+        assert (
+            [r.structured for r in batched] ==
+            [r.structured for r in one_by_one]
+        )
+
+    def test_independent_stages_run_concurrently(self):
+        config = PipelineConfiguration({
+            'wait': {
+                'module': 'analyzer.pipeline.test_pipeline',
+                'class': 'WaitForOtherStage',
+            },
+            'wait_too': {
+                'module': 'analyzer.pipeline.test_pipeline',
+                'class': 'WaitForOtherStageToo',
+            },
+            'count': {
+                'module': 'analyzer.pipeline.test_pipeline',
+                'class': 'CountResults',
+                'depends_on': ['wait', 'wait_too']
+            }
+        })
+        assert [len(layer) for layer in config.stages_in_layers()] == [2, 1]
+
+        header = '2014/Oct/24 19:16:48.062933 111 SYSCALL -'
+        logs = [LogRecord(f'{header} Record {i}') for i in range(3)]
+        with ThreadPoolExecutor(2) as executor:
+            pipeline = ConcurrentPipeline(config, executor)
+            results = [
+                pipeline.process(logs[0]),
+                *pipeline.process_many(logs[1:], batch_size=1)
+            ]
+
+        assert [r.structured for r in results] == [
+            {
+                'WaitForOtherStage': f'Record {i}',
+                'WaitForOtherStageToo': f'Record {i}',
+                'count': 2
+            }
+            for i
+            in range(3)
+        ]
+
+
+class TestPreconditions:
+
+    @pytest.fixture
+    def config(self) -> PipelineConfiguration:
+        return PipelineConfiguration({
+            **INTRODUCTIONS,
+            'greet': {
+                # The module pytest has loaded, the one CALLED_WITH is in.
+                'module': __name__,
+                'class': 'GreetIntroduced',
+                'depends_on': 'extract'
+            },
+        })
+
+    def test_stages_are_only_called_when_needed(self, config):
+        CALLED_WITH.clear()
+        results = [Pipeline(config).process(r) for r in introductions(2)]
+
+        assert CALLED_WITH == ["I'm Anne", 'Ich bin Angela'] * 2
+        assert [r.tags for r in results] == [
+            [TAG_INTRO, 'hello Anne'], [], [TAG_INTRO, 'hello Angela']
+        ] * 2
+
+    @pytest.mark.parametrize('batch_size', [1, 2, 1024])
+    def test_batches_skip_the_same_records(self, config, batch_size):
+        CALLED_WITH.clear()
+        expected = [Pipeline(config).process(r) for r in introductions(5)]
+        one_by_one = [*CALLED_WITH]
+
+        CALLED_WITH.clear()
+        results = [*Pipeline(config).process_many(
+            introductions(5), batch_size=batch_size
+        )]
+
+        assert CALLED_WITH == one_by_one
+        assert [r.tags for r in results] == [r.tags for r in expected]
+
+    def test_concurrent_pipelines_skip_too(self, config):
+        expected = [Pipeline(config).process(r) for r in introductions(5)]
+
+        CALLED_WITH.clear()
+        with ThreadPoolExecutor(2) as executor:
+            concurrent = [*ConcurrentPipeline(config, executor).process_many(
+                introductions(5)
+            )]
+        assembly_line = [*AssemblyLinePipeline(config).process_many(
+            introductions(5), batch_size=4
+        )]
+
+        assert len(CALLED_WITH) == 20
+        assert [r.tags for r in concurrent] == [r.tags for r in expected]
+        assert [r.tags for r in assembly_line] == [r.tags for r in expected]
+
+    def test_event_types_and_applications(self):
+        pipeline = Pipeline(PipelineConfiguration({
+            'count': {'module': __name__, 'class': 'CountUserEvents'},
+        }))
+        records = [
+            LogRecord(f'2014/Oct/24 19:16:48.062933 {application} {event} - '
+                      f'{application} {event}')
+            for application, event
+            in [('mtc', 'USER'), ('mtc', 'DEBUG'), ('mtc', 'PORTEVENT'),
+                ('hc', 'USER')]
+        ]
+
+        CALLED_WITH.clear()
+        results = [*pipeline.process_many(records)]
+
+        assert CALLED_WITH == ['mtc USER', 'mtc DEBUG']
+        assert [r.tags for r in results] == [['counted'], ['counted'], [], []]
+
+    def test_no_precondition(self):
+        assert precondition(TagIntroduction()) is None
+
+
+class TestAssemblyLinePipeline:
+
+    @pytest.mark.parametrize('stages_per_worker', [1, 2])
+    def test_gives_the_same_results(self, stages_per_worker):
+        config = PipelineConfiguration(INTRODUCTIONS)
+        logs = introductions(20)
+        pipeline = AssemblyLinePipeline(
+            config, stages_per_worker=stages_per_worker, queue_size=2
+        )
+
+        expected = [*Pipeline(config).process_many(logs)]
+        results = [*pipeline.process_many(logs, batch_size=7)]
+
+        assert [r.tags for r in results] == [r.tags for r in expected]
+        assert (
+            [r.structured for r in results] ==
+            [r.structured for r in expected]
+        )
+
+    def test_stage_errors_reach_the_caller(self):
+        pipeline = AssemblyLinePipeline(PipelineConfiguration({
+            **INTRODUCTIONS,
+            'fail': {
+                'module': 'analyzer.pipeline.test_pipeline',
+                'class': 'FailingStage',
+                'depends_on': 'extract'
+            }
+        }))
+
+        with pytest.raises(Exception) as e:
+            [*pipeline.process_many(introductions(2))]
+        assert e.match('stage fail: no luck')
+
+    def test_slow_stage_holds_up_the_reader(self):
+        pipeline = AssemblyLinePipeline(PipelineConfiguration({
+            'tag': INTRODUCTIONS['tag'],
+            'held_up': {
+                # The module pytest has loaded, the one RELEASE is set in.
+                'module': __name__,
+                'class': 'HeldUpStage',
+                'depends_on': 'tag'
+            }
+        }), queue_size=1)
+
+        read = []
+
+        def records():
+            for record in introductions(1000):
+                read.append(record)
+                yield record
+
+        RELEASE.clear()
+        results = pipeline.process_many(records(), batch_size=1)
+        first = Thread(target=next, args=(results,))
+        first.start()
+        try:
+            sleep(0.5)
+            read_while_held_up = len(read)
+        finally:
+            RELEASE.set()
+        first.join()
+
+        # Every queue and worker holds a single record at most.
+        assert read_while_held_up <= 6
+        assert len([*results]) == 2999
+        assert len(read) == 3000
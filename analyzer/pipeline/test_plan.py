@@ -0,0 +1,211 @@
+"""
+    Tests for the cache of validated pipeline definitions.
+"""
+
+import os
+import sys
+
+import pytest
+
+from analyzer.logs.record import LogRecord
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.pipeline import Pipeline
+from analyzer.pipeline.plan import load_configuration, parse_definition
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+# How many times CountedStage has been instantiated.
+INSTANCES = []
+
+
+class CountedStage(PipelineStage):
+    def __init__(self, label: str = None):
+        self.label = label
+        INSTANCES.append(self)
+
+    def process(self, record, state):
+        return PipelineStageResult(tags=[record.content])
+
+
+DEFINITION = f'''
+first:
+    module: {__name__}
+    class: CountedStage
+
+second:
+    module: {__name__}
+    class: CountedStage
+    depends_on: first
+
+unused:
+    module: {__name__}
+    class: CountedStage
+'''
+
+
+@pytest.fixture
+def definition(tmp_path) -> str:
+    path = tmp_path / 'pipeline.yml'
+    path.write_text(DEFINITION)
+    return str(path)
+
+
+@pytest.fixture
+def validations(monkeypatch) -> list:
+    validated = []
+    is_valid = PipelineConfiguration.is_stage_config_valid
+
+    def count(config):
+        validated.append(config['class'])
+        return is_valid(config)
+
+    monkeypatch.setattr(
+        PipelineConfiguration, 'is_stage_config_valid', staticmethod(count)
+    )
+    return validated
+
+
+def names(config: PipelineConfiguration) -> list:
+    return [stage.name for stage in config.stages_in_order()]
+
+
+class TestPlan:
+
+    def test_plan_is_not_validated_again(self, tmp_path, definition,
+                                         validations):
+        cache = str(tmp_path / 'plans')
+        first = load_configuration(definition, cache_directory=cache)
+        assert len(validations) == 3
+        assert len(os.listdir(cache)) == 1
+
+        second = load_configuration(definition, cache_directory=cache)
+        assert len(validations) == 3
+        assert names(second) == names(first)
+        assert second.sinks == first.sinks == ['second', 'unused']
+
+    def test_sinks_have_plans_of_their_own(self, tmp_path, definition,
+                                           validations):
+        cache = str(tmp_path / 'plans')
+        load_configuration(definition, cache_directory=cache)
+        config = load_configuration(definition, ['second'], cache)
+
+        assert names(config) == ['first', 'second']
+        assert len(os.listdir(cache)) == 2
+
+    def test_changed_modules_are_validated_again(self, tmp_path, monkeypatch,
+                                                 validations):
+        module = tmp_path / 'throwaway_stages.py'
+        module.write_text(
+            f'from {__name__} import CountedStage as ThrowawayStage\n'
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        path = tmp_path / 'pipeline.yml'
+        path.write_text('''
+throwaway:
+    module: throwaway_stages
+    class: ThrowawayStage
+''')
+        cache = str(tmp_path / 'plans')
+        try:
+            load_configuration(str(path), cache_directory=cache)
+
+            stat = module.stat()
+            os.utime(module, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+            load_configuration(str(path), cache_directory=cache)
+        finally:
+            sys.modules.pop('throwaway_stages', None)
+        assert len(validations) == 2
+
+    def test_modules_defining_stages_are_checked(self, tmp_path,
+                                                 monkeypatch, validations):
+        # The stage is defined in one module, and imported from another.
+        defining = tmp_path / 'throwaway_defining.py'
+        defining.write_text(
+            f'from {__name__} import CountedStage\n'
+            'class ThrowawayStage(CountedStage):\n'
+            '    pass\n'
+        )
+        (tmp_path / 'throwaway_exporting.py').write_text(
+            'from throwaway_defining import ThrowawayStage  # noqa: F401\n'
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        path = tmp_path / 'pipeline.yml'
+        path.write_text('''
+throwaway:
+    module: throwaway_exporting
+    class: ThrowawayStage
+''')
+        cache = str(tmp_path / 'plans')
+        try:
+            load_configuration(str(path), cache_directory=cache)
+
+            stat = defining.stat()
+            os.utime(defining, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+            load_configuration(str(path), cache_directory=cache)
+        finally:
+            sys.modules.pop('throwaway_defining', None)
+            sys.modules.pop('throwaway_exporting', None)
+        assert len(validations) == 2
+
+    def test_broken_plans_are_ignored(self, tmp_path, definition,
+                                      validations):
+        cache = tmp_path / 'plans'
+        load_configuration(definition, cache_directory=str(cache))
+        for plan in cache.iterdir():
+            plan.write_text('{"stages": []}')
+
+        config = load_configuration(definition, cache_directory=str(cache))
+        assert len(validations) == 6
+        assert names(config) == ['first', 'second', 'unused']
+
+    def test_options_are_kept(self, tmp_path, validations):
+        path = tmp_path / 'pipeline.yml'
+        path.write_text(f'''
+counted:
+    module: {__name__}
+    class: CountedStage
+    options:
+        label: counted
+''')
+        cache = str(tmp_path / 'plans')
+        load_configuration(str(path), cache_directory=cache)
+        config = load_configuration(str(path), cache_directory=cache)
+
+        assert len(validations) == 1
+        assert config.stages[0].options == {'label': 'counted'}
+
+    def test_without_cache(self, definition, validations):
+        load_configuration(definition)
+        load_configuration(definition)
+        assert len(validations) == 6
+
+
+def test_stages_are_instantiated_once(definition):
+    config = load_configuration(definition, ['second'])
+
+    INSTANCES.clear()
+    pipeline = Pipeline(config)
+    assert len(INSTANCES) == 2
+
+    record = LogRecord('2014/Oct/24 19:16:48.062933 111 SYSCALL - hello')
+    assert pipeline.process(record).tags == ['hello', 'hello']
+
+
+def test_single_dependency_is_a_list():
+    stages = parse_definition(f'''
+sdata:
+    module: {__name__}
+    class: CountedStage
+
+parse_sdata:
+    module: {__name__}
+    class: CountedStage
+
+read:
+    module: {__name__}
+    class: CountedStage
+    depends_on: parse_sdata
+'''.encode())
+
+    assert stages['read']['depends_on'] == ['parse_sdata']
+    config = PipelineConfiguration(stages, ['read'])
+    assert names(config) == ['parse_sdata', 'read']
@@ -0,0 +1,190 @@
+"""
+    Tests for the pipeline profiler.
+"""
+
+import asyncio
+import io
+import time
+
+import pytest
+
+from analyzer.logs.record import LogRecord
+from analyzer.pipeline.asynchronous import AsyncPipeline
+from analyzer.pipeline.configuration import PipelineConfiguration
+from analyzer.pipeline.pipeline import Pipeline
+from analyzer.pipeline.profiling import (
+    PipelineProfiler, Profile, ProfiledStage
+)
+from analyzer.pipeline.stage import PipelineStage, PipelineStageResult
+
+HEADER = '2014/Oct/24 19:16:48.062933 111 SYSCALL -'
+
+
+class TagEven(PipelineStage):
+    def process(self, record, state):
+        if int(record.content.split()[-1]) % 2:
+            return PipelineStageResult()
+        return PipelineStageResult(tags=['even'])
+
+
+class FailOnThree(PipelineStage):
+    def process(self, record, state):
+        if record.content.endswith(' 3'):
+            raise ValueError('three')
+        return PipelineStageResult()
+
+
+class SleepOnThree(PipelineStage):
+    def process(self, record, state):
+        if record.content.endswith(' 3'):
+            time.sleep(0.01)
+        return PipelineStageResult()
+
+
+class CountRecords(PipelineStage):
+    def __init__(self):
+        self.records = 0
+
+    def process(self, record, state):
+        self.records += 1
+        return PipelineStageResult()
+
+    def statistics(self):
+        return {'records': self.records}
+
+
+class AsyncTagAll(PipelineStage):
+    async def process(self, record, state):
+        await asyncio.sleep(0)
+        return PipelineStageResult(tags=['all'])
+
+
+def configuration(*classes: str) -> PipelineConfiguration:
+    definition = {}
+    previous = None
+    for cls in classes:
+        definition[cls] = {'module': __name__, 'class': cls}
+        if previous:
+            definition[cls]['depends_on'] = previous
+        previous = cls
+    return PipelineConfiguration(definition)
+
+
+def records(count: int) -> list:
+    return [LogRecord(f'{HEADER} Record {i}') for i in range(count)]
+
+
+class TestProfile:
+
+    def test_percentiles(self):
+        profile = Profile('stage')
+        for _ in range(90):
+            profile.add(1_000)
+        for _ in range(10):
+            profile.add(1_000_000)
+
+        assert profile.calls == 100
+        assert profile.total_ns == 90 * 1_000 + 10 * 1_000_000
+        # Buckets are about 9% wide.
+        assert 1_000 <= profile.percentile(50) < 1_100
+        assert 1_000 <= profile.percentile(90) < 1_100
+        assert 1_000_000 <= profile.percentile(99) < 1_100_000
+
+    def test_empty(self):
+        assert Profile('stage').percentile(50) == 0.0
+
+
+class TestPipelineProfiler:
+
+    def test_counts_calls_and_results(self):
+        profiler = PipelineProfiler()
+        pipeline = Pipeline(configuration('TagEven'), profiler=profiler)
+
+        results = [*pipeline.process_many(
+            profiler.read(records(10)), batch_size=4
+        )]
+        assert [r.tags for r in results] == [['even'], []] * 5
+
+        profile = profiler.stages['TagEven']
+        assert profile.calls == 10
+        assert profile.non_empty == 5
+        assert profile.errors == 0
+        assert profiler.reading.calls == 10
+
+    def test_batches_are_timed_a_record_at_a_time(self):
+        profiler = PipelineProfiler()
+        pipeline = Pipeline(configuration('SleepOnThree'), profiler=profiler)
+        [*pipeline.process_many(records(10), batch_size=10)]
+
+        profile = profiler.stages['SleepOnThree']
+        assert profile.calls == 10
+        assert profile.percentile(50) < 1_000_000
+        assert profile.percentile(99) >= 10_000_000
+
+    def test_counts_errors(self):
+        profiler = PipelineProfiler()
+        pipeline = Pipeline(configuration('FailOnThree'), profiler=profiler)
+
+        for record in records(3):
+            pipeline.process(record)
+        with pytest.raises(Exception):
+            pipeline.process(records(4)[3])
+
+        profile = profiler.stages['FailOnThree']
+        assert profile.calls == 3
+        assert profile.errors == 1
+
+    def test_asynchronous_stages(self):
+        profiler = PipelineProfiler()
+        pipeline = AsyncPipeline(
+            configuration('AsyncTagAll', 'TagEven'), profiler=profiler
+        )
+
+        async def collect():
+            return [r async for r in pipeline.process_many(records(6))]
+
+        results = asyncio.run(collect())
+        assert [r.tags for r in results] == [['all', 'even'], ['all']] * 3
+        assert profiler.stages['AsyncTagAll'].calls == 6
+        assert profiler.stages['AsyncTagAll'].non_empty == 6
+
+    def test_report(self):
+        profiler = PipelineProfiler()
+        pipeline = Pipeline(
+            configuration('TagEven', 'FailOnThree'), profiler=profiler
+        )
+        [*pipeline.process_many(profiler.read(records(3)))]
+
+        output = io.StringIO()
+        profiler.report(output)
+        lines = output.getvalue().splitlines()
+
+        assert lines[0].split()[:4] == [
+            'stage', 'calls', 'non-empty', 'errors'
+        ]
+        assert [line.split()[:4] for line in lines[2:]] == [
+            ['reading', '3', '0', '0'],
+            ['TagEven', '3', '2', '0'],
+            ['FailOnThree', '3', '0', '0'],
+        ]
+
+    def test_report_statistics(self):
+        profiler = PipelineProfiler()
+        pipeline = Pipeline(
+            configuration('TagEven', 'CountRecords'), profiler=profiler
+        )
+        [*pipeline.process_many(profiler.read(records(3)))]
+
+        output = io.StringIO()
+        profiler.report(output)
+
+        assert output.getvalue().splitlines()[-1] == 'CountRecords: records 3'
+
+    def test_stages_are_not_wrapped_without_profiler(self):
+        pipeline = Pipeline(configuration('TagEven'))
+
+        assert not any(
+            isinstance(stage, ProfiledStage)
+            for _, stage
+            in pipeline._stages
+        )
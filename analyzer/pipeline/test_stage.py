@@ -17,9 +17,12 @@ def test_stage_result_tags_are_immutable():
     assert e.match("can't set attribute")
     assert res.tags == tags
 
-    res.tags.append('another')
+    with pytest.raises(AttributeError):
+        res.tags.append('another')
 
-    assert res.tags == tags
+    tags.append('another')
+
+    assert res.tags == ['actual-results']
 
 
 def test_stage_result_structured_data_are_immutable():
@@ -32,10 +35,16 @@ def test_stage_result_structured_data_are_immutable():
     assert e.match("can't set attribute")
     assert res.structured == sdata
 
-    res.structured['another'] = 'key'
-    res.structured['component']['another'] = 'key'
+    with pytest.raises(TypeError):
+        res.structured['another'] = 'key'
+    with pytest.raises(TypeError):
+        res.structured['component']['another'] = 'key'
 
-    assert res.structured == sdata
+    sdata['component']['another'] = 'key'
+
+    assert res.structured == {
+        'component': {'id': 'SomethingSomethingComponent'}
+    }
 
 
 def test_stage_result_can_check_presence_with_if_stmt():
@@ -45,3 +54,27 @@ def test_stage_result_can_check_presence_with_if_stmt():
 
     assert PipelineStageResult(tags=['any'])
     assert PipelineStageResult(structured={'any': 'value'})
+
+
+def test_stage_result_reads_missing_keys_as_empty():
+    res = PipelineStageResult(structured={'any': 'value'})
+
+    assert res.structured['missing'] == {}
+    assert res.structured['missing']['nested'] == {}
+    assert 'missing' not in res.structured
+    assert res.structured.get('missing') is None
+
+
+def test_stage_results_merge_without_copying():
+    sdata = {'component': {'id': 'SomethingSomethingComponent'}}
+    first = PipelineStageResult(tags=['first'], structured=sdata)
+    second = PipelineStageResult(tags=['second'], structured={'id': 42})
+
+    merged = first.merge(second)
+
+    assert merged.tags == ['first', 'second']
+    assert merged.structured == {**sdata, 'id': 42}
+    assert merged.structured['component'] is first.structured['component']
+
+    assert first.merge(PipelineStageResult()) is first
+    assert PipelineStageResult().merge(second) is second
@@ -3,8 +3,11 @@
     the accidental complexity of our implementation.
 """
 
-from collections import defaultdict
-from typing import Callable, Iterable
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List
 
 
 class AutovivifiedDict(dict):
@@ -22,6 +25,207 @@ class AutovivifiedDict(dict):
         return v
 
 
+class FrozenView(ABC):
+    """
+        Base class of read-only views,
+        e.g. of data that is only parsed when first read,
+        which `freeze` keeps as they are.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def thaw(self) -> object:
+        """
+            The data seen through the view, as dicts and lists,
+            e.g. to serialize it.
+        """
+
+
+class FrozenList(tuple):
+    """
+        An immutable list.
+        Its items are frozen too, see `freeze`.
+
+        Compares equal to lists with the same items,
+        so it can stand in for the lists stages used to receive.
+    """
+
+    def __new__(cls, items: Iterable[object] = ()):
+        return super().__new__(cls, (freeze(item) for item in items))
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __add__(self, other: Iterable[object]) -> 'FrozenList':
+        if not other:
+            return self
+        if not self and isinstance(other, FrozenList):
+            return other
+        return FrozenList((*self, *other))
+
+    def __repr__(self):
+        return f'FrozenList({list(self)!r})'
+
+
+class FrozenDict(Mapping):
+    """
+        An immutable dict.
+        Its values are frozen too, see `freeze`.
+
+        Merging does not copy the mapping: the result only stores
+        the keys that were merged into it, and looks up the rest
+        in the mapping it was merged into,
+        so a chain of merges costs as much as the changes themselves.
+        Long chains are flattened once in a while to keep lookups fast.
+    """
+
+    __slots__ = ('_items', '_parent', '_depth', '_length')
+
+    MAX_DEPTH = 8
+
+    def __init__(self, items: Mapping = None):
+        self._items = {
+            key: freeze(value)
+            for key, value
+            in (items or {}).items()
+        }
+        self._parent = None
+        self._depth = 0
+        self._length = len(self._items)
+
+    def __getitem__(self, key):
+        node = self
+        while node is not None:
+            items = node._items
+            if key in items:
+                return items[key]
+            node = node._parent
+        return self.__missing__(key)
+
+    def __missing__(self, key):
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        node = self
+        while node is not None:
+            if key in node._items:
+                return True
+            node = node._parent
+        return False
+
+    def get(self, key, default=None):
+        node = self
+        while node is not None:
+            items = node._items
+            if key in items:
+                return items[key]
+            node = node._parent
+        return default
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[object]:
+        self._flatten()
+        return iter(self._items)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self)!r})'
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    def merge(self, other: Mapping) -> 'FrozenDict':
+        """
+            A mapping with the items of this one and `other`,
+            the values of `other` taking precedence,
+            in the same order as `{**self, **other}` would be.
+        """
+        if not other:
+            return self
+
+        merged = object.__new__(type(self))
+        merged._items = {key: freeze(value) for key, value in other.items()}
+        merged._parent = self
+        merged._depth = self._depth + 1
+        merged._length = self._length + sum(
+            1 for key in merged._items if key not in self
+        )
+        if merged._depth > FrozenDict.MAX_DEPTH:
+            merged._flatten()
+        return merged
+
+    def _flatten(self):
+        """
+            Copies the items of the whole chain into this mapping.
+            The mapping does not change as far as anyone can tell,
+            it only gets faster to read.
+        """
+        if self._parent is None:
+            return
+
+        layers = []
+        node = self
+        while node is not None:
+            layers.append(node._items)
+            node = node._parent
+
+        items = {}
+        for layer in reversed(layers):
+            items.update(layer)
+        self._items = items
+        self._parent = None
+        self._depth = 0
+
+
+class AutovivifiedFrozenDict(FrozenDict):
+    """
+        A `FrozenDict` that, like `AutovivifiedDict`,
+        returns an empty mapping for missing keys instead of raising,
+        but does not add the key to itself.
+    """
+
+    __slots__ = ()
+
+    def __missing__(self, key):
+        return EMPTY_AUTOVIVIFIED
+
+
+EMPTY_AUTOVIVIFIED = AutovivifiedFrozenDict()
+
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def freeze(value: object) -> object:
+    """
+        An immutable version of `value`:
+        dicts become `FrozenDict`s, lists and tuples `FrozenList`s,
+        anything else, `FrozenView`s included, is returned as is.
+    """
+    # Most values are scalars or plain dicts,
+    # not worth the checks for abstract classes.
+    if type(value) in _SCALARS:
+        return value
+    if type(value) is dict:
+        return FrozenDict(value)
+    if isinstance(value, (FrozenDict, FrozenList, FrozenView)):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenDict(value)
+    if isinstance(value, (list, tuple)):
+        return FrozenList(value)
+    return value
+
+
 def topological_sort(input_range: Iterable[object],
                      callback_branches: Callable[[object], Iterable[object]]
                      ) -> Iterable[object]:
@@ -41,6 +245,20 @@ def topological_sort(input_range: Iterable[object],
         topologically sorted based on
         the relation function `callback_branches`.
     """
+    from itertools import chain
+    return [*chain(*topological_layers(input_range, callback_branches))]
+
+
+def topological_layers(input_range: Iterable[object],
+                       callback_branches: Callable[[object], Iterable[object]]
+                       ) -> List[List[object]]:
+    """
+        Same as `topological_sort`, but keeps the objects in layers:
+        every object comes in a later layer than the ones it depends on,
+        so objects within a layer do not depend on each other.
+
+        :returns: The layers, in the order they have to be processed.
+    """
     state = {}
 
     def update(obj, depth):
@@ -65,12 +283,79 @@ def topological_sort(input_range: Iterable[object],
     for obj, maxdepth in state.items():
         layers[-maxdepth].append(obj)
 
-    from itertools import chain
-    return [*chain(*[
+    return [
         layers[i]
         for i
         in sorted(layers.keys())
-    ])]
+    ]
+
+
+class LRUCache:
+    """
+        A cache that forgets the least recently used values
+        when their total size would exceed its budget.
+        It may be shared by threads.
+
+        :param budget: The total size the values may take up.
+        :param sizeof: The size of a key and its value,
+        in the same unit as the budget, e.g. bytes.
+    """
+
+    def __init__(self,
+                 budget: int,
+                 sizeof: Callable[[object, object], int]):
+        assert budget >= 0, 'The budget must not be negative.'
+
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        """
+            Values larger than the whole budget are not kept.
+        """
+        size = self._sizeof(key, value)
+        if size > self.budget:
+            return
+
+        with self._lock:
+            entries = self._entries
+            replaced = entries.pop(key, None)
+            if replaced is not None:
+                self.size -= replaced[1]
+            while entries and self.size + size > self.budget:
+                _, (_, evicted) = entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+            entries[key] = (value, size)
+            self.size += size
+
+    def statistics(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'size': self.size,
+        }
 
 
 def import_from(stage_module: str, stage_class: str) -> type:
@@ -0,0 +1,78 @@
+"""
+    Tests for the immutable containers used for stage results.
+"""
+
+import pickle
+
+import pytest
+
+from analyzer.util import FrozenDict, FrozenList, FrozenView, freeze
+
+
+def test_values_are_frozen():
+    d = freeze({'list': [1, {'nested': [2]}], 'dict': {'a': 1}})
+
+    assert isinstance(d['list'], FrozenList)
+    assert isinstance(d['list'][1], FrozenDict)
+    assert d == {'list': [1, {'nested': [2]}], 'dict': {'a': 1}}
+
+    with pytest.raises(TypeError):
+        d['dict']['b'] = 2
+    with pytest.raises(AttributeError):
+        d['list'].append(3)
+
+
+def test_missing_keys_raise():
+    d = FrozenDict({'a': 1})
+
+    with pytest.raises(KeyError):
+        d['b']
+    assert d.get('b', 2) == 2
+
+
+def test_merge_behaves_like_dict_unpacking():
+    base = FrozenDict({'a': 1, 'b': 2})
+    merged = base.merge({'b': 3, 'c': 4})
+
+    assert base == {'a': 1, 'b': 2}
+    assert merged == {'a': 1, 'b': 3, 'c': 4}
+    assert [*merged] == [*{**base, **{'b': 3, 'c': 4}}]
+    assert len(merged) == 3
+    assert 'c' in merged and 'c' not in base
+
+
+def test_long_merge_chains():
+    d = FrozenDict()
+    expected = {}
+    for i in range(100):
+        d = d.merge({i % 7: i})
+        expected[i % 7] = i
+
+        assert d._depth <= FrozenDict.MAX_DEPTH
+        assert len(d) == len(expected)
+    assert d == expected
+
+
+def test_merge_keeps_untouched_values():
+    nested = {'deep': ['values']}
+    base = FrozenDict({'nested': nested})
+    merged = base.merge({'other': 1})
+
+    assert merged['nested'] is base['nested']
+    assert base.merge({}) is base
+
+
+def test_pickle():
+    d = FrozenDict({'a': [1, 2]}).merge({'b': {'c': 3}})
+
+    assert pickle.loads(pickle.dumps(d)) == d
+
+
+def test_views_are_kept():
+    class View(FrozenView):
+        def thaw(self):
+            return {}
+
+    view = View()
+    assert freeze({'view': view})['view'] is view
+    assert freeze([view])[0] is view
@@ -0,0 +1,55 @@
+"""
+    Tests for the cache bounded by the size of its values.
+"""
+
+from analyzer.util import LRUCache
+
+
+def sizeof(key, value) -> int:
+    return len(value)
+
+
+def test_hits_and_misses():
+    cache = LRUCache(10, sizeof)
+    cache.put('a', 'aaa')
+
+    assert cache.get('a') == 'aaa'
+    assert cache.get('b') is None
+    assert cache.get('b', 'default') == 'default'
+    assert cache.statistics() == {
+        'hits': 1, 'misses': 2, 'evictions': 0, 'entries': 1, 'size': 3
+    }
+
+
+def test_least_recently_used_are_evicted():
+    cache = LRUCache(10, sizeof)
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    cache.get('a')
+    cache.put('c', 'cccc')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'aaaa'
+    assert cache.get('c') == 'cccc'
+    assert cache.evictions == 1
+    assert cache.size == 8
+
+
+def test_replacing_a_value():
+    cache = LRUCache(10, sizeof)
+    cache.put('a', 'aaaa')
+    cache.put('a', 'aaaaaaaa')
+
+    assert len(cache) == 1
+    assert cache.size == 8
+    assert cache.evictions == 0
+
+
+def test_values_larger_than_the_budget_are_not_kept():
+    cache = LRUCache(3, sizeof)
+    cache.put('a', 'aaa')
+    cache.put('b', 'bbbb')
+
+    assert cache.get('a') == 'aaa'
+    assert cache.get('b') is None
+    assert cache.evictions == 0
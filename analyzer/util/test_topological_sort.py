@@ -5,7 +5,7 @@
 import pytest
 from typing import Iterable
 
-from util import topological_sort
+from util import topological_layers, topological_sort
 
 
 class Dependable:
@@ -84,6 +84,21 @@ class TestTopologicalSort:
                         break
                 assert found
 
+    def test_layers_of_example_graph(self):
+        objs = TestTopologicalSort.objects()
+        layers = topological_layers(
+            objs, TestTopologicalSort.dependency_function
+        )
+        assert sorted(o.name for layer in layers for o in layer) == sorted(
+            o.name for o in objs
+        )
+
+        # Everything an object depends on is in an earlier layer
+        for i, layer in enumerate(layers):
+            earlier = {o.name for previous in layers[:i] for o in previous}
+            for obj in layer:
+                assert set(obj.dependencies) <= earlier
+
     def test_loop_does_not_cause_sort_to_hang(self):
         one = Dependable(name='one', dependencies=['other'])
         other = Dependable(name='other', dependencies=['other'])
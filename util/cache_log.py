@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+from sys import argv, stdin, stderr
+from analyzer.logs.cache import write_cache
+from analyzer.logs.compressed import is_compressed, open_log
+from analyzer.logs.mapped import MappedLog
+from analyzer.logs.parsing import scan_records
+
+if __name__ != '__main__':
+    print(
+        'This file was meant to be called from the command line.',
+        file=stderr
+    )
+    exit(1)
+
+if len(argv) not in (2, 3):
+    print(f'\nUsage: {argv[0]} <cache file> [log file]', file=stderr)
+    exit(1)
+
+cache = argv[1]
+
+if len(argv) == 3 and is_compressed(argv[2]):
+    with open_log(argv[2]) as lines:
+        write_cache(scan_records(lines), cache)
+elif len(argv) == 3:
+    with MappedLog(argv[2]) as log:
+        write_cache(log, cache)
+else:
+    write_cache(scan_records(stdin), cache)
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 
-from sys import stdin, stdout, stderr
-from analyzer.logs.record import LogRecord
-from analyzer.logs.parsing import gather_records
+from sys import argv, stdin, stdout, stderr
+from analyzer.logs.compressed import is_compressed, open_log
+from analyzer.logs.mapped import MappedLog
+from analyzer.logs.parsing import scan_records
 
 if __name__ != '__main__':
     print(
@@ -11,9 +12,23 @@ if __name__ != '__main__':
     )
     exit(1)
 
+if len(argv) > 2:
+    print(f'\nUsage: {argv[0]} [log file]', file=stderr)
+    exit(1)
+
 
-for record_lines in gather_records(stdin):
+def convert(records):
     from json import dumps
-    record = LogRecord('\n'.join(record_lines))
-    ser = dumps(record.__dict__)
-    print(ser, file=stdout)
+    for record in records:
+        ser = dumps(record.to_dict())
+        print(ser, file=stdout)
+
+
+if len(argv) == 2 and is_compressed(argv[1]):
+    with open_log(argv[1]) as lines:
+        convert(scan_records(lines))
+elif len(argv) == 2:
+    with MappedLog(argv[1]) as log:
+        convert(log)
+else:
+    convert(scan_records(stdin))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+from sys import argv, stdout, stderr
+from analyzer.benchmark.generator import LogGenerator
+
+if __name__ != '__main__':
+    print(
+        'This file was meant to be called from the command line.',
+        file=stderr
+    )
+    exit(1)
+
+if len(argv) not in (2, 3):
+    print(f'\nUsage: {argv[0]} <number of records> [seed]', file=stderr)
+    exit(1)
+
+seed = int(argv[2]) if len(argv) == 3 else 0
+stdout.writelines(LogGenerator(seed=seed).lines(int(argv[1])))